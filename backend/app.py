@@ -1,21 +1,34 @@
 """
 FastAPI application untuk BeatLens
 """
-from fastapi import FastAPI, HTTPException, status
+from fastapi import FastAPI, Header, HTTPException, Query, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
 import os
+import asyncio
 from dotenv import load_dotenv
 import time
+from typing import List, Optional, Tuple
+from pydantic import BaseModel
 
 from models import (
     RecommendationRequest, RecommendationResponse,
-    SongResponse, GenresResponse, MoodsResponse, ErrorResponse
+    BatchRecommendationRequest, BatchRecommendationResponse,
+    SongResponse, SongListResponse, SongBatchResponse, GenresResponse, MoodsResponse, ErrorResponse
 )
 from db.database import get_database
+from db.async_database import AsyncDatabase, DatabaseBusyError
 from services.rule_engine import RuleEngine
-from services.knn_recommender import KNNRecommender
-from services.spotify_client import SpotifyClient
+from services.catalog import CatalogStore
+from services.sql_candidates import SQLCandidateProvider
+from services.audio_features import parse_weights
+from services.recommendation_table import RecommendationEntry, compute_entries
+from services.spotify_client import AsyncSpotifyClient
+from services.resilience import CircuitBreaker
+from services.response_cache import RecommendationCache
+from services.http_cache import CatalogETags, VersionedValue, etag_matches
+from services.cache import MISSING
 
 # Load environment variables
 load_dotenv()
@@ -41,59 +54,167 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Gzip opt-in untuk response di atas GZIP_MIN_SIZE bytes (default 0 =
+# nonaktif): response ~4-5x lebih kecil tetapi req/s per core sekitar
+# setengahnya (lihat benchmarks/recommend_throughput.py)
+gzip_min_size = int(os.getenv("GZIP_MIN_SIZE", "0"))
+if gzip_min_size > 0:
+    app.add_middleware(
+        GZipMiddleware,
+        minimum_size=gzip_min_size,
+        compresslevel=int(os.getenv("GZIP_LEVEL", "5"))
+    )
+
 # Global instances
 db = None
+database = None  # AsyncDatabase untuk query dari handler
 rule_engine = None
-knn_recommender = None
+catalog = None
+candidate_provider = None
+catalog_watcher = None
 spotify_client = None
+recommendation_cache = None
+catalog_etags = None  # ETag/Cache-Control endpoint katalog (genres, moods, song)
+genres_cache = None
+fast_responses = False
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
-    global db, rule_engine, knn_recommender, spotify_client
+    global db, database, rule_engine, catalog, candidate_provider, catalog_watcher, spotify_client, recommendation_cache
+    global catalog_etags, genres_cache, fast_responses
     
     print("🚀 Starting BeatLens API...")
     
     # Initialize database
     db_url = os.getenv("DATABASE_URL", "beatlens.db")
-    db = get_database(db_url)
+    db = get_database(db_url, pool_size=int(os.getenv("SQLITE_POOL_SIZE", "4")))
     db.connect()
+    db.ensure_search_index()
+    db.ensure_change_counter()
+    # Query dari handler berjalan di thread pool, bukan di event loop
+    database = AsyncDatabase(
+        db,
+        max_pending=int(os.getenv("SQLITE_MAX_PENDING", "64")),
+        queue_timeout=float(os.getenv("SQLITE_QUEUE_TIMEOUT", "1"))
+    )
     print(f"✓ Database connected: {db_url}")
     
     # Initialize rule engine
     rule_engine = RuleEngine()
     print("✓ Rule engine initialized")
     
-    # Initialize KNN recommender
-    knn_recommender = KNNRecommender()
-    
-    # Build encoders from database
-    songs = db.get_all_songs()
-    if songs:
-        knn_recommender.build_encoders(songs)
-        print(f"✓ KNN recommender initialized with {len(songs)} songs")
+    # Load catalog snapshot (index rule engine + KNN feature matrix)
+    candidate_source = os.getenv("CANDIDATE_SOURCE", "memory").lower()
+    precompute_table = os.getenv("RECOMMEND_TABLE", "true").lower() in ("1", "true", "yes")
+    feature_weights = parse_weights(os.getenv("KNN_FEATURE_WEIGHTS"))
+    index_options = {
+        "kind": os.getenv("KNN_INDEX", "auto"),
+        "ann_threshold": int(os.getenv("KNN_ANN_THRESHOLD", "100000")),
+        "n_probe": int(os.getenv("KNN_IVF_PROBE", "8")),
+        "path": os.getenv("KNN_INDEX_PATH") or None,
+    }
+    if os.getenv("KNN_IVF_LISTS"):
+        index_options["n_lists"] = int(os.getenv("KNN_IVF_LISTS"))
+    poll_interval = float(os.getenv("CATALOG_POLL_INTERVAL", "5"))
+    if candidate_source == "sql":
+        # Katalog tidak di-load: kandidat di-query per request lewat index SQL
+        candidate_provider = SQLCandidateProvider(
+            db, rule_engine, feature_weights=feature_weights,
+            limit=int(os.getenv("SQL_CANDIDATE_LIMIT", "0"))
+        )
+        candidate_provider.load()
+        print(f"✓ SQL candidate provider initialized ({candidate_provider.size} songs, "
+              f"limit: {candidate_provider.limit or 'none'})")
+        catalog_watcher = asyncio.create_task(candidate_provider.watch(poll_interval))
+    elif candidate_source != "memory":
+        raise ValueError(f"Invalid CANDIDATE_SOURCE: {candidate_source} (use memory or sql)")
     else:
-        print("⚠ Warning: No songs in database. Run init_db.py first!")
+        catalog = CatalogStore(db, precompute_table=precompute_table,
+                               feature_weights=feature_weights, index_options=index_options,
+                               artifact_path=os.getenv("CATALOG_ARTIFACT") or None,
+                               incremental=os.getenv("CATALOG_INCREMENTAL", "true").lower() in ("1", "true", "yes"))
+        snapshot = catalog.load()
+        if snapshot.songs:
+            print(f"✓ KNN recommender initialized with {len(snapshot.songs)} songs "
+                  f"from {snapshot.source} (index: {snapshot.recommender.index.stats()})")
+            audio = snapshot.recommender.audio
+            if audio.columns:
+                print(f"✓ Audio features: {', '.join(audio.columns)} "
+                      f"({int(audio.present.sum())} songs, {audio.nbytes / 1024:.1f} KB)")
+            if snapshot.table is not None:
+                table_stats = snapshot.table.stats()
+                print(f"✓ Recommendation table built: {table_stats['entries']} entries, "
+                      f"{table_stats['memory_kb']} KB in {table_stats['build_time']}s")
+        else:
+            print("⚠ Warning: No songs in database. Run init_db.py first!")
+    
+        # Reload catalog di background hanya saat tabel songs berubah
+        catalog_watcher = asyncio.create_task(catalog.watch(poll_interval))
     
     # Initialize Spotify client
     spotify_client_id = os.getenv("SPOTIFY_CLIENT_ID")
     spotify_client_secret = os.getenv("SPOTIFY_CLIENT_SECRET")
     
-    spotify_client = SpotifyClient(spotify_client_id, spotify_client_secret)
+    # Track metadata cache; persistent tier default di sebelah database
+    # (set SPOTIFY_CACHE_DB= kosong untuk menonaktifkan)
+    spotify_cache_db = os.getenv(
+        "SPOTIFY_CACHE_DB",
+        os.path.join(os.path.dirname(db.db_url), "spotify_cache.db")
+    )
+    
+    spotify_client = AsyncSpotifyClient(
+        spotify_client_id,
+        spotify_client_secret,
+        max_connections=int(os.getenv("SPOTIFY_MAX_CONNECTIONS", "20")),
+        max_concurrency=int(os.getenv("SPOTIFY_MAX_CONCURRENCY", "10")),
+        timeout=float(os.getenv("SPOTIFY_TIMEOUT", "3")),
+        enrich_deadline=float(os.getenv("SPOTIFY_ENRICH_DEADLINE", "1.5")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("SPOTIFY_BREAKER_FAILURES", "5")),
+            recovery_timeout=float(os.getenv("SPOTIFY_BREAKER_RECOVERY", "30")),
+            slow_call_threshold=float(os.getenv("SPOTIFY_SLOW_CALL", "1.0"))
+        ),
+        cache_size=int(os.getenv("SPOTIFY_CACHE_SIZE", "2048")),
+        cache_ttl=float(os.getenv("SPOTIFY_CACHE_TTL", str(24 * 3600))),
+        negative_ttl=float(os.getenv("SPOTIFY_NEGATIVE_TTL", "300")),
+        cache_path=spotify_cache_db or None
+    )
     
     if spotify_client.enabled:
+        spotify_client.start_token_renewal()
         print("✓ Spotify client initialized")
     else:
         print("⚠ Spotify credentials not found. Preview features will be disabled.")
     
+    # Response cache /api/recommend, di-invalidate oleh versi katalog
+    recommendation_cache = RecommendationCache(
+        maxsize=int(os.getenv("RECOMMEND_CACHE_SIZE", "2048")),
+        ttl=float(os.getenv("RECOMMEND_CACHE_TTL", "300"))
+    )
+    
+    # HTTP caching /api/genres, /api/moods, /api/song/{id}
+    catalog_etags = CatalogETags(max_age=int(os.getenv("HTTP_CACHE_MAX_AGE", "60")))
+    genres_cache = VersionedValue()
+    
+    # Fast response mode: response rekomendasi di-encode langsung dengan
+    # pydantic-core, tanpa validasi ulang oleh FastAPI
+    fast_responses = os.getenv("FAST_RESPONSES", "false").lower() in ("1", "true", "yes")
+    
     print("✅ BeatLens API ready!")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Cleanup on shutdown"""
-    if db:
+    if catalog_watcher:
+        catalog_watcher.cancel()
+    if spotify_client:
+        await spotify_client.aclose()
+    if database:
+        database.close()
+    elif db:
         db.close()
     print("👋 BeatLens API shutdown")
 
@@ -107,6 +228,15 @@ async def value_error_handler(request, exc):
     )
 
 
+@app.exception_handler(DatabaseBusyError)
+async def database_busy_handler(request, exc):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"error": "Service busy", "detail": str(exc)},
+        headers={"Retry-After": "1"}
+    )
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     return JSONResponse(
@@ -132,17 +262,57 @@ async def health_check():
     return {
         "status": "healthy",
         "database": "connected" if db else "disconnected",
-        "spotify": "enabled" if spotify_client and spotify_client.enabled else "disabled"
+        "database_pool": database.stats() if database else None,
+        "spotify": "enabled" if spotify_client and spotify_client.enabled else "disabled",
+        "spotify_cache": spotify_client.cache_stats() if spotify_client else None,
+        "spotify_breaker": spotify_client.resilience_stats() if spotify_client else None,
+        "recommendation_cache": recommendation_cache.stats() if recommendation_cache else None,
+        "recommendation_table": (catalog.snapshot.table.stats()
+                                 if catalog and catalog.snapshot.table is not None else None)
     }
 
 
-@app.post("/api/recommend", response_model=RecommendationResponse)
-async def recommend(request: RecommendationRequest):
+def catalog_version() -> int:
+    """Versi katalog saat ini (snapshot in-memory atau SQL candidate provider)"""
+    if catalog and catalog.snapshot is not None:
+        return catalog.snapshot.version
+    return candidate_provider.version
+
+
+def catalog_state() -> Tuple[int, str]:
     """
-    Get song recommendations based on mood, genre, and tempo
+    Versi katalog per proses dan ETag katalog (sama di semua worker untuk
+    data yang sama), dibaca dari snapshot yang sama
     """
-    start_time = time.time()
+    if catalog and catalog.snapshot is not None:
+        snapshot = catalog.snapshot
+        return snapshot.version, catalog_etags.etag(snapshot.changes, len(snapshot.songs),
+                                                    snapshot.version)
+    provider = candidate_provider
+    version = provider.version
+    return version, catalog_etags.etag(provider.changes, provider.size, version)
+
+
+def not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """Response 304 jika If-None-Match cocok dengan ETag, None jika tidak"""
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=catalog_etags.headers(etag))
+    return None
+
+
+def fast_json(model: BaseModel) -> Response:
+    """
+    Encode response model yang sudah tervalidasi langsung ke JSON
     
+    Dengan return Response, FastAPI melewati validasi ulang terhadap
+    response_model dan jsonable_encoder + json.dumps; model_dump_json
+    di-encode sekali oleh pydantic-core.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def validate_recommendation_request(request: RecommendationRequest):
+    """Validate mood dan tempo, raise HTTP 400 jika invalid"""
     # Validate mood
     valid_moods = ["sedih", "happy", "galau", "chill", "semangat"]
     if request.mood not in valid_moods:
@@ -157,25 +327,157 @@ async def recommend(request: RecommendationRequest):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid tempo. Must be one of: slow, medium, fast"
         )
+
+
+@app.post("/api/recommend", response_model=RecommendationResponse)
+async def recommend(request: RecommendationRequest):
+    """
+    Get song recommendations based on mood, genre, and tempo
+    """
+    start_time = time.time()
+    validate_recommendation_request(request)
+    
+    responses = await recommend_many([request], start_time)
+    return fast_json(responses[0]) if fast_responses else responses[0]
+
+
+@app.post("/api/recommend/batch", response_model=BatchRecommendationResponse)
+async def recommend_batch(batch: BatchRecommendationRequest):
+    """
+    Get recommendations untuk banyak request sekaligus
     
-    # Get all songs from database
-    all_songs = db.get_all_songs()
+    Hasil berurutan sama dengan batch.requests. KNN scoring dan Spotify
+    enrichment dilakukan sekali untuk seluruh batch.
+    """
+    start_time = time.time()
+    for request in batch.requests:
+        validate_recommendation_request(request)
     
-    if not all_songs:
-        return RecommendationResponse(
-            recommendations=[],
-            metadata={"count": 0, "message": "No songs in database"}
-        )
+    responses = await recommend_many(batch.requests, start_time)
     
-    # Step 1: Rule-based filtering
-    candidates = rule_engine.filter_by_mood(
-        mood=request.mood,
-        genre=request.genre,
-        tempo=request.tempo,
-        songs=all_songs
+    response = BatchRecommendationResponse(
+        results=responses,
+        metadata={
+            "count": len(responses),
+            "cached": sum(1 for response in responses if response.metadata.get("cached")),
+            "processing_time": round(time.time() - start_time, 3)
+        }
     )
+    return fast_json(response) if fast_responses else response
+
+
+async def recommend_many(requests: List[RecommendationRequest],
+                         start_time: float) -> List[RecommendationResponse]:
+    """
+    Layani request dari cache, lalu build sisanya bersama dan cache hasilnya
+    """
+    # Snapshot katalog in-memory (tanpa DB I/O per request); dengan
+    # CANDIDATE_SOURCE=sql tidak ada snapshot, versi dari candidate provider
+    snapshot = catalog.snapshot if catalog else None
+    version = snapshot.version if snapshot is not None else candidate_provider.version
+    
+    responses: List[Optional[RecommendationResponse]] = [None] * len(requests)
+    pending = {}  # cache key -> posisi request (request identik di-build sekali)
+    for i, request in enumerate(requests):
+        # Cache hit: tanpa filtering, KNN maupun Spotify
+        cache_key = recommendation_cache.make_key(request.mood, request.genre, request.tempo, request.k)
+        cached = recommendation_cache.get(version, cache_key)
+        if cached is not MISSING:
+            responses[i] = cached.model_copy(update={"metadata": {
+                **cached.metadata,
+                "cached": True,
+                "processing_time": round(time.time() - start_time, 3)
+            }})
+        else:
+            pending.setdefault(cache_key, []).append(i)
+    
+    if pending:
+        keys = list(pending)
+        built = await build_recommendations(
+            [requests[pending[key][0]] for key in keys], snapshot, start_time
+        )
+        for key, response in zip(keys, built):
+            # Response dengan preview yang tidak lengkap di-cache lebih singkat
+            complete = all(
+                song.preview_url or song.cover_url or not song.spotify_id
+                for song in response.recommendations
+            ) or not (spotify_client and spotify_client.enabled)
+            recommendation_cache.set(version, key, response, complete=complete)
+            for i in pending[key]:
+                responses[i] = response
+    
+    return responses
+
+
+async def build_recommendations(requests: List[RecommendationRequest], snapshot,
+                                start_time: float) -> List[RecommendationResponse]:
+    """
+    Jalankan rule-based filtering, KNN dan Spotify enrichment untuk
+    sekumpulan request
+    
+    snapshot None berarti kandidat di-query dari database lewat
+    candidate_provider (CANDIDATE_SOURCE=sql).
+    """
+    if not (len(snapshot.songs) if snapshot is not None else candidate_provider.size):
+        return [
+            RecommendationResponse(
+                recommendations=[],
+                metadata={"count": 0, "message": "No songs in database"}
+            )
+            for _ in requests
+        ]
+    
+    # Step 1+2: Rule-based filtering dan KNN, diambil dari tabel precomputed
+    # jika kombinasi request ada di tabel
+    entries: List[Optional[RecommendationEntry]] = [None] * len(requests)
+    if snapshot is not None and snapshot.table is not None:
+        for i, request in enumerate(requests):
+            entries[i] = snapshot.table.lookup(request.mood, request.genre, request.tempo, request.k)
     
-    if not candidates:
+    # Sisanya di-score bersama (satu matrix-matrix product); top-k berupa
+    # prefix dari top-max_k sehingga cukup dihitung dengan k terbesar
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    if missing:
+        keys = [(requests[i].mood, requests[i].genre, requests[i].tempo) for i in missing]
+        k = max(requests[i].k for i in missing)
+        if snapshot is not None:
+            computed = compute_entries(snapshot, rule_engine, keys, k)
+        else:
+            computed = await database.run(candidate_provider.compute_entries, keys, k)
+        for i, entry in zip(missing, computed):
+            entries[i] = entry
+    
+    if snapshot is not None:
+        by_id = snapshot.by_id
+    else:
+        # Kolom lengkap hanya untuk pemenang top-k (satu query IN)
+        by_id = await database.get_songs_by_ids([
+            song_id for entry, request in zip(entries, requests)
+            for song_id in entry.song_ids[:request.k].tolist()
+        ])
+    results = [entry.materialize(by_id, request.k)
+               for entry, request in zip(entries, requests)]
+    
+    # Step 3: Enrich with Spotify data (satu batch call untuk semua request)
+    spotify_tracks = {}
+    if spotify_client and spotify_client.enabled:
+        spotify_ids = dict.fromkeys(
+            song['spotify_id'] for songs in results for song in songs if song.get('spotify_id')
+        )
+        spotify_tracks = await spotify_client.get_tracks_preview(list(spotify_ids))
+    
+    return [
+        render_recommendations(entry, recommendations, spotify_tracks, start_time)
+        for entry, recommendations in zip(entries, results)
+    ]
+
+
+def render_recommendations(entry: RecommendationEntry, recommendations: List[dict],
+                           spotify_tracks: dict, start_time: float) -> RecommendationResponse:
+    """
+    Generate reasons dan gabungkan data Spotify untuk satu request
+    """
+    if entry.candidates_count == 0:
         return RecommendationResponse(
             recommendations=[],
             metadata={
@@ -184,20 +486,8 @@ async def recommend(request: RecommendationRequest):
             }
         )
     
-    # Step 2: KNN similarity matching
-    user_profile = {
-        "mood": request.mood,
-        "genre": request.genre if request.genre else candidates[0]['genre'],
-        "tempo": request.tempo if request.tempo else candidates[0]['tempo']
-    }
+    user_profile = entry.user_profile
     
-    recommendations = knn_recommender.recommend(
-        user_profile=user_profile,
-        candidates=candidates,
-        k=request.k
-    )
-    
-    # Step 3: Enrich with Spotify data and generate reasons
     enriched_recommendations = []
     for song in recommendations:
         # Generate reason
@@ -218,11 +508,10 @@ async def recommend(request: RecommendationRequest):
         preview_url = None
         cover_url = None
         
-        if spotify_client and spotify_client.enabled and song.get('spotify_id'):
-            spotify_data = spotify_client.get_track_preview(song['spotify_id'])
-            if spotify_data:
-                preview_url = spotify_data.get('preview_url')
-                cover_url = spotify_data.get('cover_url')
+        spotify_data = spotify_tracks.get(song.get('spotify_id'))
+        if spotify_data:
+            preview_url = spotify_data.get('preview_url')
+            cover_url = spotify_data.get('cover_url')
         
         enriched_recommendations.append({
             "id": song['id'],
@@ -245,17 +534,24 @@ async def recommend(request: RecommendationRequest):
         metadata={
             "count": len(enriched_recommendations),
             "processing_time": round(processing_time, 3),
-            "candidates_filtered": len(candidates)
+            "candidates_filtered": entry.candidates_count
         }
     )
 
 
 @app.get("/api/song/{song_id}", response_model=SongResponse)
-async def get_song(song_id: int):
+async def get_song(song_id: int, response: Response,
+                   if_none_match: Optional[str] = Header(None)):
     """
     Get detailed information about a specific song
     """
-    song = db.get_song_by_id(song_id)
+    # Conditional GET dijawab dari versi katalog, tanpa query database
+    _, etag = catalog_state()
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    
+    song = await database.get_song_by_id(song_id)
     
     if not song:
         raise HTTPException(
@@ -268,11 +564,16 @@ async def get_song(song_id: int):
     cover_url = None
     
     if spotify_client and spotify_client.enabled and song.get('spotify_id'):
-        spotify_data = spotify_client.get_track_preview(song['spotify_id'])
+        spotify_data = await spotify_client.get_track_preview(song['spotify_id'])
         if spotify_data:
             preview_url = spotify_data.get('preview_url')
             cover_url = spotify_data.get('cover_url')
     
+    # Preview yang gagal di-fetch (Spotify error) jangan di-cache client
+    complete = (preview_url or cover_url or not song.get('spotify_id')
+                or not (spotify_client and spotify_client.enabled))
+    response.headers.update(catalog_etags.headers(etag if complete else None))
+    
     return SongResponse(
         id=song['id'],
         title=song['title'],
@@ -286,21 +587,142 @@ async def get_song(song_id: int):
     )
 
 
+# Batas jumlah ID per request /api/songs/batch
+MAX_SONG_BATCH = 500
+MAX_SONG_ID = 2 ** 63 - 1  # batas SQLite INTEGER
+
+
+@app.get("/api/songs/batch", response_model=SongBatchResponse)
+async def get_songs_batch(
+    ids: str = Query(..., description="Comma-separated song IDs, misalnya 1,2,3")
+):
+    """
+    Get banyak lagu sekaligus dengan satu lookup dan satu Spotify batch call
+    """
+    try:
+        song_ids = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers"
+        )
+    if any(song_id <= 0 or song_id > MAX_SONG_ID for song_id in song_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must be between 1 and {MAX_SONG_ID}"
+        )
+    if not song_ids or len(song_ids) > MAX_SONG_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"ids must contain between 1 and {MAX_SONG_BATCH} song IDs"
+        )
+    
+    # Snapshot in-memory dulu; ID yang belum masuk snapshot (lagu baru
+    # sebelum poll berikutnya) diambil dengan satu query IN
+    snapshot = catalog.snapshot if catalog else None
+    found = {}
+    if snapshot is not None:
+        for song_id in song_ids:
+            if song_id not in found:
+                song = snapshot.by_id.get(song_id)
+                if song is not None:
+                    found[song_id] = song
+    remaining = [song_id for song_id in song_ids if song_id not in found]
+    if remaining:
+        found.update(await database.get_songs_by_ids(remaining))
+    
+    # Enrich with Spotify data (satu batch call untuk semua ID unik)
+    spotify_tracks = {}
+    if spotify_client and spotify_client.enabled:
+        spotify_tracks = await spotify_client.get_tracks_preview(
+            [song['spotify_id'] for song in found.values() if song.get('spotify_id')]
+        )
+    
+    songs = []
+    for song_id in song_ids:
+        song = found.get(song_id)
+        if song is None:
+            songs.append(None)
+            continue
+        spotify_data = spotify_tracks.get(song.get('spotify_id')) or {}
+        songs.append(SongResponse(
+            id=song['id'],
+            title=song['title'],
+            artist=song['artist'],
+            genre=song['genre'],
+            mood=song['mood'],
+            tempo=song['tempo'],
+            spotify_id=song.get('spotify_id'),
+            preview_url=spotify_data.get('preview_url'),
+            cover_url=spotify_data.get('cover_url')
+        ))
+    
+    return SongBatchResponse(
+        songs=songs,
+        missing=list(dict.fromkeys(song_id for song_id in song_ids if song_id not in found))
+    )
+
+
+@app.get("/api/songs", response_model=SongListResponse)
+async def list_songs(
+    genre: Optional[str] = None,
+    mood: Optional[str] = None,
+    tempo: Optional[str] = None,
+    cursor: Optional[int] = Query(None, description="next_cursor dari halaman sebelumnya"),
+    limit: int = Query(50, ge=1, le=200)
+):
+    """
+    List songs urut id dengan keyset pagination dan filter genre/mood/tempo
+    """
+    # Ambil satu row lebih untuk tahu apakah masih ada halaman berikutnya
+    songs = await database.list_songs(genre, mood, tempo, after_id=cursor, limit=limit + 1)
+    next_cursor = songs[limit - 1]['id'] if len(songs) > limit else None
+    return SongListResponse(songs=songs[:limit], next_cursor=next_cursor)
+
+
+@app.get("/api/songs/search", response_model=SongListResponse)
+async def search_songs(
+    q: str = Query(..., min_length=1, max_length=200, description="Judul atau artis"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Full-text search judul dan artis (prefix match untuk kata terakhir)
+    """
+    return SongListResponse(songs=await database.search_songs(q, limit))
+
+
 @app.get("/api/genres", response_model=GenresResponse)
-async def get_genres():
+async def get_genres(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Get list of available genres
     """
-    genres = db.get_genres()
+    version, etag = catalog_state()
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    
+    # Query DISTINCT hanya sekali per versi katalog
+    genres = genres_cache.get(version)
+    if genres is MISSING:
+        genres = await database.get_genres()
+        genres_cache.set(version, genres)
+    
+    response.headers.update(catalog_etags.headers(etag))
     return GenresResponse(genres=genres)
 
 
 @app.get("/api/moods", response_model=MoodsResponse)
-async def get_moods():
+async def get_moods(response: Response, if_none_match: Optional[str] = Header(None)):
     """
     Get list of supported moods
     """
+    _, etag = catalog_state()
+    cached = not_modified(if_none_match, etag)
+    if cached:
+        return cached
+    
     moods = ["sedih", "happy", "galau", "chill", "semangat"]
+    response.headers.update(catalog_etags.headers(etag))
     return MoodsResponse(moods=moods)
 
 
@@ -0,0 +1,72 @@
+"""
+Benchmark recall@k dan latency IVF index terhadap exact search
+
+Usage (dari direktori backend):
+    python -m benchmarks.ann_recall --songs 200000 --probes 1 4 8 16
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_songs
+from services.ann_index import ExactIndex, IVFIndex
+from services.knn_recommender import KNNRecommender
+
+
+def recall_at_k(index, exact: ExactIndex, queries: np.ndarray, k: int):
+    """
+    Hitung recall@k rata-rata dan latency per query
+    
+    Returns:
+        Tuple (recall, ms per query)
+    """
+    hits = 0
+    elapsed = 0.0
+    for query in queries:
+        expected, _ = exact.search(query, k)
+        start = time.perf_counter()
+        found, _ = index.search(query, k)
+        elapsed += time.perf_counter() - start
+        hits += len(np.intersect1d(expected, found))
+    return hits / (k * len(queries)), elapsed * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+    
+    songs = make_songs(args.songs)
+    recommender = KNNRecommender(index_options={"kind": "exact"})
+    recommender.build_encoders(songs)
+    vectors = recommender.feature_matrix
+    print(f"Catalog: {len(songs)} songs x {vectors.shape[1]} dims")
+    
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + rng.normal(0, 0.05, queries.shape).astype(np.float32)
+    
+    exact = recommender.index
+    start = time.perf_counter()
+    for query in queries:
+        exact.search(query, args.k)
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(f"exact            recall@{args.k}=1.000  {exact_ms:7.2f} ms/query")
+    
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors, n_lists=args.lists)
+    print(f"IVF build: {time.perf_counter() - start:.2f}s ({ivf.n_lists} lists)")
+    
+    for n_probe in args.probes:
+        ivf.n_probe = n_probe
+        recall, ms = recall_at_k(ivf, exact, queries, args.k)
+        print(f"ivf n_probe={n_probe:<4d} recall@{args.k}={recall:.3f}  {ms:7.2f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
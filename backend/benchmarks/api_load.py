@@ -0,0 +1,99 @@
+"""
+Load test /api/song/{id} terhadap ukuran thread pool database
+
+Menjalankan app in-process (startup event + httpx ASGITransport, satu
+event loop seperti satu worker uvicorn) per SQLITE_POOL_SIZE dan mengirim
+request bersamaan. Selain throughput, latency endpoint "/" (tanpa query)
+diukur di tengah load untuk melihat apakah event loop ter-blok oleh query.
+
+Usage (dari direktori backend):
+    python -m benchmarks.api_load --songs 200000 --pools 1 2 4 8
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.synthetic import make_songs
+from db.ingest import ingest_songs
+from db.init_db import create_schema
+
+
+async def load(db_path: str, pool_size: int, songs: int, concurrency: int, seconds: float):
+    """
+    Returns:
+        Tuple (requests per detik, status 503, jumlah probe "/", p50 dan
+        p99 latency "/" dalam ms)
+    """
+    os.environ.update({
+        "DATABASE_URL": db_path,
+        "SQLITE_POOL_SIZE": str(pool_size),
+        "SPOTIFY_CLIENT_ID": "",
+        "SPOTIFY_CLIENT_SECRET": "",
+        "SPOTIFY_CACHE_DB": "",
+        "RECOMMEND_TABLE": "false",
+        "CATALOG_POLL_INTERVAL": "3600",
+    })
+    import app
+    
+    await app.startup_event()
+    transport = httpx.ASGITransport(app=app.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://beatlens", timeout=30) as client:
+        stop = time.monotonic() + seconds
+        done = [0]
+        busy = [0]
+        probe = []
+        
+        async def worker(seed: int):
+            rng = random.Random(seed)
+            while time.monotonic() < stop:
+                response = await client.get(f"/api/song/{rng.randint(1, songs)}")
+                done[0] += 1
+                busy[0] += response.status_code == 503
+        
+        async def prober():
+            while time.monotonic() < stop:
+                start = time.perf_counter()
+                await client.get("/")
+                probe.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.02)
+        
+        start = time.monotonic()
+        await asyncio.gather(prober(), *(worker(i) for i in range(concurrency)))
+        elapsed = time.monotonic() - start
+    await app.shutdown_event()
+    probe.sort()
+    return (done[0] / elapsed, busy[0], len(probe),
+            probe[len(probe) // 2], probe[int(len(probe) * 0.99)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--pools", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "songs.db")
+        conn = sqlite3.connect(db_path)
+        create_schema(conn)
+        ingest_songs(conn, iter(make_songs(args.songs)))
+        conn.close()
+        
+        print(f"Catalog: {args.songs} songs, {args.concurrency} concurrent clients, {args.seconds}s per run")
+        for pool_size in args.pools:
+            rps, busy, probes, p50, p99 = asyncio.run(load(db_path, pool_size, args.songs,
+                                                   args.concurrency, args.seconds))
+            print(f"pool {pool_size:2d}  {rps:8.0f} req/sec  {busy:5d} x 503  "
+                  f"'/' {probes:4d} probes  p50 {p50:6.1f}ms  p99 {p99:6.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
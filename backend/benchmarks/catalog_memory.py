@@ -0,0 +1,115 @@
+"""
+Benchmark waktu load dan memori private per worker untuk snapshot katalog
+
+Membandingkan list of dicts (format get_all_songs) dengan SongCatalog
+(kolom) dan snapshot dari compiled catalog artifact (memmap), serta alokasi
+per request antara jalur lama (filter_by_mood + recommend atas dicts) dan
+jalur row index (compute_entry + materialize top-k). Memori diukur dengan
+tracemalloc, sehingga page memmap yang dibagi antar worker tidak ikut
+terhitung.
+
+Usage (dari direktori backend):
+    python -m benchmarks.catalog_memory --songs 1000000
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import make_songs
+from services.catalog import CatalogSnapshot
+from services.catalog_artifact import CatalogArtifact, write_catalog_artifact
+from services.recommendation_table import compute_entry
+from services.rule_engine import CatalogIndex, RuleEngine
+from services.song_catalog import SongCatalog
+
+# (mood, genre, tempo) yang diukur per request
+REQUESTS = [("happy", None, None), ("chill", "lo-fi", None), ("semangat", "rock", "fast")]
+
+
+def measure(label: str, build):
+    """Jalankan build() dan print waktu serta memori yang masih dipegang"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22s} {elapsed:7.2f}s  retained {current / 2**20:8.1f} MB  "
+          f"peak {peak / 2**20:8.1f} MB")
+    return result
+
+
+def measure_requests(label: str, recommend, repeat: int = 3):
+    """
+    Rata-rata waktu (tanpa tracemalloc) dan peak alokasi per request
+    untuk REQUESTS
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for mood, genre, tempo in REQUESTS:
+            recommend(mood, genre, tempo)
+    elapsed = time.perf_counter() - start
+    
+    peak = 0
+    for mood, genre, tempo in REQUESTS:
+        gc.collect()
+        tracemalloc.start()
+        recommend(mood, genre, tempo)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    count = repeat * len(REQUESTS)
+    print(f"{label:<22s} {elapsed / count * 1000:7.1f}ms/request  "
+          f"peak alloc {peak / 2**20:8.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    args = parser.parse_args()
+    
+    print(f"Catalog: {args.songs} songs")
+    
+    # Worker tanpa artifact: list of dicts dari database vs kolom
+    songs = measure("song dicts", lambda: make_songs(args.songs))
+    catalog = measure("song catalog", lambda: SongCatalog.from_songs(songs))
+    snapshot = measure("snapshot (catalog)", lambda: CatalogSnapshot.build(catalog, version=1))
+    
+    # Per request: jalur lama membuat dict untuk setiap kandidat
+    k = 10
+    rule_engine = RuleEngine()
+    index = CatalogIndex(songs)
+    recommender = snapshot.recommender
+    
+    def legacy(mood, genre, tempo):
+        candidates = rule_engine.filter_by_mood(mood, genre, tempo, songs, index)
+        profile = {"mood": mood, "genre": genre or candidates[0]["genre"],
+                   "tempo": tempo or candidates[0]["tempo"]}
+        return recommender.recommend(profile, candidates, k)
+    
+    def columnar(mood, genre, tempo):
+        entry = compute_entry(snapshot, rule_engine, mood, genre, tempo, k)
+        return entry.materialize(snapshot.by_id, k)
+    
+    measure_requests("request (dicts)", legacy)
+    measure_requests("request (rows)", columnar)
+    del index, snapshot
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "catalog.bin")
+        start = time.perf_counter()
+        write_catalog_artifact(path, catalog)
+        print(f"artifact write          {time.perf_counter() - start:7.2f}s  "
+              f"file {os.path.getsize(path) / 2**20:8.1f} MB")
+        del songs, catalog
+        
+        snapshot = measure("snapshot (artifact)",
+                           lambda: CatalogSnapshot.from_artifact(CatalogArtifact(path), version=1))
+        del snapshot
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark throughput read database dari banyak thread bersamaan
+
+Membandingkan koneksi tunggal yang dibagi semua thread dengan journal
+rollback default (Database lama) dengan pool koneksi read WAL
+(Database.reader). Setiap thread menjalankan get_song_by_id acak dan
+get_genres (full scan) setiap --scan-every read; opsional satu writer insert_song terus berjalan di
+background.
+
+Usage (dari direktori backend):
+    python -m benchmarks.db_concurrency --songs 200000 --threads 8
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+import os
+from contextlib import contextmanager
+
+from benchmarks.synthetic import make_songs
+from db.database import Database
+from db.ingest import ingest_songs
+from db.init_db import create_schema
+
+
+class SharedConnectionDatabase(Database):
+    """Perilaku Database lama: satu koneksi untuk semua thread, tanpa PRAGMA"""
+    
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_url, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+    
+    @contextmanager
+    def reader(self):
+        yield self.connect()
+
+
+def make_database(path: str, songs) -> None:
+    conn = sqlite3.connect(path)
+    create_schema(conn)
+    ingest_songs(conn, iter(songs))
+    conn.close()
+
+
+def run(db: Database, max_id: int, threads: int, seconds: float, writer: bool,
+        scan_every: int = 1000) -> tuple:
+    """
+    Jalankan reader threads selama seconds
+    
+    Returns:
+        Tuple (reads per detik, writes selesai)
+    """
+    stop = threading.Event()
+    counts = [0] * threads
+    writes = [0]
+    
+    def read_loop(slot: int):
+        rng = random.Random(slot)
+        while not stop.is_set():
+            db.get_song_by_id(rng.randint(1, max_id))
+            if counts[slot] % scan_every == 0:
+                db.get_genres()
+            counts[slot] += 1
+    
+    def write_loop():
+        while not stop.is_set():
+            db.insert_song("Bench", "Writer", "pop", "happy", "fast", features={"energy": 0.5})
+            writes[0] += 1
+    
+    workers = [threading.Thread(target=read_loop, args=(slot,)) for slot in range(threads)]
+    if writer:
+        workers.append(threading.Thread(target=write_loop))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / (time.perf_counter() - start), writes[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--scan-every", type=int, default=1000)
+    args = parser.parse_args()
+    
+    songs = make_songs(args.songs)
+    print(f"Catalog: {args.songs} songs, {args.threads} reader threads, {args.seconds}s per run")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, factory in (("shared connection", SharedConnectionDatabase),
+                               ("WAL pool", lambda path: Database(path, pool_size=args.threads))):
+            # File terpisah: journal_mode=WAL tersimpan permanen di file database
+            path = os.path.join(tmp, label.replace(" ", "_") + ".db")
+            make_database(path, songs)
+            for writer in (False, True):
+                db = factory(path)
+                reads, writes = run(db, args.songs, args.threads, args.seconds, writer,
+                                    args.scan_every)
+                db.close()
+                mode = "+ writer" if writer else "read-only"
+                print(f"{label:<18s} {mode:<10s} {reads:10.0f} reads/sec  {writes:6d} writes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark throughput ingest katalog (rows/sec)
+
+Membandingkan insert satu execute per row (init_db lama) dengan
+db/ingest.py (streaming JSON Lines, executemany per batch, bulk PRAGMA),
+termasuk ingest ulang file yang sama (semua row menjadi upsert).
+
+Usage (dari direktori backend):
+    python -m benchmarks.ingest --songs 1000000
+"""
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic import make_songs
+from db.ingest import ingest_file, read_jsonl
+from db.init_db import create_schema
+
+
+def per_row_insert(path: str, db_path: str) -> float:
+    """Insert seperti init_db lama: satu execute per row, commit di akhir"""
+    conn = sqlite3.connect(db_path)
+    create_schema(conn)
+    start = time.perf_counter()
+    count = 0
+    for song in read_jsonl(path):
+        conn.execute("""
+            INSERT INTO songs (title, artist, genre, mood, tempo, spotify_id, features)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (song['title'], song['artist'], song['genre'], song['mood'], song['tempo'],
+              song.get('spotify_id'), json.dumps(song['features']) if song.get('features') else None))
+        count += 1
+    conn.commit()
+    conn.close()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "songs.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for song in make_songs(args.songs):
+                song["spotify_id"] = f"sp{song.pop('id')}"
+                f.write(json.dumps(song) + "\n")
+        print(f"Input: {args.songs} songs, {os.path.getsize(path) / 2**20:.1f} MB JSON Lines")
+        
+        rate = per_row_insert(path, os.path.join(tmp, "per_row.db"))
+        print(f"per-row execute          {rate:10.0f} rows/sec")
+        
+        db_path = os.path.join(tmp, "ingest.db")
+        stats = ingest_file(path, db_path, args.batch_size)
+        print(f"ingest (insert)          {stats['rows_per_sec']:10.0f} rows/sec")
+        stats = ingest_file(path, db_path, args.batch_size)
+        print(f"ingest (upsert existing) {stats['rows_per_sec']:10.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark requests per detik per core /api/recommend (k=20)
+
+Memanggil ASGI app langsung (tanpa HTTP client/server) dari satu
+coroutine, lalu membagi jumlah request dengan CPU time proses. Response
+di-cache (RECOMMEND_CACHE), jadi yang diukur terutama konstruksi response,
+validasi dan JSON encoding. Mode dibandingkan dengan FAST_RESPONSES dan
+GZIP_MIN_SIZE yang berbeda.
+
+Usage (dari direktori backend):
+    python -m benchmarks.recommend_throughput --songs 20000 --seconds 5
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic import make_songs
+from db.ingest import ingest_songs
+from db.init_db import create_schema
+
+MODES = [
+    ("default", {"FAST_RESPONSES": "false", "GZIP_MIN_SIZE": "0"}),
+    ("fast", {"FAST_RESPONSES": "true", "GZIP_MIN_SIZE": "0"}),
+    ("default+gzip", {"FAST_RESPONSES": "false", "GZIP_MIN_SIZE": "1024"}),
+    ("fast+gzip", {"FAST_RESPONSES": "true", "GZIP_MIN_SIZE": "1024"}),
+]
+
+PAYLOADS = [
+    {"mood": mood, "genre": genre, "k": 20}
+    for mood in ("sedih", "happy", "galau", "chill", "semangat")
+    for genre in (None, "pop", "rock")
+]
+
+
+async def call(app, path: str, body: bytes, accept_encoding: bytes):
+    """
+    Satu request POST langsung ke ASGI app
+    
+    Returns:
+        Tuple (status, ukuran body response dalam bytes)
+    """
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "",
+        "headers": [
+            (b"host", b"beatlens"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"accept-encoding", accept_encoding),
+        ],
+        "client": ("127.0.0.1", 50000), "server": ("beatlens", 80),
+    }
+    sent = []
+    
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    
+    async def send(message):
+        sent.append(message)
+    
+    await app(scope, receive, send)
+    status = sent[0]["status"]
+    size = sum(len(m.get("body", b"")) for m in sent if m["type"] == "http.response.body")
+    return status, size
+
+
+async def run_mode(env: dict, seconds: float):
+    """
+    Returns:
+        Tuple (requests per CPU-detik, rata-rata ukuran response)
+    """
+    os.environ.update(env)
+    import app
+    app = importlib.reload(app)  # middleware gzip dibaca saat import
+    await app.startup_event()
+    bodies = [json.dumps(payload).encode() for payload in PAYLOADS]
+    accept = b"gzip" if env["GZIP_MIN_SIZE"] != "0" else b"identity"
+    
+    # Warm up: isi recommendation cache
+    for body in bodies:
+        await call(app.app, "/api/recommend", body, accept)
+    
+    count = 0
+    total_size = 0
+    stop = time.monotonic() + seconds
+    cpu_start = time.process_time()
+    while time.monotonic() < stop:
+        status, size = await call(app.app, "/api/recommend", bodies[count % len(bodies)], accept)
+        assert status == 200
+        total_size += size
+        count += 1
+    cpu = time.process_time() - cpu_start
+    
+    await app.shutdown_event()
+    return count / cpu, total_size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=20_000)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "songs.db")
+        conn = sqlite3.connect(db_path)
+        create_schema(conn)
+        ingest_songs(conn, iter(make_songs(args.songs)))
+        conn.close()
+        os.environ.update({
+            "DATABASE_URL": db_path,
+            "SPOTIFY_CLIENT_ID": "",
+            "SPOTIFY_CLIENT_SECRET": "",
+            "SPOTIFY_CACHE_DB": "",
+            "CATALOG_POLL_INTERVAL": "3600",
+        })
+        
+        results = []
+        for name, env in MODES:
+            rps, size = asyncio.run(run_mode(env, args.seconds))
+            results.append((name, rps, size))
+    
+    print(f"Catalog: {args.songs} songs, /api/recommend k=20 (cache hit), {args.seconds}s per mode")
+    baseline = results[0][1]
+    for name, rps, size in results:
+        print(f"{name:14s} {rps:8.0f} req/sec/core  x{rps / baseline:4.2f}  {size:7.0f} bytes/response")
+
+
+if __name__ == "__main__":
+    main()
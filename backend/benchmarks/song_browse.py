@@ -0,0 +1,72 @@
+"""
+Benchmark latency listing dan search lagu terhadap ukuran katalog
+
+Membandingkan halaman dalam dengan keyset pagination (Database.list_songs)
+dengan OFFSET, serta search FTS5 (Database.search_songs) dengan LIKE
+'%...%' atas title/artist, untuk beberapa ukuran katalog.
+
+Usage (dari direktori backend):
+    python -m benchmarks.song_browse --songs 10000 100000 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.synthetic import make_songs
+from db.database import LIST_COLUMNS, Database
+from db.ingest import ingest_songs
+from db.init_db import create_schema
+
+
+def timed(fn, repeat: int = 20) -> float:
+    """Rata-rata waktu fn() dalam milidetik"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--limit", type=int, default=50)
+    # Katalog sintetis: setiap lagu punya kata "Song" dan "Artist", jadi
+    # query yang selektif hanya angkanya
+    parser.add_argument("--query", default="4321")
+    args = parser.parse_args()
+    
+    limit = args.limit
+    columns = ", ".join(LIST_COLUMNS)
+    print(f"{'songs':>9s} {'keyset':>8s} {'offset':>8s} {'filtered':>9s} {'fts':>8s} {'like':>8s}  (ms)")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.songs:
+            path = os.path.join(tmp, f"songs_{size}.db")
+            conn = sqlite3.connect(path)
+            create_schema(conn)
+            ingest_songs(conn, iter(make_songs(size, with_features=False)))
+            conn.close()
+            db = Database(path)
+            
+            # Halaman di 90% katalog
+            deep = int(size * 0.9)
+            keyset = timed(lambda: db.list_songs(after_id=deep, limit=limit))
+            with db.reader() as conn:
+                offset = timed(lambda: conn.execute(
+                    f"SELECT {columns} FROM songs ORDER BY id LIMIT ? OFFSET ?", (limit, deep)
+                ).fetchall())
+                like = timed(lambda: conn.execute(
+                    f"SELECT {columns} FROM songs WHERE title LIKE ? OR artist LIKE ? LIMIT ?",
+                    (f"%{args.query}%", f"%{args.query}%", 20)
+                ).fetchall(), repeat=5)
+            filtered = timed(lambda: db.list_songs(genre="rock", mood="happy", tempo="fast",
+                                                   after_id=deep, limit=limit))
+            fts = timed(lambda: db.search_songs(args.query, limit=20))
+            db.close()
+            print(f"{size:9d} {keyset:8.2f} {offset:8.2f} {filtered:9.2f} {fts:8.2f} {like:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
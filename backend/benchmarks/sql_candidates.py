@@ -0,0 +1,65 @@
+"""
+Benchmark candidate provider SQL dibandingkan snapshot katalog in-memory
+
+Mengukur memori yang dipegang per worker (tracemalloc) dan waktu per
+request (rule-based filtering + KNN top-k, tanpa Spotify) untuk
+CANDIDATE_SOURCE=memory dan CANDIDATE_SOURCE=sql, dengan dan tanpa
+SQL_CANDIDATE_LIMIT.
+
+Usage (dari direktori backend):
+    python -m benchmarks.sql_candidates --songs 200000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+
+from benchmarks.catalog_memory import REQUESTS, measure, measure_requests
+from benchmarks.synthetic import make_songs
+from db.database import Database
+from db.ingest import ingest_songs
+from db.init_db import create_schema
+from services.catalog import CatalogSnapshot
+from services.recommendation_table import compute_entry
+from services.rule_engine import RuleEngine
+from services.song_catalog import SongCatalog
+from services.sql_candidates import SQLCandidateProvider
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--songs", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=5_000)
+    args = parser.parse_args()
+    
+    k = 10
+    print(f"Catalog: {args.songs} songs, requests: {REQUESTS}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "songs.db")
+        conn = sqlite3.connect(path)
+        create_schema(conn)
+        ingest_songs(conn, iter(make_songs(args.songs)))
+        conn.close()
+        db = Database(path)
+        
+        rule_engine = RuleEngine()
+        snapshot = measure("snapshot (memory)", lambda: CatalogSnapshot.build(
+            SongCatalog.from_columns(db.get_song_columns()), version=1))
+        measure_requests("request (memory)", lambda mood, genre, tempo: compute_entry(
+            snapshot, rule_engine, mood, genre, tempo, k).materialize(snapshot.by_id, k))
+        del snapshot
+        
+        for limit in (None, args.limit):
+            provider = SQLCandidateProvider(db, rule_engine, limit=limit)
+            measure("stats (sql)", provider.load)
+            
+            def sql(mood, genre, tempo):
+                entry = provider.compute_entries([(mood, genre, tempo)], k)[0]
+                return entry.materialize(db.get_songs_by_ids(entry.song_ids.tolist()), k)
+            
+            measure_requests(f"request (sql, limit {limit or 'none'})", sql)
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Generator katalog sintetis untuk benchmark
+"""
+from typing import Dict, List
+
+import numpy as np
+
+from services.rule_engine import RuleEngine
+
+
+GENRES = ("acoustic", "ambient", "ballad", "classical", "edm", "indie",
+          "lo-fi", "pop", "pop punk", "rock", "jazz", "r&b", "hip hop", "metal")
+TEMPOS = ("slow", "medium", "fast")
+
+
+def make_songs(n: int, seed: int = 0, with_features: bool = True) -> List[Dict]:
+    """
+    Buat n lagu sintetis dengan distribusi genre/mood/tempo acak
+    
+    Args:
+        n: Jumlah lagu
+        seed: Random seed
+        with_features: Sertakan numeric audio features (energy, valence, ...)
+    
+    Returns:
+        List of songs dalam format Database.get_all_songs
+    """
+    rng = np.random.default_rng(seed)
+    moods = tuple(RuleEngine.MOOD_RULES)
+    genre_codes = rng.integers(len(GENRES), size=n)
+    mood_codes = rng.integers(len(moods), size=n)
+    tempo_codes = rng.integers(len(TEMPOS), size=n)
+    audio = rng.random((n, 4)) if with_features else None
+    bpm = rng.normal(115, 25, size=n)
+    
+    songs = []
+    for i in range(n):
+        features = None
+        if with_features:
+            energy, valence, danceability, acousticness = audio[i].tolist()
+            features = {"energy": energy, "valence": valence, "danceability": danceability,
+                        "acousticness": acousticness, "bpm": float(bpm[i])}
+        songs.append({
+            "id": i + 1,
+            "title": f"Song {i + 1}",
+            "artist": f"Artist {i % 5000}",
+            "genre": GENRES[genre_codes[i]],
+            "mood": moods[mood_codes[i]],
+            "tempo": TEMPOS[tempo_codes[i]],
+            "spotify_id": None,
+            "features": features,
+        })
+    return songs
@@ -0,0 +1,153 @@
+"""
+Async data-access layer untuk BeatLens
+Menjalankan operasi Database di thread pool khusus agar handler async
+tidak pernah mem-blok event loop
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from db.database import Database
+
+T = TypeVar("T")
+
+
+class DatabaseBusyError(Exception):
+    """Semua slot query terpakai lebih lama dari queue_timeout"""
+    pass
+
+
+class AsyncDatabase:
+    """
+    Versi async dari Database dengan method yang sama
+    
+    Query berjalan di ThreadPoolExecutor dengan max_workers thread (default
+    pool_size Database, satu thread per koneksi read). Query yang sedang
+    berjalan ditambah yang antre dibatasi max_workers + max_pending; query
+    berikutnya menunggu slot paling lama queue_timeout detik lalu gagal
+    dengan DatabaseBusyError (backpressure, dijawab 503 oleh API).
+    """
+    
+    def __init__(self, db: Database, max_workers: Optional[int] = None,
+                 max_pending: int = 64, queue_timeout: float = 1.0):
+        """
+        Args:
+            db: Database instance
+            max_workers: Jumlah thread query (default: db.pool_size)
+            max_pending: Jumlah query yang boleh antre menunggu thread
+            queue_timeout: Detik maksimal menunggu slot antrean
+        """
+        self.db = db
+        self.max_workers = max_workers or db.pool_size
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="beatlens-db")
+        self._slots: Optional[asyncio.Semaphore] = None  # dibuat di event loop saat pertama dipakai
+        self.in_flight = 0
+        self.rejected = 0
+    
+    async def run(self, fn: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Jalankan fn(*args, **kwargs) di thread pool database
+        
+        Dipakai juga untuk operasi lain yang melakukan query, misalnya
+        SQLCandidateProvider.compute_entries.
+        
+        Raises:
+            DatabaseBusyError: Jika tidak ada slot dalam queue_timeout
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_pending)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise DatabaseBusyError(
+                f"Database busy: {self.in_flight} queries in flight, retry later"
+            ) from None
+        
+        # Slot dilepas saat job executor selesai, bukan saat coroutine ini
+        # selesai: jika task dibatalkan (client disconnect), job yang sudah
+        # berjalan tetap memegang slot sehingga batas max_workers + max_pending
+        # tidak terlampaui lewat antrean internal executor
+        self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.executor.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release_slot()
+            raise
+        future.add_done_callback(lambda _: self._call_in_loop(loop, self._release_slot))
+        return await asyncio.wrap_future(future)
+    
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._slots.release()
+    
+    @staticmethod
+    def _call_in_loop(loop: asyncio.AbstractEventLoop, callback: Callable[[], None]):
+        # Done-callback bisa jalan di thread executor; semaphore hanya boleh
+        # disentuh dari thread event loop
+        try:
+            loop.call_soon_threadsafe(callback)
+        except RuntimeError:
+            pass  # event loop sudah ditutup
+    
+    async def get_all_songs(self) -> List[Dict]:
+        return await self.run(self.db.get_all_songs)
+    
+    async def get_song_columns(self, after_id: Optional[int] = None) -> Dict[str, List]:
+        return await self.run(self.db.get_song_columns, after_id)
+    
+    async def get_song_by_id(self, song_id: int) -> Optional[Dict]:
+        return await self.run(self.db.get_song_by_id, song_id)
+    
+    async def get_songs_by_ids(self, song_ids: List[int]) -> Dict[int, Dict]:
+        return await self.run(self.db.get_songs_by_ids, song_ids)
+    
+    async def list_songs(self, genre: Optional[str] = None, mood: Optional[str] = None,
+                         tempo: Optional[str] = None, after_id: Optional[int] = None,
+                         limit: int = 50) -> List[Dict]:
+        return await self.run(self.db.list_songs, genre, mood, tempo, after_id, limit)
+    
+    async def search_songs(self, query: str, limit: int = 20) -> List[Dict]:
+        return await self.run(self.db.search_songs, query, limit)
+    
+    async def get_genres(self) -> List[str]:
+        return await self.run(self.db.get_genres)
+    
+    async def get_moods(self) -> List[str]:
+        return await self.run(self.db.get_moods)
+    
+    async def get_data_version(self) -> tuple:
+        return await self.run(self.db.get_data_version)
+    
+    async def get_catalog_signature(self) -> Dict:
+        return await self.run(self.db.get_catalog_signature)
+    
+    async def insert_song(self, title: str, artist: str, genre: str, mood: str,
+                          tempo: str, spotify_id: Optional[str] = None,
+                          features: Optional[Dict] = None) -> int:
+        return await self.run(self.db.insert_song, title, artist, genre, mood, tempo,
+                              spotify_id, features)
+    
+    async def ensure_search_index(self):
+        await self.run(self.db.ensure_search_index)
+    
+    async def ensure_candidate_index(self):
+        await self.run(self.db.ensure_candidate_index)
+    
+    def stats(self) -> Dict:
+        """Status thread pool untuk monitoring"""
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+        }
+    
+    def close(self):
+        """Tunggu query yang berjalan selesai, lalu tutup koneksi database"""
+        self.executor.shutdown(wait=True)
+        self.db.close()
@@ -0,0 +1,59 @@
+"""
+Compile tabel songs menjadi catalog artifact (memory-mapped) untuk app
+
+Usage (dari direktori backend):
+    python db/compile_catalog.py [database] [artifact]
+
+Default: beatlens.db -> catalog.bin. Jalankan ulang setelah tabel songs
+berubah; app memakai database langsung selama artifact tidak sesuai.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from services.audio_features import parse_weights
+from services.catalog_artifact import write_catalog_artifact
+from services.song_catalog import SongCatalog
+
+
+def compile_catalog(db_path: str = "beatlens.db", artifact_path: str = "catalog.bin",
+                    feature_weights=None) -> dict:
+    """
+    Baca semua songs dan tulis catalog artifact
+    
+    Args:
+        db_path: Path ke database SQLite
+        artifact_path: Path file artifact
+        feature_weights: Bobot block feature KNN (harus sama dengan app)
+    
+    Returns:
+        Header artifact
+    """
+    db = Database(db_path)
+    try:
+        db.ensure_change_counter()
+        start = time.perf_counter()
+        songs = SongCatalog.from_columns(db.get_song_columns())
+        header = write_catalog_artifact(artifact_path, songs,
+                                        source=db.get_catalog_signature(),
+                                        feature_weights=feature_weights)
+    finally:
+        db.close()
+    
+    size_kb = os.path.getsize(artifact_path) / 1024
+    print(f"✓ Catalog artifact {artifact_path}: {header['size']} songs, "
+          f"{size_kb:.1f} KB in {time.perf_counter() - start:.2f}s")
+    return header
+
+
+if __name__ == "__main__":
+    db_path = sys.argv[1] if len(sys.argv) > 1 else os.getenv("DATABASE_URL", "beatlens.db")
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+    artifact_path = sys.argv[2] if len(sys.argv) > 2 else os.getenv("CATALOG_ARTIFACT") or "catalog.bin"
+    
+    compile_catalog(db_path, artifact_path, parse_weights(os.getenv("KNN_FEATURE_WEIGHTS")))
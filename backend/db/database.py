@@ -2,40 +2,230 @@
 Database module untuk BeatLens
 Mengelola koneksi dan operasi database SQLite
 """
+import queue
+import re
 import sqlite3
 import json
-from typing import List, Optional, Dict
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Dict
+
+
+# PRAGMA yang di-set setiap kali koneksi dibuka
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",  # reader tidak diblok writer
+    "PRAGMA synchronous = NORMAL",  # aman untuk WAL, fsync hanya saat checkpoint
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+    "PRAGMA cache_size = -32768",  # 32 MB page cache per koneksi
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Composite index untuk candidate query rule engine (services/sql_candidates.py)
+CANDIDATE_INDEX_SQL = "CREATE INDEX IF NOT EXISTS idx_genre_tempo_mood ON songs(genre, tempo, mood)"
+
+# Full-text index title/artist atas tabel songs (external content), disinkronkan trigger
+SEARCH_INDEX_SQL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS songs_fts USING fts5(
+        title, artist, content='songs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_fts_insert AFTER INSERT ON songs BEGIN
+        INSERT INTO songs_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_fts_delete AFTER DELETE ON songs BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, title, artist)
+        VALUES ('delete', old.id, old.title, old.artist);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_fts_update AFTER UPDATE OF title, artist ON songs
+    WHEN old.title IS NOT new.title OR old.artist IS NOT new.artist BEGIN
+        INSERT INTO songs_fts(songs_fts, rowid, title, artist)
+        VALUES ('delete', old.id, old.title, old.artist);
+        INSERT INTO songs_fts(rowid, title, artist) VALUES (new.id, new.title, new.artist);
+    END
+    """,
+)
+
+# Counter perubahan isi tabel songs untuk signature katalog, di-update
+# trigger sehingga UPDATE (termasuk upsert bulk ingest) dan DELETE juga
+# terdeteksi, bukan hanya jumlah row dan id terbesar
+CHANGE_COUNTER_SQL = (
+    """
+    CREATE TABLE IF NOT EXISTS songs_changes (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        count INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO songs_changes (id, count) VALUES (1, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_changes_insert AFTER INSERT ON songs BEGIN
+        UPDATE songs_changes SET count = count + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_changes_delete AFTER DELETE ON songs BEGIN
+        UPDATE songs_changes SET count = count + 1 WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS songs_changes_update AFTER UPDATE ON songs
+    WHEN old.id IS NOT new.id OR old.title IS NOT new.title OR old.artist IS NOT new.artist
+        OR old.genre IS NOT new.genre OR old.mood IS NOT new.mood OR old.tempo IS NOT new.tempo
+        OR old.spotify_id IS NOT new.spotify_id OR old.features IS NOT new.features BEGIN
+        UPDATE songs_changes SET count = count + 1 WHERE id = 1;
+    END
+    """,
+)
+
+# Kolom untuk listing dan search (tanpa features)
+LIST_COLUMNS = ("id", "title", "artist", "genre", "mood", "tempo", "spotify_id")
+
+
+def create_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    Buat FTS5 index songs_fts beserta trigger sinkronisasinya jika belum ada
+    
+    Index yang baru dibuat di database yang sudah berisi lagu di-rebuild
+    dari tabel songs. Tidak commit.
+    
+    Args:
+        conn: Koneksi SQLite (tabel songs sudah ada)
+    
+    Returns:
+        True jika index baru dibuat
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'songs_fts'").fetchone()
+    for sql in SEARCH_INDEX_SQL:
+        conn.execute(sql)
+    if not exists:
+        conn.execute("INSERT INTO songs_fts(songs_fts) VALUES ('rebuild')")
+    return not exists
+
+
+def create_change_counter(conn: sqlite3.Connection):
+    """
+    Buat tabel songs_changes beserta triggernya jika belum ada. Tidak commit.
+    
+    Args:
+        conn: Koneksi SQLite (tabel songs sudah ada)
+    """
+    for sql in CHANGE_COUNTER_SQL:
+        conn.execute(sql)
+
+
+def _read_change_count(conn: sqlite3.Connection) -> Optional[int]:
+    try:
+        row = conn.execute("SELECT count FROM songs_changes WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def match_query(text: str) -> Optional[str]:
+    """
+    Convert input user menjadi query FTS5 MATCH yang aman
+    
+    Setiap kata di-quote (operator dan tanda baca FTS5 tidak berlaku) dan
+    kata terakhir dicari sebagai prefix, misalnya "bohemian rhap" ->
+    '"bohemian" "rhap"*'.
+    
+    Returns:
+        Query MATCH, atau None jika tidak ada kata
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"' for word in words) + "*"
 
 
 class Database:
     """Class untuk mengelola operasi database"""
     
-    def __init__(self, db_url: str = "beatlens.db"):
+    def __init__(self, db_url: str = "beatlens.db", pool_size: int = 4):
         """
         Initialize database connection
         
         Args:
             db_url: Path ke database SQLite
+            pool_size: Jumlah maksimal koneksi read yang dibuka bersamaan
         """
         # Remove sqlite:/// prefix jika ada
         if db_url.startswith("sqlite:///"):
             db_url = db_url.replace("sqlite:///", "")
         
         self.db_url = db_url
-        self.connection = None
+        self.pool_size = max(1, pool_size)
+        self.connection = None  # koneksi write, juga untuk PRAGMA data_version
+        self._write_lock = threading.RLock()
+        self._pool: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._pool_lock = threading.Lock()
+        self._readers: List[sqlite3.Connection] = []
+        self.write_count = 0  # jumlah write lewat instance ini
+        self.append_count = 0  # write yang hanya menambah lagu baru (insert_song)
+    
+    def _open(self) -> sqlite3.Connection:
+        """
+        Buka koneksi baru dengan CONNECTION_PRAGMAS
+        
+        Koneksi hidup selama Database dipakai, sehingga statement cache
+        sqlite3 (cached_statements) menyimpan prepared statement setiap
+        query dan tidak di-compile ulang per request.
+        """
+        conn = sqlite3.connect(self.db_url, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
     
     def connect(self):
-        """Buat koneksi ke database"""
+        """Buat koneksi write ke database"""
         if not self.connection:
-            self.connection = sqlite3.connect(self.db_url, check_same_thread=False)
-            self.connection.row_factory = sqlite3.Row
+            self.connection = self._open()
         return self.connection
     
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Pinjam koneksi read dari pool
+        
+        Koneksi dibuat saat dibutuhkan sampai pool_size; jika semua sedang
+        dipakai, tunggu sampai ada yang dikembalikan. Dengan WAL, reader
+        tidak diblok oleh write yang sedang berjalan.
+        
+        Yields:
+            sqlite3.Connection
+        """
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                conn = self._open() if len(self._readers) < self.pool_size else None
+                if conn is not None:
+                    self._readers.append(conn)
+            if conn is None:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+    
     def close(self):
-        """Tutup koneksi database"""
-        if self.connection:
-            self.connection.close()
-            self.connection = None
+        """Tutup semua koneksi database"""
+        with self._write_lock:
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+        with self._pool_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self._pool = queue.LifoQueue()
     
     def get_all_songs(self) -> List[Dict]:
         """
@@ -44,10 +234,8 @@ class Database:
         Returns:
             List of song dictionaries
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM songs")
-        rows = cursor.fetchall()
+        with self.reader() as conn:
+            rows = conn.execute("SELECT * FROM songs").fetchall()
         
         songs = []
         for row in rows:
@@ -62,6 +250,32 @@ class Database:
         
         return songs
     
+    def get_song_columns(self, after_id: Optional[int] = None) -> Dict[str, List]:
+        """
+        Get all songs sebagai kolom (tanpa dict per row), untuk SongCatalog
+        
+        Args:
+            after_id: Hanya lagu dengan id lebih besar (urut id), untuk
+                update katalog incremental
+        
+        Returns:
+            Dict nama kolom -> list value; features tetap JSON string mentah
+        """
+        columns = ("id", "title", "artist", "genre", "mood", "tempo",
+                   "spotify_id", "features", "created_at")
+        with self.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            if after_id is None:
+                cursor.execute(f"SELECT {', '.join(columns)} FROM songs")
+            else:
+                cursor.execute(f"SELECT {', '.join(columns)} FROM songs WHERE id > ? ORDER BY id",
+                               (after_id,))
+            rows = cursor.fetchall()
+        
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        return {column: list(value) for column, value in zip(columns, values)}
+    
     def get_song_by_id(self, song_id: int) -> Optional[Dict]:
         """
         Get single song by ID
@@ -72,10 +286,8 @@ class Database:
         Returns:
             Song dictionary atau None jika tidak ditemukan
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM songs WHERE id = ?", (song_id,))
-        row = cursor.fetchone()
+        with self.reader() as conn:
+            row = conn.execute("SELECT * FROM songs WHERE id = ?", (song_id,)).fetchone()
         
         if row:
             song = dict(row)
@@ -89,6 +301,100 @@ class Database:
         
         return None
     
+    def get_songs_by_ids(self, song_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Get banyak lagu sekaligus dengan satu query IN
+        
+        Args:
+            song_ids: List ID lagu
+        
+        Returns:
+            Dict song id -> song dictionary (ID yang tidak ada dilewati)
+        """
+        song_ids = list(dict.fromkeys(song_ids))
+        if not song_ids:
+            return {}
+        
+        with self.reader() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM songs WHERE id IN ({', '.join('?' * len(song_ids))})", song_ids
+            ).fetchall()
+        
+        songs = {}
+        for row in rows:
+            song = dict(row)
+            if song.get('features'):
+                try:
+                    song['features'] = json.loads(song['features'])
+                except:
+                    song['features'] = None
+            songs[song['id']] = song
+        return songs
+    
+    def list_songs(self, genre: Optional[str] = None, mood: Optional[str] = None,
+                   tempo: Optional[str] = None, after_id: Optional[int] = None,
+                   limit: int = 50) -> List[Dict]:
+        """
+        Satu halaman lagu urut id dengan keyset pagination
+        
+        Halaman berikutnya dimulai setelah id terakhir (after_id), sehingga
+        setiap halaman adalah seek di index genre/mood/tempo (atau primary
+        key) dan tidak melewati row seperti OFFSET.
+        
+        Args:
+            genre: Filter genre (optional)
+            mood: Filter mood (optional)
+            tempo: Filter tempo (optional)
+            after_id: Hanya lagu dengan id lebih besar (cursor halaman)
+            limit: Jumlah lagu maksimal
+        
+        Returns:
+            List of song dictionaries (LIST_COLUMNS)
+        """
+        conditions = []
+        params = []
+        for column, value in (("genre", genre), ("mood", mood), ("tempo", tempo)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        with self.reader() as conn:
+            rows = conn.execute(
+                f"SELECT {', '.join(LIST_COLUMNS)} FROM songs {where} ORDER BY id LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def search_songs(self, query: str, limit: int = 20) -> List[Dict]:
+        """
+        Full-text search title dan artist lewat FTS5 (urut relevansi bm25)
+        
+        Args:
+            query: Teks pencarian; kata terakhir dicocokkan sebagai prefix
+            limit: Jumlah lagu maksimal
+        
+        Returns:
+            List of song dictionaries (LIST_COLUMNS)
+        """
+        match = match_query(query)
+        if match is None:
+            return []
+        
+        columns = ", ".join(f"songs.{column}" for column in LIST_COLUMNS)
+        with self.reader() as conn:
+            rows = conn.execute(f"""
+                SELECT {columns} FROM songs_fts
+                JOIN songs ON songs.id = songs_fts.rowid
+                WHERE songs_fts MATCH ?
+                ORDER BY songs_fts.rank
+                LIMIT ?
+            """, (match, limit)).fetchall()
+        return [dict(row) for row in rows]
+    
     def get_genres(self) -> List[str]:
         """
         Get list of unique genres
@@ -96,10 +402,8 @@ class Database:
         Returns:
             List of genre strings
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT genre FROM songs ORDER BY genre")
-        rows = cursor.fetchall()
+        with self.reader() as conn:
+            rows = conn.execute("SELECT DISTINCT genre FROM songs ORDER BY genre").fetchall()
         return [row['genre'] for row in rows]
     
     def get_moods(self) -> List[str]:
@@ -109,12 +413,72 @@ class Database:
         Returns:
             List of mood strings
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        cursor.execute("SELECT DISTINCT mood FROM songs ORDER BY mood")
-        rows = cursor.fetchall()
+        with self.reader() as conn:
+            rows = conn.execute("SELECT DISTINCT mood FROM songs ORDER BY mood").fetchall()
         return [row['mood'] for row in rows]
     
+    def get_data_version(self) -> tuple:
+        """
+        Get versi data untuk deteksi perubahan katalog
+        
+        PRAGMA data_version (dibaca di koneksi write) berubah saat koneksi
+        lain commit ke database, write_count berubah saat write lewat
+        instance ini. Koneksi read di pool tidak pernah write.
+        
+        Returns:
+            Tuple (data_version, write_count)
+        """
+        with self._write_lock:
+            data_version = self.connect().execute("PRAGMA data_version").fetchone()[0]
+        return (data_version, self.write_count)
+    
+    def get_catalog_signature(self) -> Dict:
+        """
+        Signature murah tabel songs (jumlah, id terbesar dan counter
+        perubahan), untuk mengecek apakah compiled catalog artifact masih
+        sesuai dengan database
+        
+        Returns:
+            Dict dengan count, max_id dan changes (None jika database belum
+            punya counter, lihat ensure_change_counter)
+        """
+        with self.reader() as conn:
+            row = conn.execute("SELECT COUNT(*), MAX(id) FROM songs").fetchone()
+            changes = _read_change_count(conn)
+        return {"count": row[0], "max_id": row[1], "changes": changes}
+    
+    def get_change_count(self) -> Optional[int]:
+        """
+        Counter perubahan tabel songs (O(1), sama untuk semua proses yang
+        membuka database ini), misalnya untuk ETag
+        
+        Returns:
+            Nilai counter atau None jika database belum punya counter
+        """
+        with self.reader() as conn:
+            return _read_change_count(conn)
+    
+    def ensure_search_index(self):
+        """Buat FTS5 index songs_fts (dan isi dari songs) di database lama"""
+        with self._write_lock:
+            conn = self.connect()
+            create_search_index(conn)
+            conn.commit()
+    
+    def ensure_change_counter(self):
+        """Buat counter perubahan songs (signature katalog) di database lama"""
+        with self._write_lock:
+            conn = self.connect()
+            create_change_counter(conn)
+            conn.commit()
+    
+    def ensure_candidate_index(self):
+        """Buat composite index (genre, tempo, mood) di database lama"""
+        with self._write_lock:
+            conn = self.connect()
+            conn.execute(CANDIDATE_INDEX_SQL)
+            conn.commit()
+    
     def insert_song(self, title: str, artist: str, genre: str, mood: str, 
                    tempo: str, spotify_id: Optional[str] = None, 
                    features: Optional[Dict] = None) -> int:
@@ -133,17 +497,18 @@ class Database:
         Returns:
             ID lagu yang baru diinsert
         """
-        conn = self.connect()
-        cursor = conn.cursor()
-        
         features_json = json.dumps(features) if features else None
         
-        cursor.execute("""
-            INSERT INTO songs (title, artist, genre, mood, tempo, spotify_id, features)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (title, artist, genre, mood, tempo, spotify_id, features_json))
+        with self._write_lock:
+            conn = self.connect()
+            cursor = conn.execute("""
+                INSERT INTO songs (title, artist, genre, mood, tempo, spotify_id, features)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, (title, artist, genre, mood, tempo, spotify_id, features_json))
         
-        conn.commit()
+            conn.commit()
+            self.write_count += 1
+            self.append_count += 1
         return cursor.lastrowid
 
 
@@ -151,17 +516,18 @@ class Database:
 _db_instance = None
 
 
-def get_database(db_url: str = "beatlens.db") -> Database:
+def get_database(db_url: str = "beatlens.db", pool_size: int = 4) -> Database:
     """
     Get database singleton instance
     
     Args:
         db_url: Path ke database SQLite
+        pool_size: Jumlah maksimal koneksi read (lihat Database)
         
     Returns:
         Database instance
     """
     global _db_instance
     if _db_instance is None:
-        _db_instance = Database(db_url)
+        _db_instance = Database(db_url, pool_size)
     return _db_instance
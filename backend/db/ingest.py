@@ -0,0 +1,243 @@
+"""
+Streaming bulk ingest katalog lagu ke database
+
+Membaca JSON Lines (.jsonl), CSV (.csv) atau JSON array (.json) baris per
+baris dan menulis dengan executemany per batch dalam satu transaksi.
+Lagu dengan spotify_id yang sudah ada di-update (upsert), lagu tanpa
+spotify_id selalu ditambahkan. Database tidak dihapus.
+
+Usage (dari direktori backend):
+    python db/ingest.py <file.jsonl|file.csv> [database] [--batch-size N]
+
+Kolom: title, artist, genre, mood, tempo (wajib), spotify_id, features
+(dict atau JSON string). Di CSV, kolom numeric audio feature (energy,
+valence, bpm, ...) ikut digabung ke features.
+"""
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.init_db import create_schema
+from services.audio_features import NUMERIC_FEATURES
+
+
+TEMPOS = ("slow", "medium", "fast")
+REQUIRED_COLUMNS = ("title", "artist", "genre", "mood", "tempo")
+
+UPSERT_SQL = """
+    INSERT INTO songs (title, artist, genre, mood, tempo, spotify_id, features)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(spotify_id) DO UPDATE SET
+        title = excluded.title,
+        artist = excluded.artist,
+        genre = excluded.genre,
+        mood = excluded.mood,
+        tempo = excluded.tempo,
+        features = excluded.features
+"""
+
+# PRAGMA untuk bulk load; berlaku per koneksi dan hilang saat koneksi ditutup
+BULK_PRAGMAS = (
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",  # 256 MB
+)
+
+
+def read_jsonl(path: str) -> Iterator[Optional[Dict]]:
+    """
+    Yield satu song dict per baris JSON Lines (baris kosong dilewati)
+    
+    Baris yang bukan JSON valid menghasilkan None, yang dihitung sebagai
+    skipped oleh ingest_songs, agar satu baris rusak tidak membatalkan
+    seluruh import.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    yield None
+
+
+def read_csv(path: str) -> Iterator[Dict]:
+    """Yield satu song dict per baris CSV dengan header"""
+    # Kolom tempo adalah slow/medium/fast; tempo numerik memakai kolom bpm
+    feature_columns = set(NUMERIC_FEATURES)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            song = {key: value for key, value in row.items() if key not in feature_columns}
+            numeric = {}
+            for key in feature_columns & row.keys():
+                try:
+                    numeric[key] = float(row[key])
+                except (TypeError, ValueError):
+                    continue
+            if numeric:
+                features = _parse_features(song.get("features")) or {}
+                song["features"] = {**features, **numeric}
+            yield song
+
+
+def read_json(path: str) -> Iterator[Dict]:
+    """Yield songs dari JSON array (format seed_data.json, dibaca sekaligus)"""
+    with open(path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
+
+READERS = {".jsonl": read_jsonl, ".ndjson": read_jsonl, ".csv": read_csv, ".json": read_json}
+
+
+def read_songs(path: str) -> Iterator[Dict]:
+    """
+    Pilih reader berdasarkan ekstensi file
+    
+    Raises:
+        ValueError: Jika ekstensi tidak didukung
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix not in READERS:
+        raise ValueError(f"Unsupported input format: {suffix} (use {', '.join(READERS)})")
+    return READERS[suffix](path)
+
+
+def _parse_features(features) -> Optional[Dict]:
+    if isinstance(features, str):
+        if not features.strip():
+            return None
+        try:
+            features = json.loads(features)
+        except ValueError:
+            return None
+    return features if isinstance(features, dict) and features else None
+
+
+def song_params(song: Dict) -> Optional[Tuple]:
+    """
+    Parameter UPSERT_SQL untuk satu song, atau None jika song tidak valid
+    (bukan dict, kolom wajib kosong atau tempo di luar slow/medium/fast)
+    """
+    if not isinstance(song, dict):
+        return None
+    if any(not song.get(column) for column in REQUIRED_COLUMNS) or song["tempo"] not in TEMPOS:
+        return None
+    features = _parse_features(song.get("features"))
+    return (
+        song["title"],
+        song["artist"],
+        song["genre"],
+        song["mood"],
+        song["tempo"],
+        song.get("spotify_id") or None,
+        json.dumps(features) if features else None,
+    )
+
+
+def ingest_songs(conn: sqlite3.Connection, songs: Iterable[Dict],
+                 batch_size: int = 10_000) -> Dict:
+    """
+    Upsert songs dengan executemany per batch dalam satu transaksi
+    
+    Memori dibatasi satu batch: songs boleh berupa generator.
+    
+    Args:
+        conn: Koneksi SQLite (schema sudah dibuat dengan create_schema)
+        songs: Iterable song dicts
+        batch_size: Jumlah row per executemany
+    
+    Returns:
+        Dict dengan rows, inserted, updated, skipped, seconds, rows_per_sec
+    """
+    start = time.perf_counter()
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    
+    before = conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0]
+    rows = 0
+    skipped = 0
+    songs = iter(songs)
+    
+    try:
+        conn.execute("BEGIN")
+        while True:
+            chunk = list(islice(songs, batch_size))
+            if not chunk:
+                break
+            batch = [params for params in map(song_params, chunk) if params is not None]
+            skipped += len(chunk) - len(batch)
+            if batch:
+                conn.executemany(UPSERT_SQL, batch)
+                rows += len(batch)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    
+    inserted = conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0] - before
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "inserted": inserted,
+        "updated": rows - inserted,
+        "skipped": skipped,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds) if seconds > 0 else rows,
+    }
+
+
+def ingest_file(input_path: str, db_path: str = "beatlens.db", batch_size: int = 10_000) -> Dict:
+    """
+    Stream file katalog ke database (schema dibuat jika belum ada)
+    
+    Args:
+        input_path: File .jsonl, .csv atau .json
+        db_path: Path ke database SQLite
+        batch_size: Jumlah row per executemany
+    
+    Returns:
+        Statistik ingest (lihat ingest_songs)
+    
+    Raises:
+        ValueError: Jika format file tidak didukung atau database lama
+            berisi spotify_id duplikat (unique index upsert gagal dibuat)
+    """
+    songs = read_songs(input_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        try:
+            create_schema(conn)
+        except sqlite3.IntegrityError as e:
+            raise ValueError(f"songs.spotify_id berisi duplikat, hapus duplikat sebelum ingest: {e}")
+        stats = ingest_songs(conn, songs, batch_size)
+    finally:
+        conn.close()
+    
+    print(f"✓ Ingest {input_path}: {stats['rows']} rows "
+          f"({stats['inserted']} inserted, {stats['updated']} updated) "
+          f"in {stats['seconds']}s, {stats['rows_per_sec']} rows/sec")
+    if stats["skipped"]:
+        print(f"⚠ {stats['skipped']} rows dilewati (kolom wajib kosong atau tempo tidak valid)")
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("input")
+    parser.add_argument("database", nargs="?", default=os.getenv("DATABASE_URL", "beatlens.db"))
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+    
+    db_path = args.database
+    if db_path.startswith("sqlite:///"):
+        db_path = db_path.replace("sqlite:///", "")
+    ingest_file(args.input, db_path, args.batch_size)
@@ -5,27 +5,23 @@ Membuat tabel dan mengisi dengan seed data
 import sqlite3
 import json
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def init_database(db_path: str = "beatlens.db"):
+from db.database import CANDIDATE_INDEX_SQL, create_change_counter, create_search_index
+
+
+def create_schema(conn: sqlite3.Connection):
     """
-    Initialize database dengan schema dan seed data
+    Buat tabel songs dan indexes jika belum ada
     
     Args:
-        db_path: Path ke database file
+        conn: Koneksi SQLite
     """
-    # Hapus database lama jika ada (untuk development)
-    if os.path.exists(db_path):
-        print(f"Database {db_path} sudah ada. Menghapus...")
-        os.remove(db_path)
-    
-    # Buat koneksi
-    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
-    print("Membuat tabel songs...")
-    
     # Buat tabel songs
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS songs (
@@ -42,12 +38,41 @@ def init_database(db_path: str = "beatlens.db"):
     """)
     
     # Buat indexes untuk performa
-    print("Membuat indexes...")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_genre ON songs(genre)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_mood ON songs(mood)")
     cursor.execute("CREATE INDEX IF NOT EXISTS idx_tempo ON songs(tempo)")
+    cursor.execute(CANDIDATE_INDEX_SQL)
+    # Target upsert bulk ingest (NULL spotify_id boleh lebih dari satu)
+    cursor.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_spotify_id ON songs(spotify_id)")
+    # Full-text search title/artist untuk /api/songs/search
+    create_search_index(conn)
+    # Counter perubahan untuk signature catalog artifact
+    create_change_counter(conn)
     
     conn.commit()
+
+
+def init_database(db_path: str = "beatlens.db"):
+    """
+    Initialize database dengan schema dan seed data
+    
+    Args:
+        db_path: Path ke database file
+    """
+    # Import lokal: db.ingest mengimpor create_schema dari modul ini
+    from db.ingest import ingest_songs
+    
+    # Hapus database lama jika ada (untuk development)
+    if os.path.exists(db_path):
+        print(f"Database {db_path} sudah ada. Menghapus...")
+        os.remove(db_path)
+    
+    # Buat koneksi
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    print("Membuat tabel songs dan indexes...")
+    create_schema(conn)
     print("Database schema berhasil dibuat!")
     
     # Load dan insert seed data
@@ -60,22 +85,8 @@ def init_database(db_path: str = "beatlens.db"):
         
         print(f"Memasukkan {len(seed_data)} lagu ke database...")
         
-        for song in seed_data:
-            cursor.execute("""
-                INSERT INTO songs (title, artist, genre, mood, tempo, spotify_id, features)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                song['title'],
-                song['artist'],
-                song['genre'],
-                song['mood'],
-                song['tempo'],
-                song.get('spotify_id'),
-                json.dumps(song.get('features')) if song.get('features') else None
-            ))
-        
-        conn.commit()
-        print(f"✓ Berhasil memasukkan {len(seed_data)} lagu!")
+        stats = ingest_songs(conn, seed_data)
+        print(f"✓ Berhasil memasukkan {stats['inserted']} lagu!")
     else:
         print(f"\n⚠ Warning: Seed data file tidak ditemukan di {seed_file}")
         print("Database dibuat tanpa data awal.")
@@ -26,6 +26,18 @@ class SongResponse(BaseModel):
     cover_url: Optional[str] = None
 
 
+class SongListResponse(BaseModel):
+    """Response model untuk listing dan search lagu"""
+    songs: List[SongResponse]
+    next_cursor: Optional[int] = Field(None, description="Cursor halaman berikutnya (None jika habis)")
+
+
+class SongBatchResponse(BaseModel):
+    """Response model untuk bulk song lookup (urutan sama dengan ids)"""
+    songs: List[Optional[SongResponse]] = Field(..., description="None untuk ID yang tidak ditemukan")
+    missing: List[int] = Field(..., description="ID yang tidak ditemukan")
+
+
 class SongWithScore(SongResponse):
     """Song dengan similarity score dan reason"""
     similarity_score: float
@@ -38,6 +50,19 @@ class RecommendationResponse(BaseModel):
     metadata: dict
 
 
+class BatchRecommendationRequest(BaseModel):
+    """Request model untuk batch recommendation endpoint"""
+    requests: List[RecommendationRequest] = Field(
+        ..., description="Recommendation requests", min_length=1, max_length=50
+    )
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model untuk batch recommendations (urutan sama dengan requests)"""
+    results: List[RecommendationResponse]
+    metadata: dict
+
+
 class GenresResponse(BaseModel):
     """Response model untuk genres list"""
     genres: List[str]
@@ -0,0 +1,429 @@
+"""
+Vector index untuk KNN: exact brute force dan IVF (approximate) dalam NumPy
+"""
+import copy
+import hashlib
+import os
+import tempfile
+import zipfile
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+def fingerprint(vectors: np.ndarray) -> str:
+    """Hash isi matrix, untuk memastikan index di disk cocok dengan katalog"""
+    digest = hashlib.sha1(str(vectors.shape).encode())
+    digest.update(np.ascontiguousarray(vectors).data)
+    return digest.hexdigest()
+
+
+def _row_norms(vectors: np.ndarray) -> np.ndarray:
+    return np.linalg.norm(vectors.astype(np.float64), axis=1)
+
+
+def _normalize(vectors: np.ndarray, norms: np.ndarray) -> np.ndarray:
+    safe = np.where(norms > 0, norms, 1.0)
+    return (vectors / safe[:, None]).astype(np.float32)
+
+
+def _top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k descending, row terkecil menang saat score sama"""
+    if len(rows) > k:
+        kth = np.partition(-scores, k - 1)[k - 1]
+        keep = scores >= -kth
+        rows, scores = rows[keep], scores[keep]
+    order = np.lexsort((rows, -scores))[:k]
+    return rows[order], scores[order]
+
+
+class ExactIndex:
+    """
+    Brute force cosine search atas seluruh vector
+    
+    Dipakai untuk katalog kecil dan sebagai ground truth benchmark recall.
+    """
+    
+    kind = "exact"
+    exact = True
+    
+    def __init__(self, vectors: Optional[np.ndarray] = None, norms: Optional[np.ndarray] = None):
+        """
+        Args:
+            vectors: Matrix float32 (n x dim), tidak perlu dinormalisasi
+            norms: Norm per row yang sudah dihitung (optional)
+        """
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.norms = np.zeros(0)
+        if vectors is not None:
+            self.add(vectors, norms)
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    def add(self, vectors: np.ndarray, norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Tambah vector baru di akhir index
+        
+        Args:
+            vectors: Matrix float32 (n x dim)
+            norms: Norm per row yang sudah dihitung (optional)
+        
+        Returns:
+            Row index vector yang ditambahkan
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if norms is None:
+            norms = _row_norms(vectors)
+        start = len(self.vectors)
+        if start == 0:
+            self.vectors = vectors
+            self.norms = norms
+        else:
+            self.vectors = np.concatenate([self.vectors, vectors])
+            self.norms = np.concatenate([self.norms, norms])
+        return np.arange(start, start + len(vectors))
+    
+    def extended(self, vectors: np.ndarray, norms: np.ndarray,
+                 new_columns: Sequence[int] = ()) -> "ExactIndex":
+        """
+        Index baru untuk vectors = vector index ini + row baru di akhir;
+        index ini tidak diubah (copy-on-write untuk snapshot katalog)
+        
+        Args:
+            vectors: Matrix lengkap (row lama di awal)
+            norms: Norm per row vectors
+            new_columns: Posisi (koordinat lama) kolom nol yang disisipkan
+                ke vector lama, untuk vocabulary yang bertambah
+        
+        Returns:
+            Index baru
+        """
+        index = copy.copy(self)
+        index.vectors = vectors
+        index.norms = norms
+        return index
+    
+    def _score(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        query = np.asarray(query, dtype=np.float64)
+        query_norm = np.linalg.norm(query)
+        magnitudes = self.norms[rows] * query_norm
+        return np.divide(self.vectors[rows] @ query, magnitudes,
+                         out=np.zeros(len(rows)), where=magnitudes > 0)
+    
+    def search(self, query: np.ndarray, k: int,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari top-k cosine similarity
+        
+        Args:
+            query: Query vector (dim,)
+            k: Jumlah hasil
+            mask: Boolean per row; hanya row True yang boleh dikembalikan
+        
+        Returns:
+            Tuple (rows, scores) urut descending
+        """
+        rows = np.arange(len(self.vectors)) if mask is None else np.flatnonzero(mask)
+        if k <= 0 or len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.zeros(0)
+        return _top_k(rows, self._score(rows, query), k)
+    
+    def state(self) -> Dict[str, np.ndarray]:
+        return {}
+    
+    def save(self, path: str):
+        """
+        Simpan struktur index (tanpa vectors) dan fingerprint vectors
+        
+        Ditulis ke file sementara (unik per writer) di direktori yang sama
+        lalu di-rename, sehingga reader atau worker lain tidak pernah
+        melihat file yang setengah ditulis.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                        prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, kind=self.kind, fingerprint=fingerprint(self.vectors), **self.state())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    
+    def stats(self) -> Dict:
+        return {"kind": self.kind, "size": len(self.vectors)}
+
+
+class IVFIndex(ExactIndex):
+    """
+    Inverted file index: vector dikelompokkan dengan k-means (spherical)
+    ke n_lists cluster, query hanya men-scan n_probe cluster terdekat
+    
+    Knobs recall/latency:
+        n_lists: Jumlah cluster (default ~sqrt(n))
+        n_probe: Cluster yang di-scan per query; lebih besar = recall
+            lebih tinggi, latency lebih lama
+    Jika cluster yang di-probe berisi kurang dari k row yang lolos mask,
+    cluster berikutnya ikut di-scan sampai k row terkumpul.
+    """
+    
+    kind = "ivf"
+    exact = False
+    
+    def __init__(self, vectors: Optional[np.ndarray] = None, norms: Optional[np.ndarray] = None,
+                 n_lists: Optional[int] = None, n_probe: int = 8, train_iters: int = 10,
+                 train_sample: int = 65536, seed: int = 0):
+        """
+        Args:
+            vectors: Vector awal (index di-train dari vector ini)
+            norms: Norm per row vectors (optional)
+            n_lists: Jumlah cluster (default: sqrt(n), minimal 1)
+            n_probe: Jumlah cluster yang di-scan per query
+            train_iters: Iterasi k-means
+            train_sample: Jumlah vector sample untuk training k-means
+            seed: Random seed training
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_iters = train_iters
+        self.train_sample = train_sample
+        self.seed = seed
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.lists = []
+        super().__init__(vectors, norms)
+    
+    def train(self, vectors: np.ndarray):
+        """
+        Train centroid dengan spherical k-means pada sample vectors
+        
+        Args:
+            vectors: Matrix float32 (n x dim)
+        """
+        rng = np.random.default_rng(self.seed)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(vectors))))
+        n_lists = max(1, min(n_lists, len(vectors)))
+        
+        sample = vectors
+        if len(vectors) > self.train_sample:
+            sample = vectors[rng.choice(len(vectors), self.train_sample, replace=False)]
+        sample = _normalize(sample, _row_norms(sample))
+        
+        self.centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(self.train_iters):
+            labels = self._assign(sample)
+            sums = np.stack([np.bincount(labels, weights=sample[:, dim], minlength=n_lists)
+                             for dim in range(sample.shape[1])], axis=1)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Cluster kosong tetap memakai centroid lama
+            filled = counts > 0
+            self.centroids[filled] = _normalize(sums[filled], _row_norms(sums[filled]))
+        
+        self.n_lists = n_lists
+    
+    def _assign(self, vectors: np.ndarray, max_block: int = 1 << 22) -> np.ndarray:
+        """Centroid terdekat per vector, per block agar matrix score <= max_block elemen"""
+        block = max(1, max_block // len(self.centroids))
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block):
+            labels[start:start + block] = np.argmax(
+                vectors[start:start + block] @ self.centroids.T, axis=1
+            )
+        return labels
+    
+    def _rebuild_lists(self):
+        order = np.argsort(self.assignments, kind="stable")
+        bounds = np.searchsorted(self.assignments[order], np.arange(self.n_lists + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(self.n_lists)]
+    
+    def add(self, vectors: np.ndarray, norms: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Tambah vector baru; vector di-assign ke centroid yang sudah ada
+        (index di-train saat add pertama)
+        
+        Args:
+            vectors: Matrix float32 (n x dim)
+            norms: Norm per row yang sudah dihitung (optional)
+        
+        Returns:
+            Row index vector yang ditambahkan
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.centroids is None:
+            if len(vectors) == 0:
+                return np.empty(0, dtype=np.int64)
+            self.train(vectors)
+        
+        rows = super().add(vectors, norms)
+        self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+        self._rebuild_lists()
+        return rows
+    
+    def extended(self, vectors: np.ndarray, norms: np.ndarray,
+                 new_columns: Sequence[int] = ()) -> "IVFIndex":
+        """
+        Row baru di-assign ke centroid yang sudah ada tanpa training ulang;
+        kolom baru disisipkan sebagai nol ke centroid (vector lama juga nol
+        di kolom tersebut, jadi assignment lama tetap berlaku)
+        """
+        if self.centroids is None:
+            # Index kosong belum di-train: train dari seluruh vectors
+            index = copy.copy(self)
+            index.vectors = np.zeros((0, 0), dtype=np.float32)
+            index.norms = np.zeros(0)
+            index.add(vectors, norms)
+            return index
+        
+        start = len(self.vectors)
+        index = super().extended(vectors, norms, new_columns)
+        if len(new_columns):
+            index.centroids = np.insert(self.centroids, new_columns, 0, axis=1)
+        index.assignments = np.concatenate([self.assignments, index._assign(vectors[start:])])
+        index._rebuild_lists()
+        return index
+    
+    def search(self, query: np.ndarray, k: int,
+               mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Cari top-k cosine similarity (approximate)
+        
+        Args:
+            query: Query vector (dim,)
+            k: Jumlah hasil
+            mask: Boolean per row; hanya row True yang boleh dikembalikan
+        
+        Returns:
+            Tuple (rows, scores) urut descending
+        """
+        if k <= 0 or self.centroids is None:
+            return np.empty(0, dtype=np.int64), np.zeros(0)
+        
+        order = np.argsort(-(self.centroids @ np.asarray(query, dtype=np.float32)), kind="stable")
+        probed = []
+        found = 0
+        for i, list_id in enumerate(order):
+            members = self.lists[list_id]
+            if mask is not None:
+                members = members[mask[members]]
+            probed.append(members)
+            found += len(members)
+            if i + 1 >= self.n_probe and found >= k:
+                break
+        
+        rows = np.concatenate(probed)
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.zeros(0)
+        return _top_k(rows, self._score(rows, query), k)
+    
+    def state(self) -> Dict[str, np.ndarray]:
+        return {
+            "centroids": self.centroids,
+            "assignments": self.assignments,
+            "n_probe": np.array(self.n_probe),
+        }
+    
+    def stats(self) -> Dict:
+        sizes = [len(members) for members in self.lists]
+        return {
+            "kind": self.kind,
+            "size": len(self.vectors),
+            "n_lists": self.n_lists,
+            "n_probe": self.n_probe,
+            "largest_list": max(sizes) if sizes else 0,
+        }
+
+
+INDEX_TYPES = {"exact": ExactIndex, "ivf": IVFIndex}
+
+
+def resolve_kind(size: int, kind: str = "auto", ann_threshold: int = 100_000) -> str:
+    """Jenis index untuk katalog berukuran size ("auto": ivf jika size >= ann_threshold)"""
+    if kind == "auto":
+        kind = "ivf" if size >= ann_threshold else "exact"
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type: {kind}")
+    return kind
+
+
+def build_index(vectors: np.ndarray, kind: str = "auto", ann_threshold: int = 100_000,
+                norms: Optional[np.ndarray] = None, **knobs) -> ExactIndex:
+    """
+    Buat index untuk vectors
+    
+    Args:
+        vectors: Matrix float32 (n x dim)
+        kind: "exact", "ivf", atau "auto" (ivf jika n >= ann_threshold)
+        ann_threshold: Batas ukuran katalog untuk mode auto
+        norms: Norm per row vectors (optional)
+        **knobs: Parameter index approximate (n_lists, n_probe, ...)
+    
+    Returns:
+        Index
+    """
+    if resolve_kind(len(vectors), kind, ann_threshold) == "exact":
+        return ExactIndex(vectors, norms)
+    return IVFIndex(vectors, norms, **knobs)
+
+
+def load_index(path: str, vectors: np.ndarray,
+               norms: Optional[np.ndarray] = None) -> Optional[ExactIndex]:
+    """
+    Load index dari disk untuk vectors yang diberikan
+    
+    Args:
+        path: File .npz hasil save()
+        vectors: Matrix vector katalog saat ini
+        norms: Norm per row vectors (optional)
+    
+    Returns:
+        Index, atau None jika file tidak ada, rusak atau dibuat dari
+        vectors berbeda
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != fingerprint(vectors):
+                return None
+            kind = str(data["kind"])
+            if kind == "exact":
+                return ExactIndex(vectors, norms)
+            index = IVFIndex(n_probe=int(data["n_probe"]))
+            index.centroids = data["centroids"]
+            index.n_lists = len(index.centroids)
+            index.assignments = data["assignments"]
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+        print(f"⚠ Vector index {path} tidak bisa dibaca, build ulang: {e}")
+        return None
+    
+    ExactIndex.add(index, vectors, norms)
+    index._rebuild_lists()
+    return index
+
+
+def load_or_build_index(vectors: np.ndarray, path: Optional[str] = None,
+                        **options) -> ExactIndex:
+    """
+    Pakai index di disk jika cocok dengan vectors, jika tidak build dan simpan
+    
+    Args:
+        vectors: Matrix float32 (n x dim)
+        path: File .npz (None = tanpa persistence)
+        **options: Argument build_index
+    
+    Returns:
+        Index
+    """
+    if path:
+        index = load_index(path, vectors, options.get("norms"))
+        kind = resolve_kind(len(vectors), options.get("kind", "auto"),
+                            options.get("ann_threshold", 100_000))
+        if index is not None and index.kind == kind:
+            if isinstance(index, IVFIndex) and "n_probe" in options:
+                index.n_probe = options["n_probe"]
+            return index
+    
+    index = build_index(vectors, **options)
+    if path:
+        index.save(path)
+    return index
@@ -0,0 +1,187 @@
+"""
+Column store float32 untuk numeric audio features (songs.features)
+"""
+import json
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+
+# Numeric features yang dipakai KNN (nama mengikuti Spotify audio-features)
+NUMERIC_FEATURES = (
+    "energy", "valence", "danceability", "acousticness", "instrumentalness",
+    "speechiness", "liveness", "loudness", "bpm",
+)
+
+# Nama alternatif di JSON features -> nama kolom
+FEATURE_ALIASES = {"tempo": "bpm"}
+
+
+def extract_features(features: Union[Dict, str, None]) -> Dict[str, float]:
+    """
+    Ambil numeric features yang dikenal dari dict (atau JSON string) features
+    
+    Args:
+        features: Value kolom songs.features
+    
+    Returns:
+        Dict nama kolom -> value; key yang tidak dikenal atau bukan angka diabaikan
+    """
+    if isinstance(features, str):
+        try:
+            features = json.loads(features)
+        except ValueError:
+            return {}
+    if not isinstance(features, dict):
+        return {}
+    
+    values = {}
+    for key, value in features.items():
+        name = FEATURE_ALIASES.get(key, key)
+        if name in NUMERIC_FEATURES and isinstance(value, (int, float)) and not isinstance(value, bool):
+            values[name] = float(value)
+    return values
+
+
+class AudioFeatureStore:
+    """
+    Matrix float32 (songs x features) hasil parsing songs.features sekali
+    per load katalog, beserta mean/std untuk standardisasi
+    
+    Hanya kolom yang muncul di minimal satu lagu yang disimpan. Value yang
+    tidak ada disimpan sebagai NaN dan menjadi 0 (= mean) setelah
+    standardisasi.
+    """
+    
+    def __init__(self, columns: Sequence[str], values: np.ndarray):
+        """
+        Args:
+            columns: Nama kolom
+            values: Matrix float32 (n_songs x len(columns)), NaN jika tidak ada
+        """
+        self.columns = tuple(columns)
+        self.values = values
+        
+        if self.columns and len(values):
+            self.mean = np.nanmean(values.astype(np.float64), axis=0)
+            std = np.nanstd(values.astype(np.float64), axis=0)
+            self.std = np.where(std > 0, std, 1.0)
+        else:
+            self.mean = np.zeros(len(self.columns))
+            self.std = np.ones(len(self.columns))
+    
+    @classmethod
+    def build(cls, songs: Sequence[Dict]) -> "AudioFeatureStore":
+        """
+        Parse features semua lagu menjadi column store
+        
+        Args:
+            songs: List of songs (urutan menentukan row)
+        
+        Returns:
+            AudioFeatureStore
+        """
+        return cls.from_values(song.get('features') for song in songs)
+    
+    @classmethod
+    def from_values(cls, features: Iterable[Union[Dict, str, None]]) -> "AudioFeatureStore":
+        """
+        Parse kolom features (dict, JSON string atau None per row) menjadi
+        column store, misalnya SongCatalog.strings["features"]
+        """
+        parsed: List[Dict[str, float]] = [extract_features(value) for value in features]
+        seen = set(name for values in parsed for name in values)
+        columns = [name for name in NUMERIC_FEATURES if name in seen]
+        
+        values = np.full((len(parsed), len(columns)), np.nan, dtype=np.float32)
+        for col, name in enumerate(columns):
+            for row, features in enumerate(parsed):
+                if name in features:
+                    values[row, col] = features[name]
+        
+        return cls(columns, values)
+    
+    @property
+    def present(self) -> np.ndarray:
+        """Boolean per row: True jika lagu punya minimal satu feature"""
+        if not self.columns:
+            return np.zeros(len(self.values), dtype=bool)
+        return ~np.isnan(self.values).all(axis=1)
+    
+    def standardized(self) -> np.ndarray:
+        """
+        Z-score seluruh matrix (float32), value yang tidak ada menjadi 0
+        """
+        z = (self.values - self.mean) / self.std
+        return np.nan_to_num(z, nan=0.0).astype(np.float32)
+    
+    def standardize(self, features: Union[Dict, str, None]) -> np.ndarray:
+        """
+        Z-score features satu lagu di luar column store
+        
+        Args:
+            features: Value kolom songs.features
+        
+        Returns:
+            Vector float64 sepanjang columns
+        """
+        values = extract_features(features)
+        raw = np.array([values.get(name, np.nan) for name in self.columns])
+        return np.nan_to_num((raw - self.mean) / self.std, nan=0.0)
+    
+    def standardize_many(self, features: Iterable[Union[Dict, str, None]]) -> np.ndarray:
+        """
+        Z-score features beberapa lagu di luar column store
+        
+        Args:
+            features: Value kolom songs.features per lagu
+        
+        Returns:
+            Matrix float32 (n x len(columns)), value yang tidak ada menjadi 0
+        """
+        parsed = [extract_features(value) for value in features]
+        raw = np.full((len(parsed), len(self.columns)), np.nan, dtype=np.float32)
+        for row, values in enumerate(parsed):
+            for col, name in enumerate(self.columns):
+                if name in values:
+                    raw[row, col] = values[name]
+        return np.nan_to_num((raw - self.mean) / self.std, nan=0.0).astype(np.float32)
+    
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+    
+    @classmethod
+    def from_stats(cls, columns: Sequence[str], mean: Sequence[float],
+                   std: Sequence[float]) -> "AudioFeatureStore":
+        """
+        Store tanpa values, hanya statistik standardisasi (misalnya dari
+        catalog artifact) untuk standardize() lagu di luar katalog
+        """
+        store = cls(columns, np.zeros((0, len(columns)), dtype=np.float32))
+        store.mean = np.array(mean, dtype=np.float64)
+        store.std = np.array(std, dtype=np.float64)
+        return store
+    
+    @classmethod
+    def empty(cls) -> "AudioFeatureStore":
+        return cls((), np.zeros((0, 0), dtype=np.float32))
+
+
+def parse_weights(spec: Optional[str]) -> Dict[str, float]:
+    """
+    Parse konfigurasi bobot block feature, misalnya "mood=1,genre=1,audio=0.5"
+    
+    Args:
+        spec: String "block=weight" dipisah koma (kosong/None = default)
+    
+    Returns:
+        Dict block -> weight
+    """
+    weights = {}
+    for part in (spec or "").split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        weights[name.strip()] = float(value)
+    return weights
@@ -0,0 +1,303 @@
+"""
+Cache utilities: in-memory LRU dengan TTL dan persistent tier SQLite
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+# Sentinel untuk membedakan cache miss dari value None yang di-cache
+MISSING = object()
+
+
+class SQLiteCacheStore:
+    """
+    Persistent key-value store di SQLite untuk tier kedua TTLCache
+    
+    Value disimpan sebagai JSON sehingga bertahan antar restart/deploy.
+    """
+    
+    MAX_KEYS_PER_QUERY = 500  # di bawah batas variabel SQLite lama (999)
+    
+    def __init__(self, path: str, table: str = "cache"):
+        """
+        Initialize persistent store
+        
+        Args:
+            path: Path ke file SQLite
+            table: Nama tabel cache
+        """
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.connection.commit()
+    
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Get value yang belum expired
+        
+        Returns:
+            Tuple (value, expires_at) atau None jika tidak ada/expired
+        """
+        with self._lock:
+            row = self.connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Tuple[Any, float]]:
+        """
+        Get banyak value yang belum expired dengan query WHERE key IN (...)
+        
+        Returns:
+            Dict key -> (value, expires_at) hanya untuk key yang ada
+        """
+        results = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(keys), self.MAX_KEYS_PER_QUERY):
+                chunk = keys[start:start + self.MAX_KEYS_PER_QUERY]
+                rows = self.connection.execute(
+                    f"SELECT key, value, expires_at FROM {self.table} "
+                    f"WHERE key IN ({', '.join('?' * len(chunk))}) AND expires_at > ?",
+                    (*chunk, now)
+                ).fetchall()
+                for key, value, expires_at in rows:
+                    results[key] = (json.loads(value), expires_at)
+        return results
+    
+    def set(self, key: str, value: Any, expires_at: float):
+        """Simpan value dengan waktu expired (epoch seconds)"""
+        with self._lock:
+            self.connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self.connection.commit()
+    
+    def set_many(self, entries: Iterable[Tuple[str, Any, float]]):
+        """
+        Simpan banyak value dalam satu transaksi
+        
+        Args:
+            entries: Iterable (key, value, expires_at)
+        """
+        rows = [(key, json.dumps(value), expires_at) for key, value, expires_at in entries]
+        if not rows:
+            return
+        with self._lock:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+                rows
+            )
+            self.connection.commit()
+    
+    def purge_expired(self) -> int:
+        """Hapus entry yang sudah expired"""
+        with self._lock:
+            cursor = self.connection.execute(
+                f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),)
+            )
+            self.connection.commit()
+        return cursor.rowcount
+    
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache dengan TTL per entry dan hit/miss counters
+    
+    Jika store diberikan, entry juga ditulis ke store (write-through) dan
+    miss di memory dicoba dari store sebelum dianggap miss. Dengan
+    write_behind, penulisan ke store ditunda sampai flush() sehingga
+    caller async bisa menulisnya sekaligus di luar event loop.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600,
+                 store: Optional[SQLiteCacheStore] = None, write_behind: bool = False):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Jumlah entry maksimal di memory
+            ttl: Default time-to-live dalam detik
+            store: Persistent tier (optional)
+            write_behind: Tahan penulisan ke store sampai flush()
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.write_behind = write_behind
+        self._pending: Dict[str, Tuple[Any, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Get value dari cache
+        
+        Args:
+            key: Cache key
+            default: Value jika miss (default: MISSING)
+        
+        Returns:
+            Cached value atau default
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._data[key]
+        
+        if self.store is not None:
+            stored = self.store.get(str(key))
+            if stored is not None:
+                value, expires_at = stored
+                with self._lock:
+                    self._insert(key, value, expires_at)
+                    self.hits += 1
+                return value
+        
+        with self._lock:
+            self.misses += 1
+        return default
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Simpan value ke cache
+        
+        Args:
+            key: Cache key
+            value: Value (harus JSON-serializable jika memakai store)
+            ttl: Time-to-live khusus entry ini (default: self.ttl)
+        """
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._insert(key, value, expires_at)
+            if self.store is not None and self.write_behind:
+                self._pending[str(key)] = (value, expires_at)
+                return
+        if self.store is not None:
+            self.store.set(str(key), value, expires_at)
+    
+    def flush(self) -> int:
+        """
+        Tulis entry write-behind yang tertunda ke store dalam satu transaksi
+        
+        Blocking (SQLite), jadi caller async menjalankannya lewat
+        asyncio.to_thread.
+        
+        Returns:
+            Jumlah entry yang ditulis
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if self.store is None or not pending:
+            return 0
+        self.store.set_many((key, value, expires_at) for key, (value, expires_at) in pending.items())
+        return len(pending)
+    
+    def _insert(self, key: Hashable, value: Any, expires_at: float):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def get_many(self, keys: Iterable[Hashable], memory_only: bool = False) -> Dict[Hashable, Any]:
+        """
+        Get banyak key sekaligus; miss di memory diambil dari store dengan
+        satu query (lihat load_many)
+        
+        Args:
+            keys: Cache keys
+            memory_only: Hanya tier memory; key yang miss tidak dihitung
+                sebagai miss agar caller bisa melanjutkan dengan load_many
+                (misalnya lewat asyncio.to_thread)
+        
+        Returns:
+            Dict key -> value hanya untuk key yang hit
+        """
+        now = time.time()
+        results = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None:
+                    if entry[1] > now:
+                        self._data.move_to_end(key)
+                        results[key] = entry[0]
+                        continue
+                    del self._data[key]
+                missing.append(key)
+            self.hits += len(results)
+        
+        if not memory_only:
+            results.update(self.load_many(missing))
+        return results
+    
+    def load_many(self, keys: List[Hashable]) -> Dict[Hashable, Any]:
+        """
+        Ambil key yang miss di memory dari store dengan satu query dan
+        masukkan ke tier memory. Blocking (SQLite).
+        
+        Returns:
+            Dict key -> value hanya untuk key yang ada di store
+        """
+        found = {}
+        if self.store is not None and keys:
+            stored = self.store.get_many([str(key) for key in keys])
+            with self._lock:
+                for key in keys:
+                    entry = stored.get(str(key))
+                    if entry is not None:
+                        self._insert(key, *entry)
+                        found[key] = entry[0]
+        
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+    
+    def clear(self):
+        """Kosongkan tier memory"""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Statistik cache untuk monitoring"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "persistent": self.store is not None
+        }
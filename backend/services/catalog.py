@@ -0,0 +1,288 @@
+"""
+Catalog snapshot in-memory untuk hot path rekomendasi
+"""
+import asyncio
+import os
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from services.rule_engine import CatalogIndex
+from services.knn_recommender import KNNRecommender
+from services.catalog_artifact import CatalogArtifact
+from services.song_catalog import SongCatalog
+from services.recommendation_table import RecommendationTable
+
+
+@dataclass(frozen=True, eq=False)
+class CatalogSnapshot:
+    """
+    Immutable snapshot katalog lagu beserta index yang diturunkan darinya
+    
+    Snapshot tidak pernah diubah setelah dibuat; perubahan katalog
+    menghasilkan snapshot baru yang di-swap secara atomic. version adalah
+    counter per proses; changes adalah counter perubahan songs di database
+    saat snapshot dibaca, sama di semua worker (dipakai untuk ETag).
+    """
+    version: int
+    songs: Sequence[Dict]
+    index: CatalogIndex
+    recommender: KNNRecommender
+    by_id: Mapping[int, Dict] = field(repr=False)
+    genres: Tuple[str, ...]
+    table: Optional[RecommendationTable] = field(default=None, repr=False)
+    source: str = "database"
+    changes: Optional[int] = None
+    
+    @classmethod
+    def build(cls, songs: Union[SongCatalog, List[Dict]], version: int = 0,
+              feature_weights: Optional[Dict[str, float]] = None,
+              index_options: Optional[Dict] = None) -> "CatalogSnapshot":
+        """
+        Build snapshot dari songs
+        
+        Songs disimpan sebagai SongCatalog (kolom); dict hanya dibuat untuk
+        lagu yang diakses lewat songs[row] / by_id.
+        
+        Args:
+            songs: SongCatalog atau list of song dicts
+            version: Versi katalog
+            feature_weights: Bobot block feature KNN (default: KNNRecommender.DEFAULT_WEIGHTS)
+            index_options: Konfigurasi vector index KNN (lihat load_or_build_index)
+        
+        Returns:
+            CatalogSnapshot
+        """
+        catalog = SongCatalog.from_songs(songs)
+        recommender = KNNRecommender(feature_weights, index_options)
+        if len(catalog):
+            recommender.build_encoders(catalog)
+        
+        return cls._from_catalog(catalog, recommender, version)
+    
+    def extended(self, columns: Dict[str, Sequence], version: int) -> "CatalogSnapshot":
+        """
+        Snapshot baru dengan lagu tambahan di akhir, tanpa encode ulang
+        lagu yang sudah ada; snapshot ini tidak diubah
+        
+        Args:
+            columns: Kolom lagu baru (format Database.get_song_columns)
+            version: Versi katalog baru
+        
+        Returns:
+            CatalogSnapshot tanpa table (dihitung ulang oleh CatalogStore)
+        """
+        start = len(self.songs)
+        catalog = SongCatalog.from_songs(self.songs).extended(columns)
+        return CatalogSnapshot(
+            version=version,
+            songs=catalog,
+            index=self.index.extended(catalog, {
+                field: (catalog.codes[field][start:], catalog.vocabularies[field])
+                for field in CatalogIndex.FIELDS
+            }),
+            recommender=self.recommender.extended(catalog),
+            by_id=catalog.by_id,
+            genres=tuple(catalog.genres),
+            source=self.source,
+        )
+    
+    @classmethod
+    def _from_catalog(cls, catalog: SongCatalog, recommender: KNNRecommender, version: int,
+                      source: str = "database") -> "CatalogSnapshot":
+        return cls(
+            version=version,
+            songs=catalog,
+            index=CatalogIndex.from_codes(catalog, {
+                field: (catalog.codes[field], catalog.vocabularies[field])
+                for field in CatalogIndex.FIELDS
+            }),
+            recommender=recommender,
+            by_id=catalog.by_id,
+            genres=tuple(catalog.genres),
+            source=source,
+        )
+    
+    @classmethod
+    def from_artifact(cls, artifact: CatalogArtifact, version: int = 0,
+                      index_options: Optional[Dict] = None) -> "CatalogSnapshot":
+        """
+        Build snapshot dari compiled catalog artifact
+        
+        Song dict hanya dibuat saat diakses; feature matrix dan kolom
+        katalog tetap berupa memmap ke file artifact.
+        
+        Args:
+            artifact: CatalogArtifact
+            version: Versi katalog
+            index_options: Konfigurasi vector index KNN
+        
+        Returns:
+            CatalogSnapshot
+        """
+        catalog = SongCatalog.from_artifact(artifact)
+        recommender = KNNRecommender.from_artifact(artifact, index_options)
+        return cls._from_catalog(catalog, recommender, version, source="artifact")
+
+
+class CatalogStore:
+    """
+    Menyimpan CatalogSnapshot aktif dan me-refresh-nya hanya saat
+    tabel songs berubah
+    """
+    
+    def __init__(self, db, precompute_table: bool = True,
+                 feature_weights: Optional[Dict[str, float]] = None,
+                 index_options: Optional[Dict] = None, artifact_path: Optional[str] = None,
+                 incremental: bool = True):
+        """
+        Initialize catalog store
+        
+        Args:
+            db: Database instance
+            precompute_table: Hitung RecommendationTable setiap load
+            feature_weights: Bobot block feature KNN
+            index_options: Konfigurasi vector index KNN
+            artifact_path: Compiled catalog artifact; dipakai selama masih
+                sesuai dengan database (lihat db/compile_catalog.py)
+            incremental: Tambahkan lagu baru ke snapshot tanpa load penuh
+                jika memungkinkan (lihat append)
+        """
+        self.db = db
+        self.precompute_table = precompute_table
+        self.feature_weights = feature_weights
+        self.index_options = index_options
+        self.artifact_path = artifact_path
+        self.incremental = incremental
+        self.snapshot: Optional[CatalogSnapshot] = None
+        self._data_version = None
+        self._append_count = 0
+    
+    def load(self) -> CatalogSnapshot:
+        """
+        Load ulang katalog dari database dan swap snapshot
+        
+        Returns:
+            Snapshot baru
+        """
+        append_count = self.db.append_count
+        data_version = self.db.get_data_version()
+        changes = self.db.get_change_count()
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        
+        snapshot = self._load_artifact(version)
+        if snapshot is None:
+            songs = SongCatalog.from_columns(self.db.get_song_columns())
+            snapshot = CatalogSnapshot.build(songs, version, self.feature_weights,
+                                             self.index_options)
+        snapshot = replace(snapshot, changes=changes)
+        if self.precompute_table:
+            snapshot = replace(snapshot, table=RecommendationTable.build(snapshot))
+        
+        # Swap atomic: request yang sedang berjalan tetap memakai snapshot lama
+        self.snapshot = snapshot
+        self._data_version = data_version
+        self._append_count = append_count
+        return self.snapshot
+    
+    def append(self) -> bool:
+        """
+        Tambahkan lagu baru ke snapshot tanpa load ulang katalog
+        
+        Hanya dipakai jika semua perubahan sejak snapshot terakhir adalah
+        insert_song lewat Database instance ini. Perubahan lain (update,
+        delete, write dari proses lain) tidak bisa dibedakan per row,
+        sehingga butuh load() penuh. RecommendationTable di-extend dengan
+        lagu baru saja (lihat RecommendationTable.extended), bukan di-build
+        ulang atas seluruh katalog.
+        
+        Returns:
+            True jika snapshot di-update, False jika butuh load()
+        """
+        if self.snapshot is None:
+            return False
+        
+        append_count = self.db.append_count
+        data_version = self.db.get_data_version()
+        changes = self.db.get_change_count()
+        appended = append_count - self._append_count
+        if (data_version[0] != self._data_version[0]
+                or data_version[1] - self._data_version[1] != appended):
+            return False
+        
+        songs = self.snapshot.songs
+        after_id = int(songs.ids.max()) if len(songs) else 0
+        columns = self.db.get_song_columns(after_id=after_id)
+        if len(columns["id"]) != appended:
+            return False
+        
+        snapshot = replace(self.snapshot.extended(columns, self.snapshot.version + 1),
+                           changes=changes)
+        if self.precompute_table:
+            table = self.snapshot.table
+            table = (table.extended(snapshot, len(songs)) if table is not None
+                     else RecommendationTable.build(snapshot))
+            snapshot = replace(snapshot, table=table)
+        
+        # Swap atomic seperti load()
+        self.snapshot = snapshot
+        self._data_version = data_version
+        self._append_count = append_count
+        return True
+    
+    def _load_artifact(self, version: int) -> Optional[CatalogSnapshot]:
+        """
+        Snapshot dari artifact jika ada dan masih sesuai dengan database
+        serta bobot feature yang dikonfigurasi
+        """
+        if not self.artifact_path or not os.path.exists(self.artifact_path):
+            return None
+        
+        try:
+            artifact = CatalogArtifact(self.artifact_path)
+        except (OSError, ValueError) as e:
+            print(f"⚠ Catalog artifact tidak bisa dibuka: {e}")
+            return None
+        
+        weights = {**KNNRecommender.DEFAULT_WEIGHTS, **(self.feature_weights or {})}
+        signature = self.db.get_catalog_signature()
+        if (signature["changes"] is None or artifact.source != signature
+                or artifact.weights != weights):
+            print("⚠ Catalog artifact tidak sesuai dengan database, memakai database")
+            return None
+        
+        return CatalogSnapshot.from_artifact(artifact, version, self.index_options)
+    
+    def has_changed(self) -> bool:
+        """Cek apakah database berubah sejak snapshot terakhir"""
+        return self.db.get_data_version() != self._data_version
+    
+    def refresh_if_changed(self) -> bool:
+        """
+        Reload snapshot jika database berubah
+        
+        Returns:
+            True jika snapshot di-reload
+        """
+        if self.snapshot is not None and not self.has_changed():
+            return False
+        if not (self.incremental and self.append()):
+            self.load()
+        return True
+    
+    async def watch(self, interval: float = 5.0):
+        """
+        Poll versi database secara periodik di background
+        
+        Args:
+            interval: Jeda polling dalam detik
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.refresh_if_changed):
+                    print(f"✓ Catalog reloaded (version {self.snapshot.version}, "
+                          f"{len(self.snapshot.songs)} songs)")
+                    if self.snapshot.table is not None:
+                        print(f"✓ Recommendation table rebuilt: {self.snapshot.table.stats()}")
+            except Exception as e:
+                print(f"Error refreshing catalog: {e}")
@@ -0,0 +1,207 @@
+"""
+Compiled catalog artifact: katalog dalam satu file binary yang dibuka
+dengan np.memmap
+
+Semua uvicorn worker yang membuka file yang sama berbagi physical pages
+lewat page cache, sehingga feature matrix dan kolom katalog tidak
+di-copy per worker dan startup tidak perlu membaca seluruh tabel songs.
+
+Layout file:
+    MAGIC (8 byte) | panjang header (uint64 little-endian) | header JSON |
+    padding | section 1 | padding | section 2 | ...
+Setiap section di-align ke 64 byte; header menyimpan offset (relatif
+terhadap awal data), dtype dan shape setiap section.
+"""
+import json
+import os
+import struct
+import tempfile
+from collections.abc import Sequence
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.knn_recommender import KNNRecommender
+from services.song_catalog import STRING_COLUMNS, SongCatalog
+
+
+MAGIC = b"BEATCAT1"
+ALIGN = 64
+FORMAT_VERSION = 1
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _string_table(values: List[Optional[str]]):
+    """Encode list string menjadi (offsets int64, bytes uint8, null mask)"""
+    encoded = [value.encode("utf-8") if value is not None else b"" for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    nulls = np.array([value is None for value in values], dtype=bool)
+    return offsets, data, nulls
+
+
+def write_catalog_artifact(path: str, songs: Sequence, source: Optional[Dict] = None,
+                           feature_weights: Optional[Dict[str, float]] = None) -> Dict:
+    """
+    Compile songs menjadi artifact di path
+    
+    File ditulis ke file sementara (unik per writer) di direktori yang sama
+    lalu di-rename (atomic), sehingga worker yang sedang memakai artifact
+    lama tidak terganggu dan compile yang berjalan bersamaan tidak saling
+    menimpa.
+    
+    Args:
+        path: Path file artifact
+        songs: SongCatalog atau list of song dicts
+        source: Signature database asal (Database.get_catalog_signature)
+        feature_weights: Bobot block feature KNN
+    
+    Returns:
+        Header artifact
+    """
+    catalog = SongCatalog.from_songs(songs)
+    recommender = KNNRecommender(feature_weights, index_options={"kind": "exact"})
+    if len(catalog):
+        recommender.build_encoders(catalog)
+    
+    sections = {
+        "ids": catalog.ids,
+        "genre_codes": catalog.codes["genre"].astype(np.int16),
+        "mood_codes": catalog.codes["mood"].astype(np.int16),
+        "tempo_codes": catalog.codes["tempo"].astype(np.int16),
+        "feature_matrix": recommender.feature_matrix,
+        "row_norms": recommender.row_norms,
+    }
+    for column in STRING_COLUMNS:
+        offsets, data, nulls = _string_table([
+            None if value is None else str(value) for value in catalog.strings[column]
+        ])
+        sections[f"{column}_offsets"] = offsets
+        sections[f"{column}_bytes"] = data
+        sections[f"{column}_null"] = nulls
+    
+    audio = recommender.audio
+    header = {
+        "format": FORMAT_VERSION,
+        "size": len(catalog),
+        "source": source,
+        "weights": recommender.weights,
+        "genres": catalog.vocabularies["genre"],
+        "moods": catalog.vocabularies["mood"],
+        "tempos": catalog.vocabularies["tempo"],
+        "audio": {
+            "columns": list(audio.columns),
+            "mean": audio.mean.tolist(),
+            "std": audio.std.tolist(),
+            "targets": {mood: target.tolist() for mood, target in recommender.audio_targets.items()},
+        },
+        "sections": {},
+    }
+    
+    offset = 0
+    for name, array in sections.items():
+        array = np.ascontiguousarray(array)
+        sections[name] = array
+        offset = _align(offset)
+        header["sections"][name] = {"offset": offset, "dtype": array.dtype.str,
+                                    "shape": list(array.shape)}
+        offset += array.nbytes
+    
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header_bytes))
+    
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                    prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name, array in sections.items():
+                f.seek(data_start + header["sections"][name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return header
+
+
+class CatalogArtifact:
+    """Artifact katalog yang dibuka read-only dengan np.memmap"""
+    
+    def __init__(self, path: str):
+        """
+        Open artifact
+        
+        Args:
+            path: Path file artifact
+        
+        Raises:
+            ValueError: Jika file bukan artifact katalog yang didukung
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a catalog artifact")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            self.header = json.loads(f.read(header_length))
+        if self.header.get("format") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported catalog artifact format: {self.header.get('format')}")
+        
+        data_start = _align(len(MAGIC) + 8 + header_length)
+        self.sections = {}
+        for name, spec in self.header["sections"].items():
+            shape = tuple(spec["shape"])
+            if int(np.prod(shape)) == 0:
+                self.sections[name] = np.zeros(shape, dtype=spec["dtype"])
+            else:
+                self.sections[name] = np.memmap(path, dtype=spec["dtype"], mode="r",
+                                                offset=data_start + spec["offset"], shape=shape)
+    
+    def __len__(self) -> int:
+        return self.header["size"]
+    
+    def __getattr__(self, name):
+        sections = self.__dict__.get("sections", {})
+        if name in sections:
+            return sections[name]
+        raise AttributeError(name)
+    
+    @property
+    def source(self) -> Optional[Dict]:
+        return self.header.get("source")
+    
+    @property
+    def weights(self) -> Dict[str, float]:
+        return self.header["weights"]
+    
+    def string_column(self, column: str) -> "StringTable":
+        """Kolom string sebagai Sequence di atas memmap"""
+        return StringTable(self.sections[f"{column}_offsets"], self.sections[f"{column}_bytes"],
+                           self.sections[f"{column}_null"])
+    
+    @property
+    def nbytes(self) -> int:
+        return os.path.getsize(self.path)
+
+
+class StringTable(Sequence):
+    """String per row dari offsets + UTF-8 bytes (None jika null)"""
+    
+    def __init__(self, offsets: np.ndarray, data: np.ndarray, nulls: np.ndarray):
+        self.offsets = offsets
+        self.data = data
+        self.nulls = nulls
+    
+    def __len__(self) -> int:
+        return len(self.nulls)
+    
+    def __getitem__(self, row) -> Optional[str]:
+        if self.nulls[row]:
+            return None
+        return bytes(self.data[self.offsets[row]:self.offsets[row + 1]]).decode("utf-8")
@@ -0,0 +1,98 @@
+"""
+HTTP caching untuk endpoint yang hanya berubah saat katalog berubah:
+ETag dari versi katalog, Cache-Control dan conditional GET (304)
+"""
+import secrets
+from typing import Any, Dict, Optional
+
+from services.cache import MISSING
+
+
+class CatalogETags:
+    """
+    ETag berbasis state katalog di database
+    
+    ETag dibentuk dari counter perubahan tabel songs (songs_changes) dan
+    jumlah lagu, yang sama untuk semua worker yang membuka database yang
+    sama, jadi conditional GET dijawab 304 oleh worker mana pun. Database
+    tanpa counter memakai versi katalog per proses dengan epoch acak,
+    agar ETag dari proses lain atau sebelum restart tidak dianggap cocok.
+    """
+    
+    def __init__(self, max_age: int = 60):
+        """
+        Args:
+            max_age: max-age Cache-Control dalam detik
+        """
+        self.epoch = secrets.token_hex(4)
+        self.max_age = max_age
+    
+    def etag(self, changes: Optional[int], size: int, catalog_version: int) -> str:
+        """
+        Weak ETag untuk state katalog
+        
+        Args:
+            changes: Counter perubahan songs saat katalog dibaca (None
+                jika database belum punya counter)
+            size: Jumlah lagu
+            catalog_version: Versi katalog per proses (fallback)
+        """
+        if changes is None:
+            return f'W/"{self.epoch}-{catalog_version}"'
+        return f'W/"c{changes}-{size}"'
+    
+    def headers(self, etag: Optional[str]) -> Dict[str, str]:
+        """
+        Header caching response
+        
+        Args:
+            etag: ETag response, atau None jika response tidak boleh
+                di-cache (misalnya enrichment Spotify tidak lengkap)
+        """
+        if etag is None:
+            return {"Cache-Control": "no-cache"}
+        return {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}"}
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Cek header If-None-Match terhadap ETag (weak comparison, RFC 9110)
+    
+    Args:
+        if_none_match: Nilai header If-None-Match (boleh berisi beberapa ETag)
+        etag: ETag response saat ini
+    """
+    if not if_none_match:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+class VersionedValue:
+    """
+    Satu nilai yang di-cache untuk satu versi katalog (misalnya daftar
+    genre); otomatis miss saat versi katalog berubah
+    """
+    
+    def __init__(self):
+        self.version = None
+        self.value = MISSING
+    
+    def get(self, catalog_version: int) -> Any:
+        """
+        Returns:
+            Nilai yang di-cache atau MISSING
+        """
+        return self.value if catalog_version == self.version else MISSING
+    
+    def set(self, catalog_version: int, value: Any):
+        """Simpan nilai, kecuali versi lebih lama dari yang sudah di-cache"""
+        if self.version is None or catalog_version >= self.version:
+            self.version = catalog_version
+            self.value = value
@@ -1,59 +1,344 @@
 """
 KNN Recommender untuk similarity matching
 """
+import copy
+
 import numpy as np
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Union
+
+from services.audio_features import AudioFeatureStore
+from services.ann_index import load_or_build_index
+from services.song_catalog import RowLookup, SongCatalog
 
 
 class KNNRecommender:
     """KNN-based recommender menggunakan cosine similarity"""
     
-    def __init__(self):
+    # Bobot per block feature vector; block audio diskalakan 1/sqrt(n_kolom)
+    # sehingga norm-nya sebanding dengan satu block one-hot
+    DEFAULT_WEIGHTS = {"mood": 1.0, "genre": 1.0, "tempo": 1.0, "audio": 0.5}
+    
+    def __init__(self, weights: Optional[Dict[str, float]] = None,
+                 index_options: Optional[Dict] = None):
+        """
+        Args:
+            weights: Override bobot block (mood, genre, tempo, audio)
+            index_options: Argument load_or_build_index (kind, ann_threshold,
+                n_lists, n_probe, path, ...)
+        """
+        unknown = set(weights or {}) - set(self.DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown feature blocks: {', '.join(sorted(unknown))}")
+        self.weights = {**self.DEFAULT_WEIGHTS, **(weights or {})}
+        
         self.genre_encoder = {}
         self.mood_encoder = {}
         self.tempo_encoder = {"slow": 0, "medium": 1, "fast": 2}
+        self.genre_list = []
+        self.mood_list = []
+        
+        # Feature matrix katalog beserta norm per baris
+        self.feature_matrix = np.zeros((0, 1), dtype=np.float32)
+        self.row_norms = np.zeros(0)
+        self.song_index = {}  # song id -> row index di feature_matrix
+        self.song_ids = np.zeros(0, dtype=np.int64)  # row index -> song id
+        # Encoded genre/mood/tempo per row, untuk validasi kandidat
+        self.genre_codes = np.zeros(0, dtype=np.int16)
+        self.mood_codes = np.zeros(0, dtype=np.int16)
+        self.tempo_codes = np.zeros(0, dtype=np.int8)
         
-    def build_encoders(self, songs: List[Dict]):
+        # Numeric audio features (songs.features) dan target block audio per mood
+        self.audio = AudioFeatureStore.empty()
+        self.audio_targets = {}
+        
+        # Vector index; approximate index dipakai untuk kandidat >= ann_threshold
+        self.index_options = dict(index_options or {})
+        self.ann_threshold = self.index_options.get("ann_threshold", 100_000)
+        self.index = None
+    
+    def build_encoders(self, songs: Union[SongCatalog, List[Dict]]):
         """
         Build encoders dari dataset songs
         
         Args:
-            songs: List of all songs
+            songs: SongCatalog atau list of all songs
         """
-        # Build genre encoder
-        unique_genres = sorted(set(song['genre'] for song in songs))
-        self.genre_encoder = {genre: idx for idx, genre in enumerate(unique_genres)}
+        catalog = SongCatalog.from_songs(songs)
+        
+        # Build genre encoder (vocabulary katalog sudah terurut)
+        self.genre_list = list(catalog.vocabularies["genre"])
+        self.genre_encoder = {genre: idx for idx, genre in enumerate(self.genre_list)}
         
         # Build mood encoder
-        unique_moods = sorted(set(song['mood'] for song in songs))
-        self.mood_encoder = {mood: idx for idx, mood in enumerate(unique_moods)}
+        self.mood_list = list(catalog.vocabularies["mood"])
+        self.mood_encoder = {mood: idx for idx, mood in enumerate(self.mood_list)}
+        
+        # Precompute feature matrix untuk seluruh katalog
+        self.build_feature_matrix(catalog)
+    
+    def _code_lookup(self, catalog: SongCatalog, column: str, encoder: Dict[str, int],
+                     default: int, dtype, start: int = 0) -> np.ndarray:
+        """Map code kolom katalog (mulai row start) ke code encoder lewat lookup table per vocabulary"""
+        lookup = np.array([encoder.get(value, default) for value in catalog.vocabularies[column]],
+                          dtype=dtype)
+        if start >= len(catalog):
+            return np.zeros(0, dtype=dtype)
+        return lookup[catalog.codes[column][start:]]
+    
+    def _encode_rows(self, catalog: SongCatalog, audio_block: np.ndarray, start: int = 0):
+        """
+        Encode row catalog[start:] menjadi block feature matrix
+        
+        Args:
+            catalog: SongCatalog
+            audio_block: Block audio yang sudah di-standardisasi dan diskalakan
+            start: Row pertama yang di-encode
+        
+        Returns:
+            Tuple (matrix, mood_codes, genre_codes, tempo_codes)
+        """
+        n_moods = len(self.mood_encoder)
+        n_genres = len(self.genre_encoder)
+        n_audio = audio_block.shape[1]
+        size = len(catalog) - start
+        matrix = np.zeros((size, n_moods + n_genres + 1 + n_audio), dtype=np.float32)
+        
+        mood_codes = self._code_lookup(catalog, "mood", self.mood_encoder, -1, np.int16, start)
+        genre_codes = self._code_lookup(catalog, "genre", self.genre_encoder, -1, np.int16, start)
+        tempo_codes = self._code_lookup(catalog, "tempo", self.tempo_encoder, 1, np.int8, start)
+        
+        if size:
+            rows = np.arange(size)
+            known = mood_codes >= 0
+            matrix[rows[known], mood_codes[known]] = self.weights["mood"]
+            known = genre_codes >= 0
+            matrix[rows[known], n_moods + genre_codes[known]] = self.weights["genre"]
+            matrix[:, n_moods + n_genres] = tempo_codes / 2.0 * self.weights["tempo"]
+        if n_audio:
+            matrix[:, -n_audio:] = audio_block
+        
+        return matrix, mood_codes, genre_codes, tempo_codes
+    
+    def build_feature_matrix(self, songs: Union[SongCatalog, List[Dict]]):
+        """
+        Encode seluruh katalog sekali menjadi matrix float32 beserta norm
+        per baris, sehingga cosine similarity cukup dihitung dengan satu
+        matrix-vector product. Nilai one-hot dan tempo (0, 0.5, 1) exact di
+        float32 dan norm dihitung dalam float64, jadi score identik dengan
+        compute_similarity.
+        
+        Numeric features di songs.features di-parse sekali ke
+        AudioFeatureStore, di-standardisasi dan ditambahkan sebagai block
+        terakhir (tanpa kolom jika tidak ada lagu yang punya features).
+        
+        Args:
+            songs: SongCatalog atau list of all songs (urutan menentukan row index)
+        """
+        catalog = SongCatalog.from_songs(songs)
+        self.audio = AudioFeatureStore.from_values(catalog.strings["features"])
+        n_audio = len(self.audio.columns)
+        audio_block = self.audio.standardized() * np.float32(self._audio_scale())
+        matrix, mood_codes, genre_codes, tempo_codes = self._encode_rows(catalog, audio_block)
+        
+        self.audio_targets = {}
+        if n_audio:
+            # Target audio untuk user profile: rata-rata lagu dengan mood yang sama
+            present = self.audio.present
+            for mood, code in self.mood_encoder.items():
+                members = present & (mood_codes == code)
+                if members.any():
+                    self.audio_targets[mood] = audio_block[members].astype(np.float64).mean(axis=0)
+        
+        self.feature_matrix = matrix
+        self.row_norms = np.linalg.norm(matrix.astype(np.float64), axis=1)
+        self.song_index = catalog.rows
+        self.song_ids = catalog.ids
+        self.genre_codes = genre_codes
+        self.mood_codes = mood_codes
+        self.tempo_codes = tempo_codes
+        self.index = load_or_build_index(matrix, norms=self.row_norms, **self.index_options)
+    
+    def extended(self, catalog: SongCatalog) -> "KNNRecommender":
+        """
+        Recommender baru untuk catalog = katalog recommender ini + row baru
+        di akhir (lihat SongCatalog.extended); recommender ini tidak diubah
+        
+        Row lama tidak di-encode ulang: genre/mood baru ditambahkan di akhir
+        encoder dan kolom one-hot-nya disisipkan sebagai nol ke matrix lama.
+        Statistik standardisasi audio dan target audio per mood tetap dari
+        build penuh terakhir.
+        
+        Args:
+            catalog: SongCatalog lengkap
+        
+        Returns:
+            KNNRecommender
+        """
+        start = len(self.song_ids)
+        if start == 0:
+            recommender = KNNRecommender(self.weights, self.index_options)
+            if len(catalog):
+                recommender.build_encoders(catalog)
+            return recommender
+        
+        recommender = copy.copy(self)
+        new_moods = [mood for mood in catalog.vocabularies["mood"] if mood not in self.mood_encoder]
+        new_genres = [genre for genre in catalog.vocabularies["genre"] if genre not in self.genre_encoder]
+        recommender.mood_list = self.mood_list + new_moods
+        recommender.mood_encoder = {mood: idx for idx, mood in enumerate(recommender.mood_list)}
+        recommender.genre_list = self.genre_list + new_genres
+        recommender.genre_encoder = {genre: idx for idx, genre in enumerate(recommender.genre_list)}
+        
+        # Kolom one-hot baru di akhir block mood dan block genre
+        n_moods = len(self.mood_encoder)
+        new_columns = [n_moods] * len(new_moods) + [n_moods + len(self.genre_encoder)] * len(new_genres)
+        matrix = self.feature_matrix
+        if new_columns:
+            matrix = np.insert(matrix, new_columns, np.float32(0), axis=1)
+        
+        features = catalog.strings["features"]
+        audio_block = self.audio.standardize_many(features[row] for row in range(start, len(catalog)))
+        audio_block *= np.float32(self._audio_scale())
+        block, mood_codes, genre_codes, tempo_codes = recommender._encode_rows(catalog, audio_block, start)
+        
+        recommender.feature_matrix = np.concatenate([matrix, block])
+        recommender.row_norms = np.concatenate([self.row_norms,
+                                                np.linalg.norm(block.astype(np.float64), axis=1)])
+        recommender.song_index = catalog.rows
+        recommender.song_ids = catalog.ids
+        recommender.genre_codes = np.concatenate([self.genre_codes, genre_codes])
+        recommender.mood_codes = np.concatenate([self.mood_codes, mood_codes])
+        recommender.tempo_codes = np.concatenate([self.tempo_codes, tempo_codes])
+        if self.index is None:
+            recommender.index = load_or_build_index(recommender.feature_matrix,
+                                                    norms=recommender.row_norms, **self.index_options)
+        else:
+            recommender.index = self.index.extended(recommender.feature_matrix, recommender.row_norms,
+                                                    new_columns)
+        return recommender
+    
+    @classmethod
+    def from_artifact(cls, artifact, index_options: Optional[Dict] = None) -> "KNNRecommender":
+        """
+        Buat recommender dari CatalogArtifact tanpa encode ulang katalog
+        
+        feature_matrix dan row_norms adalah memmap ke file artifact (dibagi
+        antar worker lewat page cache).
+        
+        Args:
+            artifact: CatalogArtifact
+            index_options: Konfigurasi vector index
+        
+        Returns:
+            KNNRecommender
+        """
+        recommender = cls(artifact.weights, index_options)
+        header = artifact.header
+        recommender.genre_list = list(header["genres"])
+        recommender.genre_encoder = {genre: idx for idx, genre in enumerate(recommender.genre_list)}
+        recommender.mood_list = list(header["moods"])
+        recommender.mood_encoder = {mood: idx for idx, mood in enumerate(recommender.mood_list)}
+        
+        audio = header["audio"]
+        recommender.audio = AudioFeatureStore.from_stats(audio["columns"], audio["mean"], audio["std"])
+        recommender.audio_targets = {mood: np.array(target) for mood, target in audio["targets"].items()}
+        
+        recommender.feature_matrix = artifact.feature_matrix
+        recommender.row_norms = artifact.row_norms
+        recommender.song_index = RowLookup(artifact.ids)
+        recommender.song_ids = artifact.ids
+        recommender.genre_codes = artifact.genre_codes
+        recommender.mood_codes = artifact.mood_codes
+        tempo_lookup = np.array([recommender.tempo_encoder.get(tempo, 1) for tempo in header["tempos"]],
+                                dtype=np.int8)
+        recommender.tempo_codes = tempo_lookup[artifact.tempo_codes] if len(artifact) else \
+            np.zeros(0, dtype=np.int8)
+        recommender.index = load_or_build_index(recommender.feature_matrix, norms=recommender.row_norms,
+                                                **recommender.index_options)
+        return recommender
     
-    def encode_features(self, item: Dict) -> np.ndarray:
+    @classmethod
+    def from_stats(cls, genres: List[str], moods: List[str], audio: AudioFeatureStore,
+                   audio_means: Dict[str, np.ndarray],
+                   weights: Optional[Dict[str, float]] = None) -> "KNNRecommender":
+        """
+        Buat recommender tanpa feature matrix katalog, hanya encoder dan
+        statistik audio, untuk me-ranking kandidat yang di-load per request
+        (lihat recommend_catalog)
+        
+        Args:
+            genres: Vocabulary genre (terurut)
+            moods: Vocabulary mood (terurut)
+            audio: AudioFeatureStore dengan mean/std katalog (from_stats)
+            audio_means: Mood -> rata-rata audio features ter-standardisasi
+                lagu dengan mood tersebut (belum diskalakan bobot audio)
+            weights: Override bobot block
+        
+        Returns:
+            KNNRecommender
+        """
+        recommender = cls(weights)
+        recommender.genre_list = list(genres)
+        recommender.genre_encoder = {genre: idx for idx, genre in enumerate(recommender.genre_list)}
+        recommender.mood_list = list(moods)
+        recommender.mood_encoder = {mood: idx for idx, mood in enumerate(recommender.mood_list)}
+        recommender.audio = audio
+        recommender.audio_targets = {mood: np.asarray(mean) * recommender._audio_scale()
+                                     for mood, mean in audio_means.items()}
+        return recommender
+    
+    def _audio_scale(self) -> float:
+        return self.weights["audio"] / np.sqrt(max(1, len(self.audio.columns)))
+    
+    def encode_features(self, item: Union[Dict, str], mood: Optional[str] = None,
+                        tempo: Optional[str] = None) -> np.ndarray:
         """
         Convert categorical features ke numerical vector
         
+        Block audio: untuk song (dict dengan key 'features') berisi features
+        lagu tersebut yang sudah di-standardisasi; untuk user profile berisi
+        rata-rata audio features lagu dengan mood yang sama.
+        
         Args:
-            item: Song atau user profile dengan genre, mood, tempo
-            
+            item: Song atau user profile dengan genre, mood, tempo;
+                  atau genre string jika mood dan tempo diberikan terpisah
+            mood: Mood (hanya jika item adalah genre string)
+            tempo: Tempo (hanya jika item adalah genre string)
+        
         Returns:
             Feature vector sebagai numpy array
         """
+        features = None
+        is_song = False
+        if isinstance(item, dict):
+            genre, mood, tempo = item['genre'], item['mood'], item['tempo']
+            is_song = 'features' in item
+            features = item.get('features')
+        else:
+            genre = item
+        
         # One-hot encode mood
         mood_vector = np.zeros(len(self.mood_encoder))
-        if item['mood'] in self.mood_encoder:
-            mood_vector[self.mood_encoder[item['mood']]] = 1
+        if mood in self.mood_encoder:
+            mood_vector[self.mood_encoder[mood]] = self.weights["mood"]
         
         # One-hot encode genre
         genre_vector = np.zeros(len(self.genre_encoder))
-        if item['genre'] in self.genre_encoder:
-            genre_vector[self.genre_encoder[item['genre']]] = 1
+        if genre in self.genre_encoder:
+            genre_vector[self.genre_encoder[genre]] = self.weights["genre"]
         
         # Ordinal encode tempo
-        tempo_value = self.tempo_encoder.get(item['tempo'], 1)  # default to medium
-        tempo_vector = np.array([tempo_value / 2.0])  # normalize to 0-1
+        tempo_value = self.tempo_encoder.get(tempo, 1)  # default to medium
+        tempo_vector = np.array([tempo_value / 2.0 * self.weights["tempo"]])  # normalize to 0-1
+        
+        # Standardized audio features
+        if is_song:
+            audio_vector = self.audio.standardize(features) * self._audio_scale()
+        else:
+            audio_vector = self.audio_targets.get(mood, np.zeros(len(self.audio.columns)))
         
         # Concatenate all features
-        feature_vector = np.concatenate([mood_vector, genre_vector, tempo_vector])
+        feature_vector = np.concatenate([mood_vector, genre_vector, tempo_vector, audio_vector])
         
         return feature_vector
     
@@ -66,7 +351,7 @@ class KNNRecommender:
         Args:
             user_vector: User profile feature vector
             song_vector: Song feature vector
-            
+        
         Returns:
             Similarity score (0-1)
         """
@@ -89,6 +374,216 @@ class KNNRecommender:
         
         return float(similarity)
     
+    def candidate_rows(self, candidates: List[Dict]) -> np.ndarray:
+        """
+        Map candidates ke row index di feature_matrix
+        
+        Kandidat yang tidak ada di katalog (atau atributnya berbeda dari
+        yang ter-encode) mendapat row -1.
+        
+        Args:
+            candidates: Filtered songs dari rule engine
+        
+        Returns:
+            Array of row indices (int64)
+        """
+        rows = np.empty(len(candidates), dtype=np.int64)
+        for i, song in enumerate(candidates):
+            row = self.song_index.get(song.get('id'), -1)
+            if row >= 0 and (self.genre_codes[row] != self.genre_encoder.get(song['genre'], -1)
+                             or self.mood_codes[row] != self.mood_encoder.get(song['mood'], -1)
+                             or self.tempo_codes[row] != self.tempo_encoder.get(song['tempo'], 1)):
+                row = -1
+            rows[i] = row
+        return rows
+    
+    def score_candidates(self, user_profile: Dict, candidates: List[Dict]) -> np.ndarray:
+        """
+        Compute cosine similarity user profile terhadap semua candidates
+        dalam satu vectorized pass
+        
+        Args:
+            user_profile: Dict dengan mood, genre, tempo
+            candidates: Filtered songs dari rule engine
+        
+        Returns:
+            Array of similarity scores (0-1), urutan sama dengan candidates
+        """
+        if not candidates:
+            return np.zeros(0)
+        
+        rows = self.candidate_rows(candidates)
+        known = rows >= 0
+        
+        scores = np.zeros(len(candidates))
+        scores[known] = self.score_rows(user_profile, rows[known])
+        
+        # Fallback untuk kandidat di luar katalog: encode on the fly
+        if not known.all():
+            user_vector = self.encode_features(user_profile)
+            for i in np.flatnonzero(~known):
+                scores[i] = self.compute_similarity(user_vector, self.encode_features(candidates[i]))
+        
+        return scores
+    
+    def score_rows(self, user_profile: Dict, rows: np.ndarray) -> np.ndarray:
+        """
+        Compute cosine similarity user profile terhadap row katalog
+        
+        Args:
+            user_profile: Dict dengan mood, genre, tempo
+            rows: Row indices di feature_matrix
+        
+        Returns:
+            Array of similarity scores (0-1), urutan sama dengan rows
+        """
+        user_vector = self.encode_features(user_profile)
+        user_magnitude = np.linalg.norm(user_vector)
+        if user_magnitude == 0 or len(rows) == 0:
+            return np.zeros(len(rows))
+        
+        dot_products = self.feature_matrix[rows] @ user_vector
+        magnitudes = self.row_norms[rows] * user_magnitude
+        scores = np.divide(dot_products, magnitudes,
+                           out=np.zeros(len(rows)), where=magnitudes > 0)
+        
+        return np.clip(scores, 0.0, 1.0)
+    
+    def recommend_rows(self, user_profile: Dict, rows: np.ndarray,
+                       k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k untuk candidates yang diberikan sebagai row indices, tanpa
+        membuat dict per lagu
+        
+        Args:
+            user_profile: Dict dengan mood, genre, tempo
+            rows: Candidate row indices (urutan = prioritas saat score sama)
+            k: Number of recommendations
+        
+        Returns:
+            Tuple (positions, scores): posisi pemenang di dalam rows dan
+            similarity score-nya, urut descending
+        """
+        if self._use_ann(rows):
+            return self._ann_recommend_rows(user_profile, rows, k)
+        
+        scores = self.score_rows(user_profile, rows)
+        positions = self.top_k_indices(scores, k)
+        return positions, scores[positions]
+    
+    def _use_ann(self, rows: np.ndarray) -> bool:
+        return self.index is not None and not self.index.exact and len(rows) >= self.ann_threshold
+    
+    def _ann_recommend_rows(self, user_profile: Dict, rows: np.ndarray,
+                            k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        recommend_rows lewat approximate index: index memilih kandidat
+        top-k di antara rows, lalu score dihitung ulang secara exact
+        """
+        mask = np.zeros(len(self.feature_matrix), dtype=bool)
+        mask[rows] = True
+        found, _ = self.index.search(self.encode_features(user_profile), k, mask)
+        
+        # Posisi row hasil index di dalam rows (untuk tie-break dan return value)
+        sorter = np.argsort(rows, kind="stable")
+        positions = sorter[np.searchsorted(rows, found, sorter=sorter)]
+        scores = self.score_rows(user_profile, found)
+        order = np.lexsort((positions, -scores))
+        return positions[order], scores[order]
+    
+    def recommend_catalog(self, user_profile: Dict, catalog: SongCatalog,
+                          k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k untuk candidates di luar feature_matrix, misalnya hasil query
+        SQL, yang di-encode sekaligus menjadi satu block matrix
+        
+        Args:
+            user_profile: Dict dengan mood, genre, tempo
+            catalog: Candidates sebagai SongCatalog (genre, mood, tempo, features)
+            k: Number of recommendations
+        
+        Returns:
+            Tuple (positions, scores) seperti recommend_rows
+        """
+        user_vector = self.encode_features(user_profile)
+        user_magnitude = np.linalg.norm(user_vector)
+        if user_magnitude == 0 or len(catalog) == 0:
+            scores = np.zeros(len(catalog))
+        else:
+            audio_block = self.audio.standardize_many(catalog.strings["features"]) * \
+                np.float32(self._audio_scale())
+            matrix = self._encode_rows(catalog, audio_block)[0]
+            magnitudes = np.linalg.norm(matrix.astype(np.float64), axis=1) * user_magnitude
+            scores = np.divide(matrix @ user_vector, magnitudes,
+                               out=np.zeros(len(catalog)), where=magnitudes > 0)
+            scores = np.clip(scores, 0.0, 1.0)
+        positions = self.top_k_indices(scores, k)
+        return positions, scores[positions]
+    
+    def recommend_many(self, user_profiles: List[Dict], row_sets: List[np.ndarray],
+                       k: int = 5, max_block: int = 1 << 22) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        recommend_rows untuk banyak user profile sekaligus
+        
+        Profile unik di-encode menjadi satu matrix dan di-score terhadap
+        feature_matrix dengan satu matrix-matrix product (per block profile
+        agar matrix score maksimal max_block elemen). Jika gabungan candidate
+        rows lebih kecil dari katalog, hanya rows tersebut yang di-score.
+        Profile dengan candidate rows >= ann_threshold memakai approximate
+        index (seperti recommend_rows) jika index bukan exact.
+        
+        Args:
+            user_profiles: List of dict dengan mood, genre, tempo
+            row_sets: Candidate row indices per profile
+            k: Number of recommendations
+            max_block: Batas elemen matrix score per block
+        
+        Returns:
+            List of (positions, scores) per profile, sama seperti recommend_rows
+        """
+        results: List[Optional[Tuple[np.ndarray, np.ndarray]]] = [None] * len(user_profiles)
+        columns = {}
+        profile_columns = []
+        exact_profiles = []
+        for i, profile in enumerate(user_profiles):
+            if self._use_ann(row_sets[i]):
+                results[i] = self._ann_recommend_rows(profile, row_sets[i], k)
+                continue
+            key = (profile['genre'], profile['mood'], profile['tempo'])
+            profile_columns.append(columns.setdefault(key, len(columns)))
+            exact_profiles.append(i)
+        
+        if not columns:
+            return results
+        
+        user_matrix = np.array([self.encode_features(genre, mood, tempo)
+                                for genre, mood, tempo in columns])
+        user_magnitudes = np.linalg.norm(user_matrix, axis=1)
+        
+        block = max(1, max_block // max(1, len(self.feature_matrix)))
+        for start in range(0, len(user_matrix), block):
+            members = [(i, column) for i, column in zip(exact_profiles, profile_columns)
+                       if start <= column < start + block]
+            union = None
+            if sum(len(row_sets[i]) for i, _ in members) < len(self.feature_matrix):
+                union = np.unique(np.concatenate([row_sets[i] for i, _ in members]))
+                dot_products = self.feature_matrix[union] @ user_matrix[start:start + block].T
+            else:
+                # (n_songs x block) dot products untuk semua lagu di katalog
+                dot_products = self.feature_matrix @ user_matrix[start:start + block].T
+            
+            for i, column in members:
+                rows = row_sets[i]
+                positions = rows if union is None else np.searchsorted(union, rows)
+                magnitudes = self.row_norms[rows] * user_magnitudes[column]
+                scores = np.divide(dot_products[positions, column - start], magnitudes,
+                                   out=np.zeros(len(rows)), where=magnitudes > 0)
+                scores = np.clip(scores, 0.0, 1.0)
+                positions = self.top_k_indices(scores, k)
+                results[i] = (positions, scores[positions])
+        
+        return results
+    
     def recommend(self, user_profile: Dict, candidates: List[Dict], k: int = 5) -> List[Dict]:
         """
         Find top-k most similar songs
@@ -97,28 +592,52 @@ class KNNRecommender:
             user_profile: Dict dengan mood, genre, tempo
             candidates: Filtered songs dari rule engine
             k: Number of recommendations
-            
+        
         Returns:
             Top-k songs dengan similarity scores
         """
         if not candidates:
             return []
         
-        # Encode user profile
-        user_vector = self.encode_features(user_profile)
+        # Compute similarity untuk semua candidates sekaligus
+        scores = self.score_candidates(user_profile, candidates)
         
-        # Compute similarity untuk setiap candidate
-        scored_songs = []
-        for song in candidates:
-            song_vector = self.encode_features(song)
-            similarity = self.compute_similarity(user_vector, song_vector)
-            
-            song_with_score = song.copy()
-            song_with_score['similarity_score'] = similarity
-            scored_songs.append(song_with_score)
+        # Pilih top-k tanpa sort penuh, copy hanya untuk pemenang
+        recommendations = []
+        for idx in self.top_k_indices(scores, k):
+            song_with_score = candidates[idx].copy()
+            song_with_score['similarity_score'] = float(scores[idx])
+            recommendations.append(song_with_score)
+        
+        return recommendations
+    
+    @staticmethod
+    def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+        """
+        Select index top-k score dalam O(n) dengan argpartition
+        
+        Urutan hasil: score descending, lalu posisi ascending untuk score
+        yang sama (identik dengan stable sort atas seluruh list).
+        
+        Args:
+            scores: Array of scores
+            k: Number of results
+        
+        Returns:
+            Array of indices (maksimal k)
+        """
+        n = len(scores)
+        if k <= 0 or n == 0:
+            return np.empty(0, dtype=np.int64)
         
-        # Sort by similarity score (descending)
-        scored_songs.sort(key=lambda x: x['similarity_score'], reverse=True)
+        if k >= n:
+            winners = np.arange(n)
+        else:
+            kth_score = scores[np.argpartition(-scores, k - 1)[k - 1]]
+            above = np.flatnonzero(scores > kth_score)
+            # Untuk tie di batas, ambil posisi paling awal agar deterministic
+            ties = np.flatnonzero(scores == kth_score)[:k - len(above)]
+            winners = np.concatenate([above, ties])
         
-        # Return top-k
-        return scored_songs[:k]
+        order = np.lexsort((winners, -scores[winners]))
+        return winners[order]
@@ -0,0 +1,326 @@
+"""
+Materialized recommendation table untuk semua kombinasi (mood, genre, tempo)
+"""
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.rule_engine import RuleEngine
+
+
+@dataclass(frozen=True)
+class RecommendationEntry:
+    """
+    Hasil ranking untuk satu kombinasi (mood, genre, tempo)
+    
+    song_ids sudah terurut berdasarkan similarity score (descending), jadi
+    top-k untuk k <= len(song_ids) cukup dengan slicing.
+    """
+    user_profile: Dict[str, str]
+    song_ids: np.ndarray
+    similarity_scores: np.ndarray
+    preliminary_scores: np.ndarray
+    candidates_count: int
+    strict_count: int = 0  # candidates dengan genre AND tempo match
+    
+    def materialize(self, by_id: Dict[int, Dict], k: int) -> List[Dict]:
+        """
+        Buat dict lagu untuk top-k
+        
+        Args:
+            by_id: Mapping song id -> song dari snapshot katalog
+            k: Number of recommendations
+        
+        Returns:
+            List of songs dengan similarity_score dan preliminary_score
+        """
+        songs = []
+        for song_id, similarity, preliminary in zip(self.song_ids[:k].tolist(),
+                                                    self.similarity_scores[:k].tolist(),
+                                                    self.preliminary_scores[:k].tolist()):
+            song = by_id[song_id].copy()
+            song['similarity_score'] = similarity
+            song['preliminary_score'] = preliminary
+            songs.append(song)
+        return songs
+    
+    @property
+    def nbytes(self) -> int:
+        return self.song_ids.nbytes + self.similarity_scores.nbytes + self.preliminary_scores.nbytes
+
+
+def _matches(songs, column: str, values: List[str], rows: np.ndarray) -> np.ndarray:
+    """Boolean mask rows yang value kolomnya ada di values"""
+    codes = [code for code, value in enumerate(songs.vocabularies[column]) if value in values]
+    return np.isin(songs.codes[column][rows], codes)
+
+
+def _target_masks(songs, rule_engine: RuleEngine, key: Tuple,
+                  rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Genre match dan tempo match untuk rows, seperti RuleEngine.select_candidates"""
+    target_genres, target_tempos = rule_engine.target_values(*key)
+    return _matches(songs, "genre", target_genres, rows), _matches(songs, "tempo", target_tempos, rows)
+
+
+def _strict_count(songs, rule_engine: RuleEngine, key: Tuple, rows: np.ndarray) -> int:
+    """
+    Jumlah strict match di rows hasil select_candidates; strict match ada di
+    depan dan relaxed match hanya ditambahkan jika strict match kurang dari
+    MIN_STRICT_CANDIDATES, jadi cukup memeriksa row-row awal
+    """
+    head = rows[:RuleEngine.MIN_STRICT_CANDIDATES]
+    genre_match, tempo_match = _target_masks(songs, rule_engine, key, head)
+    strict = int(np.count_nonzero(genre_match & tempo_match))
+    return len(rows) if strict == RuleEngine.MIN_STRICT_CANDIDATES else strict
+
+
+def compute_entries(snapshot, rule_engine: RuleEngine, keys: List[Tuple],
+                    k: int) -> List[RecommendationEntry]:
+    """
+    Jalankan rule-based filtering dan KNN untuk banyak kombinasi sekaligus
+    
+    Semua user profile di-score bersama dengan satu matrix-matrix product
+    (KNNRecommender.recommend_many).
+    
+    Args:
+        snapshot: CatalogSnapshot
+        rule_engine: RuleEngine
+        keys: List of (mood, genre, tempo); genre/tempo boleh None
+        k: Jumlah lagu yang disimpan per entry
+    
+    Returns:
+        List of RecommendationEntry, urutan sama dengan keys
+    """
+    profiles = []
+    selections = []
+    for mood, genre, tempo in keys:
+        rows, preliminary = rule_engine.select_candidates(mood, genre, tempo, snapshot.index)
+        if len(rows):
+            # Tanpa preferensi user, pakai genre/tempo kandidat pertama
+            genre = genre if genre else snapshot.songs.value('genre', rows[0])
+            tempo = tempo if tempo else snapshot.songs.value('tempo', rows[0])
+        profiles.append({"mood": mood, "genre": genre, "tempo": tempo})
+        selections.append((rows, preliminary))
+    
+    ranked = snapshot.recommender.recommend_many(
+        profiles, [rows for rows, _ in selections], k
+    ) if snapshot.songs else [None] * len(keys)
+    
+    entries = []
+    for key, profile, (rows, preliminary), result in zip(keys, profiles, selections, ranked):
+        if len(rows) == 0:
+            entries.append(RecommendationEntry(
+                user_profile=profile,
+                song_ids=np.zeros(0, dtype=np.int64),
+                similarity_scores=np.zeros(0),
+                preliminary_scores=np.zeros(0),
+                candidates_count=0
+            ))
+            continue
+        
+        positions, scores = result
+        winners = rows[positions]
+        entries.append(RecommendationEntry(
+            user_profile=profile,
+            song_ids=np.asarray(snapshot.recommender.song_ids[winners], dtype=np.int64),
+            similarity_scores=scores,
+            preliminary_scores=preliminary[positions],
+            candidates_count=len(rows),
+            strict_count=_strict_count(snapshot.songs, rule_engine, key, rows)
+        ))
+    
+    return entries
+
+
+def compute_entry(snapshot, rule_engine: RuleEngine, mood: str, genre: Optional[str],
+                  tempo: Optional[str], k: int) -> RecommendationEntry:
+    """
+    Jalankan rule-based filtering dan KNN untuk satu kombinasi
+    
+    Args:
+        snapshot: CatalogSnapshot
+        rule_engine: RuleEngine
+        mood: User's mood
+        genre: Preferred genre (optional)
+        tempo: Preferred tempo (optional)
+        k: Jumlah lagu yang disimpan
+    
+    Returns:
+        RecommendationEntry
+    """
+    return compute_entries(snapshot, rule_engine, [(mood, genre, tempo)], k)[0]
+
+
+class RecommendationTable:
+    """
+    Tabel hasil rekomendasi yang dihitung di muka untuk setiap kombinasi
+    mood x genre (plus None) x tempo (plus None) di katalog
+    """
+    
+    TEMPOS = ("slow", "medium", "fast")
+    
+    def __init__(self, entries: Dict[Tuple, RecommendationEntry], max_k: int,
+                 build_time: float = 0.0, recomputed: Optional[int] = None):
+        self.entries = entries
+        self.max_k = max_k
+        self.build_time = build_time
+        self.recomputed = len(entries) if recomputed is None else recomputed
+    
+    @staticmethod
+    def make_key(mood: str, genre: Optional[str], tempo: Optional[str]) -> Tuple:
+        return (mood, genre or None, tempo or None)
+    
+    @classmethod
+    def build(cls, snapshot, rule_engine: Optional[RuleEngine] = None,
+              max_k: int = 20) -> "RecommendationTable":
+        """
+        Hitung entry untuk semua kombinasi request
+        
+        Args:
+            snapshot: CatalogSnapshot
+            rule_engine: RuleEngine (default: RuleEngine())
+            max_k: Jumlah lagu per entry (batas atas RecommendationRequest.k)
+        
+        Returns:
+            RecommendationTable
+        """
+        rule_engine = rule_engine or RuleEngine()
+        start = time.perf_counter()
+        
+        keys = cls._keys(snapshot)
+        entries = dict(zip(keys, compute_entries(snapshot, rule_engine, keys, max_k)))
+        
+        return cls(entries, max_k, time.perf_counter() - start)
+    
+    def extended(self, snapshot, start: int,
+                 rule_engine: Optional[RuleEngine] = None) -> "RecommendationTable":
+        """
+        Tabel untuk snapshot yang berisi katalog tabel ini ditambah row baru
+        mulai dari start (lihat CatalogSnapshot.extended); tabel ini tidak
+        diubah
+        
+        Row lama tidak di-encode ulang, jadi score lagu lama tidak berubah.
+        Per kombinasi hanya row baru yang cocok dengan targetnya yang di-score,
+        lalu digabung dengan top-k lama (urutan sama seperti top_k_indices:
+        score, lalu strict match dulu, lalu row). Kombinasi dihitung ulang
+        penuh hanya jika candidate set berubah bentuk: strict match melewati
+        MIN_STRICT_CANDIDATES (relaxed match hilang), strict match pertama
+        muncul (profile genre/tempo default berubah), entry lama kosong, atau
+        genre baru.
+        
+        Args:
+            snapshot: CatalogSnapshot hasil extended
+            start: Row pertama lagu baru
+            rule_engine: RuleEngine (default: RuleEngine())
+        
+        Returns:
+            RecommendationTable
+        """
+        rule_engine = rule_engine or RuleEngine()
+        build_start = time.perf_counter()
+        songs = snapshot.songs
+        new_rows = np.arange(start, len(songs))
+        min_strict = RuleEngine.MIN_STRICT_CANDIDATES
+        
+        entries = {}
+        stale = []
+        merges = []
+        for key in self._keys(snapshot):
+            entry = self.entries.get(key)
+            if entry is None or entry.candidates_count == 0:
+                stale.append(key)
+                continue
+            
+            genre_match, tempo_match = _target_masks(songs, rule_engine, key, new_rows)
+            strict_rows = new_rows[genre_match & tempo_match]
+            strict_count = entry.strict_count + len(strict_rows)
+            if entry.strict_count >= min_strict:
+                candidates = strict_rows
+            elif strict_count >= min_strict or (entry.strict_count == 0 and len(strict_rows)):
+                # Relaxed match hilang, atau row pertama (profile default) berubah
+                stale.append(key)
+                continue
+            else:
+                candidates = np.concatenate([strict_rows, new_rows[genre_match ^ tempo_match]])
+            
+            if len(candidates) == 0:
+                entries[key] = entry
+            else:
+                merges.append((key, entry, candidates, strict_count))
+        
+        ranked = snapshot.recommender.recommend_many(
+            [entry.user_profile for _, entry, _, _ in merges],
+            [candidates for _, _, candidates, _ in merges], self.max_k
+        ) if merges else []
+        for (key, entry, candidates, strict_count), (positions, scores) in zip(merges, ranked):
+            entries[key] = self._merge(snapshot, rule_engine, key, entry, candidates,
+                                       positions, scores, strict_count)
+        
+        entries.update(zip(stale, compute_entries(snapshot, rule_engine, stale, self.max_k)))
+        return RecommendationTable(entries, self.max_k, time.perf_counter() - build_start,
+                                   recomputed=len(stale))
+    
+    def _merge(self, snapshot, rule_engine: RuleEngine, key: Tuple, entry: RecommendationEntry,
+               candidates: np.ndarray, positions: np.ndarray, scores: np.ndarray,
+               strict_count: int) -> RecommendationEntry:
+        """Gabungkan top-k lama dengan top-k dari candidate rows baru"""
+        songs = snapshot.songs
+        old_rows = np.array([songs.rows[song_id] for song_id in entry.song_ids.tolist()],
+                            dtype=np.int64)
+        rows = np.concatenate([old_rows, candidates[positions]])
+        similarity = np.concatenate([entry.similarity_scores, scores])
+        
+        genre_match, tempo_match = _target_masks(songs, rule_engine, key, rows)
+        mood_match = _matches(songs, "mood", [key[0]], rows)
+        preliminary = 0.3 * genre_match + 0.2 * tempo_match + 0.5 * mood_match
+        
+        # Urutan candidate: strict match dulu, lalu row ascending
+        order = np.lexsort((rows, ~(genre_match & tempo_match), -similarity))[:self.max_k]
+        return RecommendationEntry(
+            user_profile=entry.user_profile,
+            song_ids=np.asarray(snapshot.recommender.song_ids[rows[order]], dtype=np.int64),
+            similarity_scores=similarity[order],
+            preliminary_scores=preliminary[order],
+            candidates_count=entry.candidates_count + len(candidates),
+            strict_count=strict_count
+        )
+    
+    @classmethod
+    def _keys(cls, snapshot) -> List[Tuple]:
+        """Semua kombinasi request untuk katalog snapshot"""
+        if not snapshot.songs:
+            return []
+        return [cls.make_key(mood, genre, tempo)
+                for mood in RuleEngine.MOOD_RULES
+                for genre in (None,) + tuple(snapshot.genres)
+                for tempo in (None,) + cls.TEMPOS]
+    
+    def lookup(self, mood: str, genre: Optional[str], tempo: Optional[str],
+               k: int) -> Optional[RecommendationEntry]:
+        """
+        Get entry untuk request
+        
+        Returns:
+            Entry, atau None jika kombinasi tidak ada di tabel (misalnya
+            genre di luar katalog) atau k melebihi max_k
+        """
+        if k > self.max_k:
+            return None
+        return self.entries.get(self.make_key(mood, genre, tempo))
+    
+    @property
+    def nbytes(self) -> int:
+        """Perkiraan memori array hasil (tanpa overhead object Python)"""
+        return sum(entry.nbytes for entry in self.entries.values())
+    
+    def stats(self) -> Dict:
+        """Ukuran dan waktu build untuk monitoring"""
+        return {
+            "entries": len(self.entries),
+            "max_k": self.max_k,
+            "memory_kb": round(self.nbytes / 1024, 1),
+            "build_time": round(self.build_time, 3),
+            "recomputed": self.recomputed
+        }
@@ -0,0 +1,151 @@
+"""
+Rate-limit state dan circuit breaker untuk panggilan ke API eksternal
+"""
+import threading
+import time
+from typing import Dict, Optional
+
+
+class RateLimitState:
+    """
+    Shared state rate limit: setelah response 429, semua panggilan
+    ditahan sampai Retry-After lewat
+    """
+    
+    def __init__(self, default_retry_after: float = 60):
+        """
+        Args:
+            default_retry_after: Jeda jika header Retry-After tidak ada/invalid
+        """
+        self.default_retry_after = default_retry_after
+        self.blocked_until = 0.0
+        self.rate_limited_count = 0
+    
+    def note_retry_after(self, retry_after: Optional[str]) -> float:
+        """
+        Catat response 429
+        
+        Args:
+            retry_after: Value header Retry-After (detik)
+        
+        Returns:
+            Jeda yang dipakai dalam detik
+        """
+        try:
+            delay = max(0.0, float(retry_after))
+        except (TypeError, ValueError):
+            delay = self.default_retry_after
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+        self.rate_limited_count += 1
+        return delay
+    
+    def remaining(self) -> float:
+        """Sisa waktu tunggu dalam detik (0 jika tidak dibatasi)"""
+        return max(0.0, self.blocked_until - time.monotonic())
+    
+    def is_limited(self) -> bool:
+        return self.remaining() > 0
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker dengan state closed -> open -> half_open
+    
+    - closed: semua panggilan diizinkan; kegagalan beruntun (error atau
+      panggilan lebih lambat dari slow_call_threshold) dihitung
+    - open: setelah failure_threshold kegagalan, semua panggilan langsung
+      ditolak selama recovery_timeout
+    - half_open: satu panggilan percobaan diizinkan; sukses menutup
+      breaker, gagal membukanya lagi
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30,
+                 slow_call_threshold: float = 2.0):
+        """
+        Args:
+            failure_threshold: Jumlah kegagalan beruntun sebelum open
+            recovery_timeout: Lama state open sebelum percobaan (detik)
+            slow_call_threshold: Panggilan lebih lama dari ini dianggap gagal
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.slow_call_threshold = slow_call_threshold
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuited = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """
+        Cek apakah panggilan boleh dilakukan
+        
+        Returns:
+            False jika breaker open (panggilan harus di-short-circuit)
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.recovery_timeout:
+                    self.short_circuited += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.short_circuited += 1
+                    return False
+                self._probe_in_flight = True
+            
+            return True
+    
+    def record_success(self, duration: float = 0.0):
+        """
+        Catat panggilan yang berhasil
+        
+        Args:
+            duration: Lama panggilan dalam detik
+        """
+        if duration > self.slow_call_threshold:
+            self.record_failure()
+            return
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+    
+    def record_neutral(self):
+        """
+        Catat panggilan yang bukan sukses maupun gagal (misalnya 429)
+        
+        Jumlah kegagalan dan state tidak berubah; hanya slot percobaan
+        half-open yang dilepas.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+    
+    def record_failure(self):
+        """Catat panggilan yang gagal atau terlalu lambat"""
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def stats(self) -> Dict:
+        """State breaker untuk monitoring"""
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "short_circuited": self.short_circuited,
+            "retry_in": round(retry_in, 1)
+        }
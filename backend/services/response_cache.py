@@ -0,0 +1,83 @@
+"""
+Request-level cache untuk hasil /api/recommend
+"""
+from typing import Any, Dict, Hashable, Optional
+
+from services.cache import TTLCache, MISSING
+
+
+class RecommendationCache:
+    """
+    LRU cache response rekomendasi, di-key dengan request yang sudah
+    dinormalisasi dan versi katalog
+    
+    Saat versi katalog berubah seluruh isi cache dibuang, sehingga
+    perubahan tabel songs langsung terlihat.
+    """
+    
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, degraded_ttl: float = 15):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Jumlah response maksimal
+            ttl: TTL response yang enrichment-nya lengkap (detik)
+            degraded_ttl: TTL response yang sebagian preview-nya kosong,
+                misalnya karena Spotify sedang gagal (detik)
+        """
+        self.degraded_ttl = degraded_ttl
+        self.catalog_version = None
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    
+    @staticmethod
+    def make_key(mood: str, genre: Optional[str], tempo: Optional[str], k: int) -> Hashable:
+        """
+        Normalisasi request menjadi cache key
+        
+        Genre/tempo kosong diperlakukan sama dengan None, seperti di
+        RuleEngine.filter_by_mood.
+        """
+        return (mood, genre or None, tempo or None, k)
+    
+    def _sync_version(self, catalog_version: int) -> bool:
+        """
+        Buang isi cache jika katalog lebih baru dari isi cache
+        
+        Returns:
+            False jika catalog_version lebih lama dari versi cache
+            (request lama yang selesai setelah katalog di-reload)
+        """
+        if self.catalog_version is None or catalog_version > self.catalog_version:
+            self.cache.clear()
+            self.catalog_version = catalog_version
+        return catalog_version == self.catalog_version
+    
+    def get(self, catalog_version: int, key: Hashable) -> Any:
+        """
+        Get cached response
+        
+        Returns:
+            Response atau MISSING
+        """
+        if not self._sync_version(catalog_version):
+            return MISSING
+        return self.cache.get(key)
+    
+    def set(self, catalog_version: int, key: Hashable, response: Any, complete: bool = True):
+        """
+        Simpan response
+        
+        Args:
+            catalog_version: Versi katalog saat response dibuat
+            key: Cache key dari make_key
+            response: Response yang di-cache
+            complete: False jika enrichment tidak lengkap (TTL lebih pendek)
+        """
+        if self._sync_version(catalog_version):
+            self.cache.set(key, response, ttl=None if complete else self.degraded_ttl)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss statistics"""
+        stats = self.cache.stats()
+        stats["catalog_version"] = self.catalog_version
+        return stats
@@ -1,12 +1,133 @@
 """
 Rule-based engine untuk filtering lagu berdasarkan mood
 """
-from typing import List, Dict, Optional
+import numpy as np
+from typing import List, Dict, Optional, Tuple
+
+
+class CatalogIndex:
+    """
+    Inverted index dari genre, tempo dan mood ke packed bitset atas katalog
+    
+    Bit ke-i pada bitset sebuah value bernilai 1 jika lagu ke-i pada
+    katalog memiliki value tersebut.
+    """
+    
+    FIELDS = ("genre", "tempo", "mood")
+    
+    def __init__(self, songs: List[Dict]):
+        """
+        Build index dari list songs
+        
+        Args:
+            songs: All available songs (urutan menentukan row index)
+        """
+        self.songs = songs
+        self.size = len(songs)
+        self.bitsets = {field: self._build_field(songs, field) for field in self.FIELDS}
+    
+    @classmethod
+    def from_codes(cls, songs, columns: Dict[str, Tuple[np.ndarray, List[str]]]) -> "CatalogIndex":
+        """
+        Build index dari kolom yang sudah di-encode, tanpa membaca song dict
+        
+        Args:
+            songs: Sequence songs (disimpan sebagai index.songs)
+            columns: field -> (codes per row, vocabulary code -> value)
+        
+        Returns:
+            CatalogIndex
+        """
+        index = cls.__new__(cls)
+        index.songs = songs
+        index.size = len(songs)
+        index.bitsets = {}
+        for field in cls.FIELDS:
+            codes, vocab = columns[field]
+            counts = np.bincount(codes, minlength=len(vocab)) if len(codes) else np.zeros(len(vocab))
+            index.bitsets[field] = {
+                value: np.packbits(codes == code)
+                for code, value in enumerate(vocab) if counts[code]
+            }
+        return index
+    
+    def extended(self, songs, columns: Dict[str, Tuple[np.ndarray, List[str]]]) -> "CatalogIndex":
+        """
+        Index baru untuk songs = katalog index ini + row baru di akhir
+        
+        Byte bitset yang sudah penuh di-copy apa adanya; hanya bit row baru
+        (dan byte terakhir yang belum penuh) yang dihitung. Index ini tidak
+        diubah.
+        
+        Args:
+            songs: Sequence songs baru (row lama di awal)
+            columns: field -> (codes row baru saja, vocabulary)
+        
+        Returns:
+            CatalogIndex
+        """
+        index = CatalogIndex.__new__(CatalogIndex)
+        index.songs = songs
+        index.size = len(songs)
+        index.bitsets = {}
+        
+        keep, tail = divmod(self.size, 8)
+        empty = self.empty()
+        for field in self.FIELDS:
+            codes, vocab = columns[field]
+            bitsets = {}
+            for code, value in enumerate(vocab):
+                old = self.bitsets[field].get(value, empty)
+                added = codes == code
+                if old is empty and not added.any():
+                    continue
+                tail_bits = np.unpackbits(old[keep:keep + 1], count=tail).astype(bool)
+                bitsets[value] = np.concatenate([old[:keep],
+                                                 np.packbits(np.concatenate([tail_bits, added]))])
+            index.bitsets[field] = bitsets
+        return index
+    
+    def _build_field(self, songs: List[Dict], field: str) -> Dict[str, np.ndarray]:
+        codes = {}
+        column = np.fromiter(
+            (codes.setdefault(song[field], len(codes)) for song in songs),
+            dtype=np.int32, count=len(songs)
+        )
+        return {value: np.packbits(column == code) for value, code in codes.items()}
+    
+    def empty(self) -> np.ndarray:
+        """Bitset kosong seukuran katalog"""
+        return np.zeros((self.size + 7) // 8, dtype=np.uint8)
+    
+    def lookup(self, field: str, values: List[str]) -> np.ndarray:
+        """
+        Bitset lagu yang field-nya salah satu dari values (OR)
+        
+        Args:
+            field: genre, tempo atau mood
+            values: Values yang dicari
+            
+        Returns:
+            Packed bitset
+        """
+        result = self.empty()
+        for value in values:
+            bits = self.bitsets[field].get(value)
+            if bits is not None:
+                result |= bits
+        return result
+    
+    def unpack(self, bits: np.ndarray) -> np.ndarray:
+        """Convert packed bitset ke boolean mask"""
+        return np.unpackbits(bits, count=self.size).astype(bool)
 
 
 class RuleEngine:
     """Engine untuk memfilter lagu berdasarkan aturan mood"""
     
+    # Kurang dari ini strict match, filter di-relax ke genre OR tempo
+    MIN_STRICT_CANDIDATES = 10
+    
     MOOD_RULES = {
         "sedih": {
             "preferred_genres": ["indie", "ballad"],
@@ -45,8 +166,73 @@ class RuleEngine:
         
         return self.MOOD_RULES[mood]
     
+    def target_values(self, mood: str, genre: Optional[str],
+                      tempo: Optional[str]) -> Tuple[List[str], List[str]]:
+        """
+        Genre dan tempo yang dicocokkan untuk request; preferensi user
+        menggantikan preferensi mood
+        
+        Returns:
+            Tuple (target_genres, target_tempos)
+        """
+        preferences = self.get_mood_preferences(mood)
+        target_genres = [genre] if genre else preferences["preferred_genres"]
+        target_tempos = [tempo] if tempo else preferences["preferred_tempo"]
+        return target_genres, target_tempos
+    
+    def build_index(self, songs: List[Dict]) -> CatalogIndex:
+        """
+        Build inverted index untuk katalog; berikan ke filter_by_mood agar
+        tidak di-build ulang setiap panggilan. Index harus di-build ulang
+        jika songs diubah.
+        
+        Args:
+            songs: All available songs
+            
+        Returns:
+            CatalogIndex yang baru dibuat
+        """
+        return CatalogIndex(songs)
+    
+    def select_candidates(self, mood: str, genre: Optional[str], tempo: Optional[str],
+                          index: CatalogIndex) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pilih row candidates dengan set algebra atas bitset index
+        
+        Args:
+            mood: User's mood
+            genre: User's preferred genre (optional)
+            tempo: User's preferred tempo (optional)
+            index: CatalogIndex katalog
+            
+        Returns:
+            Tuple (rows, preliminary_scores) dengan urutan yang sama seperti
+            filter_by_mood: strict matches dulu, lalu relaxed matches
+        """
+        target_genres, target_tempos = self.target_values(mood, genre, tempo)
+        
+        genre_bits = index.lookup("genre", target_genres)
+        tempo_bits = index.lookup("tempo", target_tempos)
+        
+        # First pass: strict filtering (genre AND tempo match)
+        rows = np.flatnonzero(index.unpack(genre_bits & tempo_bits))
+        
+        # Second pass: relax to genre OR tempo match (tanpa yang sudah strict)
+        if len(rows) < self.MIN_STRICT_CANDIDATES:
+            relaxed = np.flatnonzero(index.unpack(genre_bits ^ tempo_bits))
+            rows = np.concatenate([rows, relaxed])
+        
+        genre_match = index.unpack(genre_bits)[rows]
+        tempo_match = index.unpack(tempo_bits)[rows]
+        mood_match = index.unpack(index.lookup("mood", [mood]))[rows]
+        
+        # Preliminary score: genre 0.3 + tempo 0.2 + mood 0.5
+        scores = 0.3 * genre_match + 0.2 * tempo_match + 0.5 * mood_match
+        
+        return rows, scores
+    
     def filter_by_mood(self, mood: str, genre: Optional[str], tempo: Optional[str], 
-                      songs: List[Dict]) -> List[Dict]:
+                      songs: List[Dict], index: Optional[CatalogIndex] = None) -> List[Dict]:
         """
         Filter songs berdasarkan mood rules
         
@@ -55,6 +241,8 @@ class RuleEngine:
             genre: User's preferred genre (optional, overrides mood preferences)
             tempo: User's preferred tempo (optional, overrides mood preferences)
             songs: All available songs
+            index: CatalogIndex dari build_index(songs); tanpa index (atau
+                index untuk list lain) index sementara di-build per panggilan
             
         Returns:
             Filtered candidate songs dengan preliminary scores
@@ -62,59 +250,15 @@ class RuleEngine:
         if not songs:
             return []
         
-        # Get mood preferences
-        preferences = self.get_mood_preferences(mood)
+        if index is None or index.songs is not songs:
+            index = CatalogIndex(songs)
         
-        # Determine which genres and tempos to filter by
-        target_genres = [genre] if genre else preferences["preferred_genres"]
-        target_tempos = [tempo] if tempo else preferences["preferred_tempo"]
+        rows, scores = self.select_candidates(mood, genre, tempo, index)
         
-        # First pass: strict filtering (genre AND tempo match)
         candidates = []
-        for song in songs:
-            score = 0.0
-            genre_match = song['genre'] in target_genres
-            tempo_match = song['tempo'] in target_tempos
-            mood_match = song['mood'] == mood
-            
-            if genre_match and tempo_match:
-                # Calculate preliminary score
-                if genre_match:
-                    score += 0.3
-                if tempo_match:
-                    score += 0.2
-                if mood_match:
-                    score += 0.5
-                
-                song_with_score = song.copy()
-                song_with_score['preliminary_score'] = score
-                candidates.append(song_with_score)
-        
-        # If we have enough candidates, return them
-        if len(candidates) >= 10:
-            return candidates
-        
-        # Second pass: relax to genre OR tempo match
-        for song in songs:
-            # Skip if already in candidates
-            if any(c['id'] == song['id'] for c in candidates):
-                continue
-            
-            score = 0.0
-            genre_match = song['genre'] in target_genres
-            tempo_match = song['tempo'] in target_tempos
-            mood_match = song['mood'] == mood
-            
-            if genre_match or tempo_match:
-                if genre_match:
-                    score += 0.3
-                if tempo_match:
-                    score += 0.2
-                if mood_match:
-                    score += 0.5
-                
-                song_with_score = song.copy()
-                song_with_score['preliminary_score'] = score
-                candidates.append(song_with_score)
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            song_with_score = songs[row].copy()
+            song_with_score['preliminary_score'] = score
+            candidates.append(song_with_score)
         
         return candidates
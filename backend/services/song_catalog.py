@@ -0,0 +1,283 @@
+"""
+Columnar song store untuk hot path rekomendasi
+"""
+import json
+import sys
+from collections.abc import Mapping, Sequence
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+# Kolom string yang disimpan per row
+STRING_COLUMNS = ("title", "artist", "spotify_id", "features", "created_at")
+
+# Kolom kategorikal yang di-encode menjadi code + vocabulary
+CATEGORICAL_COLUMNS = ("genre", "mood", "tempo")
+
+
+class RowLookup(Mapping):
+    """Mapping song id -> row index dengan binary search atas kolom ids"""
+    
+    def __init__(self, ids: np.ndarray):
+        self.ids = ids
+        if len(ids) > 1 and not np.all(ids[1:] > ids[:-1]):
+            self.order = np.argsort(ids, kind="stable")
+            self.sorted_ids = ids[self.order]
+        else:
+            self.order = None
+            self.sorted_ids = ids
+    
+    def __getitem__(self, song_id) -> int:
+        if not isinstance(song_id, (int, np.integer)) or isinstance(song_id, bool):
+            raise KeyError(song_id)
+        pos = int(np.searchsorted(self.sorted_ids, song_id))
+        if pos >= len(self.sorted_ids) or self.sorted_ids[pos] != song_id:
+            raise KeyError(song_id)
+        return int(self.order[pos]) if self.order is not None else pos
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self):
+        return (int(song_id) for song_id in self.ids)
+
+
+class SongLookup(Mapping):
+    """Mapping song id -> song dict yang dibuat saat diakses (pengganti by_id dict)"""
+    
+    def __init__(self, catalog: "SongCatalog"):
+        self.catalog = catalog
+    
+    def __getitem__(self, song_id) -> Dict:
+        return self.catalog.song(self.catalog.rows[song_id])
+    
+    def __len__(self) -> int:
+        return len(self.catalog)
+    
+    def __iter__(self):
+        return iter(self.catalog.rows)
+
+
+class AppendedColumn(Sequence):
+    """Kolom string base (misalnya string table artifact) + row tambahan di akhir"""
+    
+    def __init__(self, base: Sequence, extra: np.ndarray):
+        self.base = base
+        self.extra = extra
+        self.split = len(base)
+    
+    def __len__(self) -> int:
+        return self.split + len(self.extra)
+    
+    def __getitem__(self, row):
+        if row < self.split:
+            return self.base[row]
+        return self.extra[row - self.split]
+
+
+def _append_column(column: Sequence, values: np.ndarray) -> Sequence:
+    """Column baru berisi column + values; column lama tidak diubah"""
+    if isinstance(column, np.ndarray):
+        return np.concatenate([column, values])
+    if isinstance(column, AppendedColumn):
+        return AppendedColumn(column.base, np.concatenate([column.extra, values]))
+    return AppendedColumn(column, values)
+
+
+def _encode(values: Iterable[str], dtype=np.int16):
+    """Sorted vocabulary dan code per row"""
+    values = list(values)
+    vocab = sorted(set(values))
+    lookup = {value: code for code, value in enumerate(vocab)}
+    return vocab, np.fromiter((lookup[value] for value in values), dtype=dtype, count=len(values))
+
+
+def _intern(values: Iterable[Optional[str]]) -> np.ndarray:
+    """Object array string yang di-intern (artist/genre berulang hanya disimpan sekali)"""
+    values = [sys.intern(value) if isinstance(value, str) else value for value in values]
+    column = np.empty(len(values), dtype=object)
+    column[:] = values
+    return column
+
+
+def _string_columns(columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+    """Object array per kolom string; features disimpan sebagai JSON string"""
+    size = len(columns["id"])
+    strings = {}
+    for column in STRING_COLUMNS:
+        values = columns.get(column) or [None] * size
+        if column == "features":
+            values = [json.dumps(value) if isinstance(value, dict) and value else
+                      value if isinstance(value, str) and value else None
+                      for value in values]
+            column_values = np.empty(size, dtype=object)
+            column_values[:] = values
+            strings[column] = column_values
+        else:
+            strings[column] = _intern(values)
+    return strings
+
+
+class SongCatalog(Sequence):
+    """
+    Katalog lagu dalam bentuk kolom
+    
+    - ids: int64 per row
+    - genre/mood/tempo: code kecil (int16) per row + vocabulary terurut
+    - title, artist, spotify_id, features (JSON mentah), created_at:
+      object array string yang di-intern, atau string table artifact
+    
+    Rule engine dan KNN bekerja dengan row index; song dict hanya dibuat
+    lewat song(row) / catalog[row] untuk hasil akhir. SongCatalog tetap
+    berperilaku sebagai Sequence[Dict] untuk kode yang membutuhkan dict.
+    """
+    
+    def __init__(self, ids: np.ndarray, codes: Dict[str, np.ndarray],
+                 vocabularies: Dict[str, List[str]], strings: Dict[str, Sequence]):
+        """
+        Args:
+            ids: Song id per row
+            codes: Kolom kategorikal -> code per row
+            vocabularies: Kolom kategorikal -> list value (index = code)
+            strings: Kolom string -> sequence value per row
+        """
+        self.ids = ids
+        self.codes = codes
+        self.vocabularies = vocabularies
+        self.strings = strings
+        self.rows = RowLookup(ids)
+        self.by_id = SongLookup(self)
+    
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence]) -> "SongCatalog":
+        """
+        Build dari kolom mentah, misalnya Database.get_song_columns()
+        
+        Args:
+            columns: Nama kolom -> list value per row (features boleh
+                berupa JSON string, dict atau None)
+        
+        Returns:
+            SongCatalog
+        """
+        codes = {}
+        vocabularies = {}
+        for column in CATEGORICAL_COLUMNS:
+            vocabularies[column], codes[column] = _encode(columns[column])
+        
+        return cls(np.asarray(columns["id"], dtype=np.int64), codes, vocabularies,
+                   _string_columns(columns))
+        
+    def extended(self, columns: Dict[str, Sequence]) -> "SongCatalog":
+        """
+        Katalog baru dengan row tambahan di akhir; katalog ini tidak diubah
+        
+        Row lama tidak di-encode ulang. Value kategorikal baru ditambahkan
+        di akhir vocabulary (code lama tetap berlaku), sehingga vocabulary
+        hasil extended tidak lagi harus terurut.
+        
+        Args:
+            columns: Kolom mentah row baru (format from_columns)
+        
+        Returns:
+            SongCatalog
+        """
+        codes = {}
+        vocabularies = {}
+        for column in CATEGORICAL_COLUMNS:
+            vocab = list(self.vocabularies[column])
+            lookup = {value: code for code, value in enumerate(vocab)}
+            for value in columns[column]:
+                if value not in lookup:
+                    lookup[value] = len(vocab)
+                    vocab.append(value)
+            new_codes = np.fromiter((lookup[value] for value in columns[column]),
+                                    dtype=self.codes[column].dtype, count=len(columns[column]))
+            codes[column] = np.concatenate([self.codes[column], new_codes])
+            vocabularies[column] = vocab
+        
+        strings = {column: _append_column(self.strings[column], values)
+                   for column, values in _string_columns(columns).items()}
+        ids = np.concatenate([self.ids, np.asarray(columns["id"], dtype=np.int64)])
+        return SongCatalog(ids, codes, vocabularies, strings)
+    
+    @classmethod
+    def from_songs(cls, songs: Sequence[Dict]) -> "SongCatalog":
+        """Build dari list of song dicts (format Database.get_all_songs)"""
+        if isinstance(songs, SongCatalog):
+            return songs
+        columns = {column: [song.get(column) for song in songs]
+                   for column in ("id",) + CATEGORICAL_COLUMNS + STRING_COLUMNS}
+        return cls.from_columns(columns)
+    
+    @classmethod
+    def from_artifact(cls, artifact) -> "SongCatalog":
+        """
+        SongCatalog di atas CatalogArtifact; kolom tetap berupa memmap
+        
+        Args:
+            artifact: CatalogArtifact
+        """
+        header = artifact.header
+        return cls(
+            artifact.ids,
+            {"genre": artifact.genre_codes, "mood": artifact.mood_codes,
+             "tempo": artifact.tempo_codes},
+            {"genre": list(header["genres"]), "mood": list(header["moods"]),
+             "tempo": list(header["tempos"])},
+            {column: artifact.string_column(column) for column in STRING_COLUMNS},
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self.song(i) for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return self.song(int(row))
+    
+    def value(self, column: str, row: int):
+        """Value satu kolom (kategorikal atau string) pada row"""
+        if column in self.codes:
+            return self.vocabularies[column][self.codes[column][row]]
+        return self.strings[column][row]
+    
+    def song(self, row: int) -> Dict:
+        """
+        Materialize satu row menjadi song dict (format Database.get_all_songs)
+        """
+        features = self.strings["features"][row]
+        if features:
+            try:
+                features = json.loads(features)
+            except ValueError:
+                features = None
+        return {
+            "id": int(self.ids[row]),
+            "title": self.strings["title"][row],
+            "artist": self.strings["artist"][row],
+            "genre": self.vocabularies["genre"][self.codes["genre"][row]],
+            "mood": self.vocabularies["mood"][self.codes["mood"][row]],
+            "tempo": self.vocabularies["tempo"][self.codes["tempo"][row]],
+            "spotify_id": self.strings["spotify_id"][row],
+            "features": features or None,
+            "created_at": self.strings["created_at"][row],
+        }
+    
+    def songs(self, rows: Iterable[int]) -> List[Dict]:
+        """Materialize beberapa row"""
+        return [self.song(row) for row in rows]
+    
+    @property
+    def genres(self) -> List[str]:
+        return sorted(self.vocabularies["genre"])
+    
+    @property
+    def nbytes(self) -> int:
+        """Perkiraan memori kolom numeric (string object tidak dihitung)"""
+        return self.ids.nbytes + sum(codes.nbytes for codes in self.codes.values())
@@ -1,11 +1,17 @@
 """
 Spotify Web API client untuk metadata dan preview
 """
+import asyncio
+import httpx
 import requests
+import threading
 import time
-from typing import Optional, Dict
+from typing import Optional, Dict, List
 from datetime import datetime, timedelta
 
+from services.cache import TTLCache, SQLiteCacheStore, MISSING
+from services.resilience import RateLimitState, CircuitBreaker
+
 
 class SpotifyClient:
     """
@@ -14,20 +20,97 @@ class SpotifyClient:
     
     AUTH_URL = "https://accounts.spotify.com/api/token"
     API_BASE_URL = "https://api.spotify.com/v1"
+    MAX_IDS_PER_REQUEST = 50  # batas endpoint /v1/tracks?ids=
+    CACHE_WRITE_BEHIND = False  # True: persistent cache ditulis lewat flush()
     
-    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None):
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 cache_size: int = 2048, cache_ttl: float = 24 * 3600,
+                 negative_ttl: float = 300, cache_path: Optional[str] = None,
+                 timeout: float = 10, breaker: Optional[CircuitBreaker] = None):
         """
         Initialize Spotify client
         
         Args:
             client_id: Spotify Client ID
             client_secret: Spotify Client Secret
+            cache_size: Jumlah track metadata maksimal di memory cache
+            cache_ttl: TTL metadata track dalam detik
+            negative_ttl: TTL untuk hasil negatif (404 / tanpa preview)
+            cache_path: Path SQLite untuk persistent cache (optional)
+            timeout: Timeout per request dalam detik
+            breaker: Circuit breaker (default: CircuitBreaker())
         """
         self.client_id = client_id
         self.client_secret = client_secret
         self.access_token = None
         self.token_expires_at = None
         self.enabled = bool(client_id and client_secret)
+        
+        # Cache metadata track: memory LRU + optional persistent tier
+        self.negative_ttl = negative_ttl
+        store = None
+        if cache_path and self.enabled:
+            store = SQLiteCacheStore(cache_path, table="spotify_tracks")
+        self.track_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl, store=store,
+                                    write_behind=self.CACHE_WRITE_BEHIND)
+        
+        # Session agar koneksi TCP+TLS dipakai ulang (keep-alive)
+        self.session = self._create_session()
+        
+        # Hanya satu thread yang me-refresh token pada satu waktu
+        self._token_lock = threading.Lock()
+        
+        # Shared rate limit state dan circuit breaker untuk semua panggilan
+        self.timeout = timeout
+        self.rate_limit = RateLimitState()
+        self.breaker = breaker or CircuitBreaker()
+    
+    def _before_call(self) -> bool:
+        """
+        Cek rate limit dan circuit breaker sebelum memanggil Spotify
+        
+        Returns:
+            False jika panggilan harus di-short-circuit
+        """
+        if self.rate_limit.is_limited():
+            return False
+        return self.breaker.allow_request()
+    
+    def _after_call(self, response, duration: float):
+        """Update rate limit state dan circuit breaker dari response"""
+        if response.status_code == 429:
+            # Throttling bukan bukti Spotify sehat: jangan reset failure count
+            self.rate_limit.note_retry_after(response.headers.get("Retry-After"))
+            self.breaker.record_neutral()
+        elif response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success(duration)
+    
+    def _send(self, method: str, url: str, **kwargs):
+        """
+        Kirim request (sync) lewat session, rate limit dan circuit breaker
+        
+        Returns:
+            Response, atau None jika di-short-circuit
+        """
+        if not self._before_call():
+            return None
+        
+        start = time.monotonic()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self._after_call(response, time.monotonic() - start)
+        return response
+    
+    def resilience_stats(self) -> Dict:
+        """State circuit breaker dan rate limit untuk monitoring"""
+        stats = self.breaker.stats()
+        stats["rate_limited_for"] = round(self.rate_limit.remaining(), 1)
+        return stats
     
     def get_access_token(self) -> Optional[str]:
         """
@@ -41,36 +124,60 @@ class SpotifyClient:
             return None
         
         # Check if we have a valid cached token
-        if self.access_token and self.token_expires_at:
-            if datetime.now() < self.token_expires_at:
-                return self.access_token
+        if self._has_valid_token():
+            return self.access_token
         
-        # Request new token
-        try:
-            response = requests.post(
-                self.AUTH_URL,
-                data={
-                    "grant_type": "client_credentials"
-                },
-                auth=(self.client_id, self.client_secret),
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.access_token = data["access_token"]
-                expires_in = data.get("expires_in", 3600)  # default 1 hour
-                
-                # Set expiration time (subtract 60 seconds for safety)
-                self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - 60)
-                
+        with self._token_lock:
+            # Thread lain mungkin sudah refresh selama kita menunggu lock
+            if self._has_valid_token():
                 return self.access_token
-            else:
-                print(f"Failed to get Spotify access token: {response.status_code}")
+            
+            # Request new token
+            try:
+                response = self._send(
+                    "POST",
+                    self.AUTH_URL,
+                    data={
+                        "grant_type": "client_credentials"
+                    },
+                    auth=(self.client_id, self.client_secret)
+                )
+                if response is None:
+                    return None
+                return self._handle_token_response(response)
+                    
+            except Exception as e:
+                print(f"Error getting Spotify access token: {e}")
                 return None
-                
-        except Exception as e:
-            print(f"Error getting Spotify access token: {e}")
+    
+    def _has_valid_token(self) -> bool:
+        """Cek apakah cached token masih berlaku"""
+        return bool(self.access_token and self.token_expires_at
+                    and datetime.now() < self.token_expires_at)
+    
+    def _handle_token_response(self, response) -> Optional[str]:
+        """
+        Simpan token dari response token endpoint
+        
+        Args:
+            response: requests/httpx response dari AUTH_URL
+            
+        Returns:
+            Access token atau None jika gagal
+        """
+        if response.status_code == 200:
+            data = response.json()
+            self.access_token = data["access_token"]
+            expires_in = data.get("expires_in", 3600)  # default 1 hour
+            
+            # Set expiration time (subtract 60 seconds for safety; token
+            # berumur pendek cukup dikurangi setengah umurnya)
+            margin = min(60, expires_in / 2)
+            self.token_expires_at = datetime.now() + timedelta(seconds=expires_in - margin)
+            
+            return self.access_token
+        else:
+            print(f"Failed to get Spotify access token: {response.status_code}")
             return None
     
     def get_track_preview(self, spotify_id: str) -> Optional[Dict]:
@@ -86,55 +193,186 @@ class SpotifyClient:
         if not self.enabled:
             return None
         
+        cached = self.track_cache.get(spotify_id)
+        if cached is not MISSING:
+            return cached
+        
         token = self.get_access_token()
         if not token:
             return None
         
         try:
-            response = requests.get(
+            response = self._send(
+                "GET",
                 f"{self.API_BASE_URL}/tracks/{spotify_id}",
                 headers={
                     "Authorization": f"Bearer {token}"
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Extract preview URL
-                preview_url = data.get("preview_url")
-                
-                # Extract cover image (largest available)
-                cover_url = None
-                if data.get("album") and data["album"].get("images"):
-                    images = data["album"]["images"]
-                    if images:
-                        cover_url = images[0]["url"]  # First image is usually largest
-                
-                # Extract duration
-                duration_ms = data.get("duration_ms", 0)
-                
-                return {
-                    "preview_url": preview_url,
-                    "cover_url": cover_url,
-                    "duration_ms": duration_ms
                 }
-            
-            elif response.status_code == 429:
-                # Rate limited
-                retry_after = int(response.headers.get("Retry-After", 60))
-                print(f"Spotify rate limited. Retry after {retry_after} seconds")
-                return None
-            
-            else:
-                print(f"Failed to get track from Spotify: {response.status_code}")
+            )
+            if response is None:
                 return None
+            return self._handle_track_response(spotify_id, response)
                 
         except Exception as e:
             print(f"Error getting track from Spotify: {e}")
             return None
     
+    def _handle_track_response(self, spotify_id: str, response) -> Optional[Dict]:
+        """
+        Proses response /tracks/{id} dan update cache
+        
+        Args:
+            spotify_id: Spotify track ID
+            response: requests/httpx response
+            
+        Returns:
+            Dict preview atau None
+        """
+        if response.status_code == 200:
+            track = self._parse_track(response.json())
+            self._cache_track(spotify_id, track)
+            return track
+        
+        elif response.status_code == 404:
+            # Track tidak ada: cache negatif sebentar
+            self._cache_track(spotify_id, None)
+            return None
+        
+        elif response.status_code == 429:
+            # Rate limited: semua panggilan ditahan sampai Retry-After lewat
+            print(f"Spotify rate limited. Retry after {self.rate_limit.remaining():.0f} seconds")
+            return None
+        
+        else:
+            print(f"Failed to get track from Spotify: {response.status_code}")
+            return None
+    
+    def get_tracks_preview(self, spotify_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get preview URL and metadata untuk banyak track sekaligus
+        
+        Memakai endpoint batch /v1/tracks?ids= (maksimal 50 ID per call).
+        
+        Args:
+            spotify_ids: List of Spotify track IDs (duplikat diabaikan)
+            
+        Returns:
+            Dict spotify_id -> dict preview (seperti get_track_preview) atau
+            None jika track tidak ditemukan / request gagal
+        """
+        unique_ids = list(dict.fromkeys(i for i in spotify_ids if i))
+        results = {spotify_id: None for spotify_id in unique_ids}
+        
+        if not self.enabled or not unique_ids:
+            return results
+        
+        cached = self.track_cache.get_many(unique_ids)
+        results.update(cached)
+        missing_ids = [i for i in unique_ids if i not in cached]
+        if not missing_ids:
+            return results
+        
+        token = self.get_access_token()
+        if not token:
+            return results
+        
+        for chunk in self._chunks(missing_ids):
+            try:
+                response = self._send(
+                    "GET",
+                    f"{self.API_BASE_URL}/tracks",
+                    headers={
+                        "Authorization": f"Bearer {token}"
+                    },
+                    params={
+                        "ids": ",".join(chunk)
+                    }
+                )
+                if response is None or not self._handle_tracks_response(chunk, response, results):
+                    break
+                    
+            except Exception as e:
+                print(f"Error getting tracks from Spotify: {e}")
+        
+        return results
+    
+    def _chunks(self, spotify_ids: List[str]) -> List[List[str]]:
+        """Pecah ID menjadi chunk sesuai batas endpoint batch"""
+        step = self.MAX_IDS_PER_REQUEST
+        return [spotify_ids[start:start + step] for start in range(0, len(spotify_ids), step)]
+    
+    def _handle_tracks_response(self, chunk: List[str], response,
+                                results: Dict[str, Optional[Dict]]) -> bool:
+        """
+        Proses response /tracks?ids= ke results dan update cache
+        
+        Args:
+            chunk: ID yang diminta pada request ini
+            response: requests/httpx response
+            results: Dict hasil yang di-update in place
+            
+        Returns:
+            False jika rate limited (chunk berikutnya tidak perlu dicoba)
+        """
+        if response.status_code == 200:
+            # Spotify mengembalikan null untuk ID yang tidak dikenal
+            for spotify_id, track in zip(chunk, response.json().get("tracks", [])):
+                results[spotify_id] = self._parse_track(track) if track else None
+                self._cache_track(spotify_id, results[spotify_id])
+        
+        elif response.status_code == 429:
+            # Rate limited: semua panggilan ditahan sampai Retry-After lewat
+            print(f"Spotify rate limited. Retry after {self.rate_limit.remaining():.0f} seconds")
+            return False
+        
+        else:
+            print(f"Failed to get tracks from Spotify: {response.status_code}")
+        
+        return True
+    
+    def _cache_track(self, spotify_id: str, track: Optional[Dict]):
+        """
+        Simpan hasil lookup ke cache; hasil negatif (track tidak ada atau
+        tanpa preview) memakai negative_ttl yang lebih pendek
+        """
+        if track is None or not track.get("preview_url"):
+            self.track_cache.set(spotify_id, track, ttl=self.negative_ttl)
+        else:
+            self.track_cache.set(spotify_id, track)
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss statistics untuk track metadata cache"""
+        return self.track_cache.stats()
+    
+    def _parse_track(self, data: Dict) -> Dict:
+        """
+        Extract preview URL, cover dan durasi dari track object Spotify
+        
+        Args:
+            data: Track object dari Spotify API
+            
+        Returns:
+            Dict dengan preview_url, cover_url, duration_ms
+        """
+        # Extract preview URL
+        preview_url = data.get("preview_url")
+        
+        # Extract cover image (largest available)
+        cover_url = None
+        if data.get("album") and data["album"].get("images"):
+            images = data["album"]["images"]
+            if images:
+                cover_url = images[0]["url"]  # First image is usually largest
+        
+        # Extract duration
+        duration_ms = data.get("duration_ms", 0)
+        
+        return {
+            "preview_url": preview_url,
+            "cover_url": cover_url,
+            "duration_ms": duration_ms
+        }
+    
     def search_track(self, query: str, limit: int = 10) -> Optional[list]:
         """
         Search for tracks on Spotify (optional feature)
@@ -154,7 +392,8 @@ class SpotifyClient:
             return None
         
         try:
-            response = requests.get(
+            response = self._send(
+                "GET",
                 f"{self.API_BASE_URL}/search",
                 headers={
                     "Authorization": f"Bearer {token}"
@@ -163,29 +402,417 @@ class SpotifyClient:
                     "q": query,
                     "type": "track",
                     "limit": limit
+                }
+            )
+            if response is None:
+                return None
+            return self._handle_search_response(response)
+                
+        except Exception as e:
+            print(f"Error searching Spotify: {e}")
+            return None
+    
+    def _handle_search_response(self, response) -> Optional[list]:
+        """Proses response /search menjadi list track dicts"""
+        if response.status_code == 200:
+            data = response.json()
+            tracks = data.get("tracks", {}).get("items", [])
+            
+            results = []
+            for track in tracks:
+                results.append({
+                    "id": track["id"],
+                    "name": track["name"],
+                    "artists": [artist["name"] for artist in track.get("artists", [])],
+                    "preview_url": track.get("preview_url"),
+                    "cover_url": track["album"]["images"][0]["url"] if track.get("album", {}).get("images") else None
+                })
+            
+            return results
+        else:
+            print(f"Failed to search Spotify: {response.status_code}")
+            return None
+    
+    def _create_session(self) -> Optional[requests.Session]:
+        return requests.Session()
+    
+    def close(self):
+        """Tutup HTTP session dan persistent cache"""
+        if self.session is not None:
+            self.session.close()
+        if self.track_cache.store is not None:
+            self.track_cache.flush()
+            self.track_cache.store.purge_expired()
+            self.track_cache.store.close()
+
+
+class AsyncSpotifyClient(SpotifyClient):
+    """
+    Async variant SpotifyClient untuk FastAPI handlers
+    
+    Memakai satu httpx.AsyncClient (connection pool dengan keep-alive) dan
+    semaphore untuk membatasi jumlah request Spotify yang berjalan
+    bersamaan. Cache, parsing dan konfigurasi sama dengan SpotifyClient;
+    SpotifyClient (sync) tetap dipakai untuk script seperti init_db.py.
+    
+    Hasil lookup ditulis ke persistent cache secara write-behind: satu
+    transaksi per enrichment lewat asyncio.to_thread, bukan commit SQLite
+    per track di event loop.
+    """
+    
+    CACHE_WRITE_BEHIND = True
+    
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 max_connections: int = 20, max_concurrency: int = 10,
+                 token_renew_before: float = 300, token_min_refresh: float = 5.0,
+                 enrich_deadline: Optional[float] = None, cache_purge_every: int = 100,
+                 **options):
+        """
+        Initialize async Spotify client
+        
+        Harus dibuat di dalam event loop yang akan memakainya.
+        
+        Args:
+            client_id: Spotify Client ID
+            client_secret: Spotify Client Secret
+            max_connections: Ukuran connection pool
+            max_concurrency: Maksimal request Spotify bersamaan
+            token_renew_before: Renew token sekian detik sebelum expired
+            token_min_refresh: Jeda minimal (detik) antar renewal yang
+                berhasil, agar token berumur sangat pendek tidak membuat
+                background renewal memanggil AUTH_URL terus-menerus
+            enrich_deadline: Batas waktu default (detik) untuk get_track_preview
+                dan get_tracks_preview; lewat batas ini hasil dianggap None
+            cache_purge_every: Hapus entry expired dari persistent cache
+                setiap sekian flush yang menulis entry
+            **options: cache_size, cache_ttl, negative_ttl, cache_path,
+                timeout, breaker (lihat SpotifyClient)
+        """
+        super().__init__(client_id, client_secret, **options)
+        self.http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            timeout=self.timeout
+        )
+        self.enrich_deadline = enrich_deadline
+        self.cache_purge_every = cache_purge_every
+        self._flushes_since_purge = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # Single-flight token refresh dan background renewal
+        self.token_renew_before = token_renew_before
+        self.token_min_refresh = token_min_refresh
+        self._token_refresh: Optional[asyncio.Future] = None
+        self._token_renewal: Optional[asyncio.Task] = None
+    
+    def _create_session(self) -> None:
+        # Semua request lewat self.http; requests.Session tidak dipakai
+        return None
+    
+    async def _cached_tracks(self, spotify_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Lookup cache: tier memory di event loop, miss diambil dari persistent
+        tier dengan satu query lewat asyncio.to_thread
+        
+        Returns:
+            Dict spotify_id -> dict preview atau None, hanya untuk yang hit
+        """
+        cached = self.track_cache.get_many(spotify_ids, memory_only=True)
+        missing = [i for i in spotify_ids if i not in cached]
+        if missing:
+            if self.track_cache.store is not None:
+                cached.update(await asyncio.to_thread(self.track_cache.load_many, missing))
+            else:
+                cached.update(self.track_cache.load_many(missing))
+        return cached
+    
+    async def _flush_cache(self):
+        """
+        Tulis hasil lookup yang tertunda ke persistent cache di luar event
+        loop; setiap cache_purge_every flush, entry expired (terutama hasil
+        negatif) dihapus agar file cache tidak tumbuh tanpa batas
+        """
+        store = self.track_cache.store
+        if store is None:
+            return
+        if await asyncio.to_thread(self.track_cache.flush):
+            self._flushes_since_purge += 1
+        if self._flushes_since_purge >= self.cache_purge_every:
+            self._flushes_since_purge = 0
+            await asyncio.to_thread(store.purge_expired)
+    
+    async def _request(self, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """
+        Kirim request lewat pool dengan bounded concurrency, rate limit dan
+        circuit breaker
+        
+        Returns:
+            Response, atau None jika di-short-circuit
+        """
+        async with self._semaphore:
+            if not self._before_call():
+                return None
+            
+            start = time.monotonic()
+            try:
+                response = await self.http.request(method, url, **kwargs)
+            except (Exception, asyncio.CancelledError):
+                # Termasuk request yang dibatalkan karena deadline
+                self.breaker.record_failure()
+                raise
+            self._after_call(response, time.monotonic() - start)
+            return response
+    
+    async def _within_deadline(self, awaitable, deadline: Optional[float], default=None):
+        """
+        Jalankan awaitable dengan batas waktu
+        
+        Args:
+            awaitable: Coroutine yang dijalankan
+            deadline: Batas waktu dalam detik (None: tanpa batas)
+            default: Hasil jika deadline terlewati
+            
+        Returns:
+            Hasil awaitable atau default
+        """
+        if deadline is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, deadline)
+        except asyncio.TimeoutError:
+            print(f"Spotify enrichment exceeded deadline ({deadline}s)")
+            return default
+    
+    async def get_access_token(self) -> Optional[str]:
+        """
+        Get access token using Client Credentials Flow (async)
+        
+        Returns:
+            Access token string atau None jika credentials tidak ada
+        """
+        if not self.enabled:
+            return None
+        
+        if self._has_valid_token():
+            return self.access_token
+        
+        return await self.refresh_access_token()
+    
+    async def refresh_access_token(self) -> Optional[str]:
+        """
+        Refresh token secara single-flight
+        
+        Jika refresh sudah berjalan, caller lain menunggu hasil refresh
+        yang sama alih-alih mengirim request baru ke AUTH_URL.
+        
+        Returns:
+            Access token baru atau None jika gagal
+        """
+        if self._token_refresh is None or self._token_refresh.done():
+            self._token_refresh = asyncio.ensure_future(self._fetch_access_token())
+        
+        # shield: caller yang di-cancel tidak membatalkan refresh untuk caller lain
+        return await asyncio.shield(self._token_refresh)
+    
+    async def _fetch_access_token(self) -> Optional[str]:
+        """Request token baru ke AUTH_URL"""
+        try:
+            response = await self._request(
+                "POST",
+                self.AUTH_URL,
+                data={
+                    "grant_type": "client_credentials"
                 },
-                timeout=10
+                auth=(self.client_id, self.client_secret)
             )
+            if response is None:
+                return None
+            return self._handle_token_response(response)
             
-            if response.status_code == 200:
-                data = response.json()
-                tracks = data.get("tracks", {}).get("items", [])
-                
-                results = []
-                for track in tracks:
-                    results.append({
-                        "id": track["id"],
-                        "name": track["name"],
-                        "artists": [artist["name"] for artist in track.get("artists", [])],
-                        "preview_url": track.get("preview_url"),
-                        "cover_url": track["album"]["images"][0]["url"] if track.get("album", {}).get("images") else None
-                    })
-                
-                return results
+        except Exception as e:
+            print(f"Error getting Spotify access token: {e}")
+            return None
+    
+    def start_token_renewal(self):
+        """
+        Start background task yang me-renew token sebelum expired, sehingga
+        request path tidak perlu menunggu token acquisition
+        """
+        if self.enabled and self._token_renewal is None:
+            self._token_renewal = asyncio.ensure_future(self._renew_token_loop())
+    
+    async def _renew_token_loop(self, retry_interval: float = 30):
+        renewed = False
+        while True:
+            if self._has_valid_token():
+                remaining = (self.token_expires_at - datetime.now()).total_seconds()
+                # Untuk token berumur pendek, renew di paruh umur sisa
+                delay = max(remaining - self.token_renew_before, remaining / 2)
             else:
-                print(f"Failed to search Spotify: {response.status_code}")
+                delay = 0.0
+            if renewed:
+                delay = max(delay, self.token_min_refresh)
+            await asyncio.sleep(delay)
+            
+            token = await self.refresh_access_token()
+            renewed = bool(token)
+            if not token:
+                # Gagal: coba lagi nanti, request path masih bisa refresh sendiri
+                await asyncio.sleep(retry_interval)
+    
+    async def get_track_preview(self, spotify_id: str,
+                                deadline: Optional[float] = None) -> Optional[Dict]:
+        """
+        Get track preview URL and metadata from Spotify (async)
+        
+        Args:
+            spotify_id: Spotify track ID
+            deadline: Batas waktu dalam detik (default: enrich_deadline)
+            
+        Returns:
+            Dict dengan preview_url, cover_url, duration atau None jika gagal,
+            di-short-circuit, atau melewati deadline
+        """
+        if not self.enabled:
+            return None
+        
+        cached = await self._cached_tracks([spotify_id])
+        if spotify_id in cached:
+            return cached[spotify_id]
+        
+        track = await self._within_deadline(
+            self._fetch_track(spotify_id), self.enrich_deadline if deadline is None else deadline
+        )
+        await self._flush_cache()
+        return track
+    
+    async def _fetch_track(self, spotify_id: str) -> Optional[Dict]:
+        token = await self.get_access_token()
+        if not token:
+            return None
+        
+        try:
+            response = await self._request(
+                "GET",
+                f"{self.API_BASE_URL}/tracks/{spotify_id}",
+                headers={
+                    "Authorization": f"Bearer {token}"
+                }
+            )
+            if response is None:
                 return None
+            return self._handle_track_response(spotify_id, response)
+            
+        except Exception as e:
+            print(f"Error getting track from Spotify: {e}")
+            return None
+    
+    async def get_tracks_preview(self, spotify_ids: List[str],
+                                 deadline: Optional[float] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Get preview URL and metadata untuk banyak track sekaligus (async)
+        
+        Chunk berisi maksimal 50 ID dikirim paralel (dibatasi semaphore).
+        
+        Args:
+            spotify_ids: List of Spotify track IDs (duplikat diabaikan)
+            deadline: Batas waktu dalam detik (default: enrich_deadline);
+                ID yang belum selesai saat deadline bernilai None
+            
+        Returns:
+            Dict spotify_id -> dict preview atau None
+        """
+        unique_ids = list(dict.fromkeys(i for i in spotify_ids if i))
+        results = {spotify_id: None for spotify_id in unique_ids}
+        
+        if not self.enabled or not unique_ids:
+            return results
+        
+        cached = await self._cached_tracks(unique_ids)
+        results.update(cached)
+        missing_ids = [i for i in unique_ids if i not in cached]
+        if not missing_ids:
+            return results
+        
+        # results di-update in place, jadi hasil parsial tetap terpakai saat deadline
+        await self._within_deadline(
+            self._fetch_tracks(missing_ids, results),
+            self.enrich_deadline if deadline is None else deadline
+        )
+        await self._flush_cache()
+        return results
+    
+    async def _fetch_tracks(self, missing_ids: List[str], results: Dict[str, Optional[Dict]]):
+        token = await self.get_access_token()
+        if not token:
+            return
+        
+        async def fetch_chunk(chunk: List[str]):
+            try:
+                response = await self._request(
+                    "GET",
+                    f"{self.API_BASE_URL}/tracks",
+                    headers={
+                        "Authorization": f"Bearer {token}"
+                    },
+                    params={
+                        "ids": ",".join(chunk)
+                    }
+                )
+                if response is not None:
+                    self._handle_tracks_response(chunk, response, results)
                 
+            except Exception as e:
+                print(f"Error getting tracks from Spotify: {e}")
+        
+        await asyncio.gather(*(fetch_chunk(chunk) for chunk in self._chunks(missing_ids)))
+    
+    async def search_track(self, query: str, limit: int = 10) -> Optional[list]:
+        """
+        Search for tracks on Spotify (async)
+        
+        Args:
+            query: Search query
+            limit: Number of results to return
+            
+        Returns:
+            List of track dicts atau None jika gagal
+        """
+        if not self.enabled:
+            return None
+        
+        token = await self.get_access_token()
+        if not token:
+            return None
+        
+        try:
+            response = await self._request(
+                "GET",
+                f"{self.API_BASE_URL}/search",
+                headers={
+                    "Authorization": f"Bearer {token}"
+                },
+                params={
+                    "q": query,
+                    "type": "track",
+                    "limit": limit
+                }
+            )
+            if response is None:
+                return None
+            return self._handle_search_response(response)
+            
         except Exception as e:
             print(f"Error searching Spotify: {e}")
             return None
+    
+    async def aclose(self):
+        """Tutup connection pool dan resource sync"""
+        if self._token_renewal is not None:
+            self._token_renewal.cancel()
+            self._token_renewal = None
+        await self.http.aclose()
+        await self._flush_cache()
+        self.close()
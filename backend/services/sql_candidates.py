@@ -0,0 +1,275 @@
+"""
+Candidate provider berbasis SQL untuk katalog yang tidak di-load ke memori
+"""
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.audio_features import NUMERIC_FEATURES, AudioFeatureStore, extract_features
+from services.knn_recommender import KNNRecommender
+from services.recommendation_table import RecommendationEntry
+from services.rule_engine import RuleEngine
+from services.song_catalog import SongCatalog
+
+
+# Kolom yang dibaca untuk ranking; kolom lain hanya di-load untuk pemenang top-k
+RANK_COLUMNS = ("id", "genre", "mood", "tempo", "features")
+
+
+def _placeholders(values: List) -> str:
+    return ", ".join("?" * len(values))
+
+
+class SQLCandidateProvider:
+    """
+    Rule-based filtering filter_by_mood sebagai query SQL berparameter atas
+    composite index (genre, tempo, mood), dengan preliminary_score dihitung
+    di SQL
+    
+    Yang disimpan di memori hanya encoder KNN dan statistik audio features
+    (lihat load); kandidat di-query dan di-encode per request.
+    """
+    
+    def __init__(self, db, rule_engine: Optional[RuleEngine] = None,
+                 feature_weights: Optional[Dict[str, float]] = None,
+                 limit: Optional[int] = None, batch_size: int = 10_000):
+        """
+        Initialize provider
+        
+        Args:
+            db: Database instance
+            rule_engine: RuleEngine untuk mood rules (default: RuleEngine())
+            feature_weights: Bobot block feature KNN
+            limit: Maksimal kandidat per request; jika di-set, kandidat
+                dengan preliminary_score tertinggi yang diambil
+            batch_size: Jumlah row per fetch saat menghitung statistik audio
+        """
+        self.db = db
+        self.rule_engine = rule_engine or RuleEngine()
+        self.feature_weights = feature_weights
+        self.limit = limit or None
+        self.batch_size = batch_size
+        self.recommender: Optional[KNNRecommender] = None
+        self.size = 0
+        self.version = 0
+        self.changes: Optional[int] = None
+        self._data_version = None
+    
+    def load(self) -> KNNRecommender:
+        """
+        Hitung ulang encoder (genre dan mood unik) serta mean/std audio
+        features katalog dengan query streaming
+        
+        Returns:
+            KNNRecommender tanpa feature matrix
+        """
+        self.db.ensure_candidate_index()
+        data_version = self.db.get_data_version()
+        changes = self.db.get_change_count()
+        
+        moods = self.db.get_moods()
+        audio, audio_means = self._audio_stats(moods)
+        recommender = KNNRecommender.from_stats(self.db.get_genres(), moods, audio, audio_means,
+                                                self.feature_weights)
+        
+        self.recommender = recommender
+        self.size = self.db.get_catalog_signature()["count"]
+        self.version += 1
+        self.changes = changes
+        self._data_version = data_version
+        return recommender
+    
+    def _audio_stats(self, moods: List[str]) -> Tuple[AudioFeatureStore, Dict[str, np.ndarray]]:
+        """
+        Mean/std per kolom audio (seperti AudioFeatureStore atas seluruh
+        katalog) dan rata-rata z-score per mood, dihitung per batch tanpa
+        menyimpan values
+        """
+        n_columns = len(NUMERIC_FEATURES)
+        mood_index = {mood: code for code, mood in enumerate(moods)}
+        count = np.zeros(n_columns)
+        mean = np.zeros(n_columns)
+        m2 = np.zeros(n_columns)  # jumlah kuadrat deviasi (digabung per batch)
+        mood_count = np.zeros((len(moods), n_columns))
+        mood_sum = np.zeros((len(moods), n_columns))
+        mood_present = np.zeros(len(moods))
+        
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute("SELECT mood, features FROM songs WHERE features IS NOT NULL")
+            while True:
+                rows = cursor.fetchmany(self.batch_size)
+                if not rows:
+                    break
+                raw = np.full((len(rows), n_columns), np.nan, dtype=np.float32)
+                for row, (_, features) in enumerate(rows):
+                    for name, value in extract_features(features).items():
+                        raw[row, NUMERIC_FEATURES.index(name)] = value
+                values = raw.astype(np.float64)
+                known = ~np.isnan(values)
+                
+                # Gabungkan mean dan m2 batch ke statistik total (Chan et al.)
+                batch_count = known.sum(axis=0)
+                batch_mean = np.divide(np.nansum(values, axis=0), batch_count,
+                                       out=np.zeros(n_columns), where=batch_count > 0)
+                batch_m2 = np.nansum((values - batch_mean) ** 2, axis=0)
+                total = count + batch_count
+                delta = batch_mean - mean
+                ratio = np.divide(batch_count, total, out=np.zeros(n_columns), where=total > 0)
+                mean += delta * ratio
+                m2 += batch_m2 + delta ** 2 * count * ratio
+                count = total
+                
+                codes = np.array([mood_index.get(mood, -1) for mood, _ in rows])
+                valid = codes >= 0
+                np.add.at(mood_count, codes[valid], known[valid])
+                np.add.at(mood_sum, codes[valid], np.nan_to_num(values[valid]))
+                np.add.at(mood_present, codes[valid], known[valid].any(axis=1))
+        
+        columns = count > 0
+        if not columns.any():
+            return AudioFeatureStore.empty(), {}
+        
+        std = np.sqrt(m2[columns] / count[columns])
+        std = np.where(std > 0, std, 1.0)
+        audio = AudioFeatureStore.from_stats(
+            [name for name, present in zip(NUMERIC_FEATURES, columns) if present],
+            mean[columns], std
+        )
+        
+        # Value yang tidak ada bernilai z = 0, jadi cukup jumlah z value yang ada
+        audio_means = {}
+        for mood, code in mood_index.items():
+            if mood_present[code]:
+                z_sum = (mood_sum[code, columns] - mood_count[code, columns] * audio.mean) / audio.std
+                audio_means[mood] = z_sum / mood_present[code]
+        return audio, audio_means
+    
+    def select_candidates(self, mood: str, genre: Optional[str],
+                          tempo: Optional[str]) -> Tuple[SongCatalog, np.ndarray]:
+        """
+        Strict pass (genre AND tempo) lalu relaxed pass (genre XOR tempo)
+        jika strict match kurang dari 10, seperti RuleEngine.select_candidates
+        
+        Args:
+            mood: User's mood
+            genre: User's preferred genre (optional)
+            tempo: User's preferred tempo (optional)
+        
+        Returns:
+            Tuple (candidates, preliminary_scores): candidates sebagai
+            SongCatalog (RANK_COLUMNS saja) urut id per pass, atau urut
+            preliminary_score jika limit di-set
+        """
+        preferences = self.rule_engine.get_mood_preferences(mood)
+        
+        target_genres = [genre] if genre else preferences["preferred_genres"]
+        target_tempos = [tempo] if tempo else preferences["preferred_tempo"]
+        
+        genre_match = f"genre IN ({_placeholders(target_genres)})"
+        tempo_match = f"tempo IN ({_placeholders(target_tempos)})"
+        
+        # Preliminary score: genre 0.3 + tempo 0.2 + mood 0.5
+        select = (f"SELECT {', '.join(RANK_COLUMNS)}, "
+                  f"0.3 * ({genre_match}) + 0.2 * ({tempo_match}) + 0.5 * (mood = ?) "
+                  f"AS preliminary_score FROM songs")
+        # Tanpa ANALYZE planner kadang memilih idx_tempo (menghindari sort by id)
+        by_genre = f"{select} INDEXED BY idx_genre_tempo_mood"
+        select_params = [*target_genres, *target_tempos, mood]
+        order = " ORDER BY preliminary_score DESC, id LIMIT ?" if self.limit else " ORDER BY id"
+        
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            
+            # First pass: strict filtering (genre AND tempo match)
+            params = [*select_params, *target_genres, *target_tempos]
+            if self.limit:
+                params.append(self.limit)
+            rows = cursor.execute(f"{by_genre} WHERE {genre_match} AND {tempo_match}{order}",
+                                  params).fetchall()
+            
+            # Second pass: relax to genre OR tempo match (tanpa yang sudah strict)
+            remaining = self.limit - len(rows) if self.limit else None
+            if len(rows) < 10 and remaining != 0:
+                params = [*select_params, *target_genres, *target_tempos,
+                          *select_params, *target_tempos, *target_genres]
+                if remaining:
+                    params.append(remaining)
+                rows += cursor.execute(
+                    f"{by_genre} WHERE {genre_match} AND NOT {tempo_match} "
+                    f"UNION ALL {select} WHERE {tempo_match} AND NOT {genre_match}{order}",
+                    params
+                ).fetchall()
+        
+        values = list(zip(*rows)) if rows else [()] * (len(RANK_COLUMNS) + 1)
+        candidates = SongCatalog.from_columns(dict(zip(RANK_COLUMNS, values)))
+        return candidates, np.array(values[-1], dtype=np.float64)
+    
+    def compute_entries(self, keys: List[Tuple], k: int) -> List[RecommendationEntry]:
+        """
+        Query kandidat dan ranking KNN untuk setiap kombinasi, seperti
+        recommendation_table.compute_entries tanpa snapshot katalog
+        
+        Args:
+            keys: List of (mood, genre, tempo); genre/tempo boleh None
+            k: Jumlah lagu yang disimpan per entry
+        
+        Returns:
+            List of RecommendationEntry, urutan sama dengan keys
+        """
+        if self.recommender is None:
+            self.load()
+        
+        entries = []
+        for mood, genre, tempo in keys:
+            candidates, preliminary = self.select_candidates(mood, genre, tempo)
+            if len(candidates):
+                # Tanpa preferensi user, pakai genre/tempo kandidat pertama
+                genre = genre if genre else candidates.value('genre', 0)
+                tempo = tempo if tempo else candidates.value('tempo', 0)
+            profile = {"mood": mood, "genre": genre, "tempo": tempo}
+            
+            positions, scores = self.recommender.recommend_catalog(profile, candidates, k)
+            entries.append(RecommendationEntry(
+                user_profile=profile,
+                song_ids=candidates.ids[positions],
+                similarity_scores=scores,
+                preliminary_scores=preliminary[positions],
+                candidates_count=len(candidates)
+            ))
+        
+        return entries
+    
+    def has_changed(self) -> bool:
+        """Cek apakah database berubah sejak load terakhir"""
+        return self.db.get_data_version() != self._data_version
+    
+    def refresh_if_changed(self) -> bool:
+        """
+        Hitung ulang encoder dan statistik jika database berubah
+        
+        Returns:
+            True jika di-load ulang
+        """
+        if self.recommender is not None and not self.has_changed():
+            return False
+        self.load()
+        return True
+    
+    async def watch(self, interval: float = 5.0):
+        """
+        Poll versi database secara periodik di background
+        
+        Args:
+            interval: Jeda polling dalam detik
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await asyncio.to_thread(self.refresh_if_changed):
+                    print(f"✓ SQL candidate stats reloaded (version {self.version}, {self.size} songs)")
+            except Exception as e:
+                print(f"Error refreshing SQL candidate stats: {e}")
@@ -0,0 +1,207 @@
+"""
+Tests untuk vector index (exact dan IVF)
+"""
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.ann_index import ExactIndex, IVFIndex, build_index, load_index, load_or_build_index
+from services.catalog import CatalogSnapshot
+from services.knn_recommender import KNNRecommender
+from services.recommendation_table import compute_entries
+from services.rule_engine import RuleEngine
+
+
+@pytest.fixture
+def vectors():
+    """Vector clustered acak"""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 16))
+    labels = rng.integers(20, size=3000)
+    return (centers[labels] + rng.normal(0, 0.3, (3000, 16))).astype(np.float32)
+
+
+def _recall(index, exact, queries, k):
+    hits = 0
+    for query in queries:
+        expected, _ = exact.search(query, k)
+        found, _ = index.search(query, k)
+        hits += len(np.intersect1d(expected, found))
+    return hits / (k * len(queries))
+
+
+def test_exact_search(vectors):
+    """Test exact index mengembalikan cosine tertinggi"""
+    index = ExactIndex(vectors)
+    rows, scores = index.search(vectors[7], 5)
+    
+    assert rows[0] == 7
+    assert scores[0] == pytest.approx(1.0)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_ivf_recall(vectors):
+    """Test recall IVF naik dengan n_probe dan mendekati exact"""
+    exact = ExactIndex(vectors)
+    ivf = IVFIndex(vectors, n_lists=40, n_probe=1)
+    queries = vectors[:50]
+    
+    low = _recall(ivf, exact, queries, 10)
+    ivf.n_probe = 10
+    high = _recall(ivf, exact, queries, 10)
+    
+    assert high >= low
+    assert high >= 0.95
+
+
+def test_ivf_mask(vectors):
+    """Test mask membatasi hasil, dan cluster tambahan di-scan jika perlu"""
+    ivf = IVFIndex(vectors, n_lists=40, n_probe=1)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::97] = True
+    
+    rows, _ = ivf.search(vectors[0], 10, mask)
+    assert len(rows) == 10
+    assert mask[rows].all()
+
+
+def test_incremental_add(vectors):
+    """Test add setelah training memakai centroid yang sama"""
+    ivf = IVFIndex(vectors[:2000], n_lists=30)
+    centroids = ivf.centroids.copy()
+    
+    new_rows = ivf.add(vectors[2000:])
+    
+    assert new_rows.tolist() == list(range(2000, 3000))
+    assert len(ivf) == 3000
+    assert np.array_equal(ivf.centroids, centroids)
+    assert sum(len(members) for members in ivf.lists) == 3000
+    rows, _ = ivf.search(vectors[2500], 1)
+    assert rows[0] == 2500
+
+
+def test_extended_is_copy_on_write(vectors):
+    """Test extended membuat index baru dan index lama tidak berubah"""
+    for index in (ExactIndex(vectors[:2000]), IVFIndex(vectors[:2000], n_lists=30)):
+        extended = index.extended(vectors, np.linalg.norm(vectors.astype(np.float64), axis=1))
+        
+        assert len(index) == 2000
+        assert len(extended) == 3000
+        rows, _ = extended.search(vectors[2500], 1)
+        assert rows[0] == 2500
+
+
+def test_extended_new_columns(vectors):
+    """Test kolom nol yang disisipkan tidak mengubah assignment lama"""
+    ivf = IVFIndex(vectors[:2000], n_lists=30)
+    padded = np.insert(vectors, [4, 4], 0, axis=1)
+    padded[2000:, 4] = 1.0
+    
+    extended = ivf.extended(padded, np.linalg.norm(padded.astype(np.float64), axis=1), [4, 4])
+    
+    assert extended.centroids.shape == (30, 18)
+    assert np.array_equal(extended.assignments[:2000], ivf.assignments)
+    rows, _ = extended.search(padded[2500], 1)
+    assert rows[0] == 2500
+
+
+def test_persistence(vectors, tmp_path):
+    """Test index di-load dari disk hanya jika vectors sama"""
+    path = str(tmp_path / "index.npz")
+    ivf = IVFIndex(vectors, n_lists=25, n_probe=3)
+    ivf.save(path)
+    
+    loaded = load_index(path, vectors)
+    assert isinstance(loaded, IVFIndex)
+    assert np.array_equal(loaded.assignments, ivf.assignments)
+    assert loaded.search(vectors[3], 5)[0].tolist() == ivf.search(vectors[3], 5)[0].tolist()
+    
+    assert load_index(path, vectors[:-1]) is None
+    assert load_index(str(tmp_path / "missing.npz"), vectors) is None
+
+
+def test_corrupt_index_is_rebuilt(vectors, tmp_path):
+    """Test file index terpotong dianggap cache miss dan ditulis ulang"""
+    path = str(tmp_path / "index.npz")
+    IVFIndex(vectors, n_lists=25).save(path)
+    with open(path, "r+b") as f:
+        f.truncate(100)
+    
+    assert load_index(path, vectors) is None
+    index = load_or_build_index(vectors, path=path, kind="ivf", n_lists=25)
+    assert isinstance(load_index(path, vectors), IVFIndex)
+    assert index.search(vectors[3], 1)[0][0] == 3
+    assert [p.name for p in tmp_path.iterdir()] == ["index.npz"]
+
+
+def test_load_or_build(vectors, tmp_path):
+    """Test load_or_build menyimpan index dan memakainya lagi"""
+    path = str(tmp_path / "index.npz")
+    first = load_or_build_index(vectors, path=path, kind="ivf", n_lists=25)
+    second = load_or_build_index(vectors, path=path, kind="ivf", n_probe=4)
+    
+    assert np.array_equal(first.centroids, second.centroids)
+    assert second.n_probe == 4
+    assert load_or_build_index(vectors, path=path, kind="exact").exact
+
+
+def test_build_index_auto(vectors):
+    """Test mode auto memilih IVF hanya untuk katalog besar"""
+    assert build_index(vectors, ann_threshold=5000).exact
+    assert not build_index(vectors, ann_threshold=1000).exact
+    with pytest.raises(ValueError):
+        build_index(vectors, kind="hnsw")
+
+
+def test_recommender_with_ivf():
+    """Test KNNRecommender memakai IVF untuk kandidat besar dengan score exact"""
+    rng = np.random.default_rng(1)
+    songs = [{"id": i, "genre": f"g{i % 7}", "mood": f"m{i % 5}", "tempo": "slow",
+              "features": {"energy": float(e)}} for i, e in enumerate(rng.random(2000))]
+    exact = KNNRecommender(index_options={"kind": "exact"})
+    exact.build_encoders(songs)
+    approx = KNNRecommender(index_options={"kind": "ivf", "ann_threshold": 100, "n_probe": 8})
+    approx.build_encoders(songs)
+    
+    profile = {"mood": "m1", "genre": "g3", "tempo": "slow"}
+    rows = np.arange(0, 2000, 2)
+    expected_positions, expected_scores = exact.recommend_rows(profile, rows, 10)
+    positions, scores = approx.recommend_rows(profile, rows, 10)
+    
+    assert scores.tolist() == pytest.approx(expected_scores.tolist())
+    assert scores.tolist() == approx.score_rows(profile, rows[positions]).tolist()
+    
+    many = approx.recommend_many([profile], [rows], 10)[0]
+    assert many[0].tolist() == positions.tolist()
+
+
+def test_compute_entries_uses_ivf():
+    """Test path app (compute_entries -> recommend_many) memakai IVF untuk kandidat besar"""
+    rng = np.random.default_rng(2)
+    moods = list(RuleEngine.MOOD_RULES)
+    songs = [{"id": i + 1, "title": f"S{i}", "artist": "A", "genre": f"g{i % 7}",
+              "mood": moods[i % len(moods)], "tempo": "slow", "spotify_id": None,
+              "features": {"energy": float(e)}, "created_at": None}
+             for i, e in enumerate(rng.random(2000))]
+    snapshot = CatalogSnapshot.build(songs, version=1,
+                                     index_options={"kind": "ivf", "ann_threshold": 100, "n_probe": 4})
+    searches = []
+    search = snapshot.recommender.index.search
+    snapshot.recommender.index.search = lambda *args: searches.append(1) or search(*args)
+    
+    keys = [("happy", None, None), ("sedih", "g3", "slow")]
+    entries = compute_entries(snapshot, RuleEngine(), keys, 10)
+    
+    assert len(searches) == sum(entry.candidates_count >= 100 for entry in entries) > 0
+    rows = snapshot.songs.rows
+    for entry in entries:
+        expected = snapshot.recommender.score_rows(entry.user_profile,
+                                                   np.array([rows[i] for i in entry.song_ids]))
+        assert entry.similarity_scores.tolist() == pytest.approx(expected.tolist())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
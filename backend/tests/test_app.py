@@ -0,0 +1,372 @@
+"""
+Tests untuk API endpoints
+"""
+import pytest
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fastapi.testclient import TestClient
+
+import db.database
+from db.init_db import init_database
+from services.catalog import CatalogStore
+from services.http_cache import CatalogETags
+
+
+TEST_ENV = {
+    "DATABASE_URL": "test_app.db",
+    "SPOTIFY_CLIENT_ID": "",
+    "SPOTIFY_CLIENT_SECRET": "",
+    "SPOTIFY_CACHE_DB": "",
+    "CATALOG_POLL_INTERVAL": "0.05",
+    "GZIP_MIN_SIZE": "1024",
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    """TestClient dengan database test dan tanpa Spotify"""
+    init_database(TEST_ENV["DATABASE_URL"])
+    original_env = {key: os.environ.get(key) for key in TEST_ENV}
+    os.environ.update(TEST_ENV)
+    db.database._db_instance = None
+    
+    import app
+    with TestClient(app.app) as test_client:
+        test_client.app_module = app
+        yield test_client
+    
+    db.database._db_instance = None
+    for key, value in original_env.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = value
+    if os.path.exists(TEST_ENV["DATABASE_URL"]):
+        os.remove(TEST_ENV["DATABASE_URL"])
+
+
+def test_recommend(client):
+    """Test basic recommendation request"""
+    response = client.post("/api/recommend", json={"mood": "sedih", "k": 5})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["recommendations"]) == 5
+    for song in data["recommendations"]:
+        assert 0.0 <= song["similarity_score"] <= 1.0
+        assert song["reason"]
+
+
+def test_recommend_invalid_mood(client):
+    """Test validasi mood"""
+    response = client.post("/api/recommend", json={"mood": "marah"})
+    assert response.status_code == 400
+
+
+def test_recommend_cache_hit(client):
+    """Test bahwa request yang sama dilayani dari cache tanpa menyentuh database"""
+    app = client.app_module
+    payload = {"mood": "chill", "genre": "lo-fi", "k": 3}
+    
+    first = client.post("/api/recommend", json=payload).json()
+    hits_before = app.recommendation_cache.stats()["hits"]
+    
+    # Database tidak boleh dipakai saat cache hit
+    original_connect = app.db.connect
+    app.db.connect = lambda: pytest.fail("database touched on cache hit")
+    try:
+        second = client.post("/api/recommend", json={**payload, "tempo": ""}).json()
+    finally:
+        app.db.connect = original_connect
+    
+    assert second["recommendations"] == first["recommendations"]
+    assert second["metadata"]["cached"] is True
+    assert app.recommendation_cache.stats()["hits"] == hits_before + 1
+
+
+def test_recommend_cache_invalidated_on_catalog_change(client):
+    """Test bahwa cache di-invalidate saat tabel songs berubah"""
+    app = client.app_module
+    payload = {"mood": "happy", "genre": "jazz", "tempo": "fast", "k": 20}
+    
+    before = client.post("/api/recommend", json=payload).json()
+    assert all(song["genre"] != "jazz" for song in before["recommendations"])
+    
+    song_id = app.db.insert_song("Take Five", "Dave Brubeck", "jazz", "happy", "fast")
+    
+    # Tunggu catalog watcher me-reload snapshot
+    deadline = time.time() + 2
+    while app.catalog.snapshot.by_id.get(song_id) is None and time.time() < deadline:
+        time.sleep(0.05)
+    
+    after = client.post("/api/recommend", json=payload).json()
+    assert after["recommendations"][0]["id"] == song_id
+    assert "cached" not in after["metadata"]
+
+
+def test_recommend_batch_matches_single(client):
+    """Test batch menghasilkan rekomendasi yang sama dengan request satu per satu"""
+    payloads = [
+        {"mood": "sedih", "k": 5},
+        {"mood": "semangat", "genre": "rock", "tempo": "fast", "k": 3},
+        {"mood": "galau", "genre": "polka", "k": 7},
+        {"mood": "sedih", "k": 5},
+    ]
+    
+    batch = client.post("/api/recommend/batch", json={"requests": payloads})
+    assert batch.status_code == 200
+    results = batch.json()["results"]
+    assert len(results) == len(payloads)
+    
+    for payload, result in zip(payloads, results):
+        single = client.post("/api/recommend", json=payload).json()
+        assert result["recommendations"] == single["recommendations"]
+
+
+def test_recommend_batch_single_spotify_call(client):
+    """Test enrichment batch memakai satu Spotify call dengan id unik"""
+    app = client.app_module
+    app.recommendation_cache.cache.clear()
+    
+    class FakeSpotify:
+        enabled = True
+        calls = []
+        
+        async def get_tracks_preview(self, spotify_ids):
+            self.calls.append(spotify_ids)
+            return {sid: {"preview_url": f"https://p/{sid}", "cover_url": None}
+                    for sid in spotify_ids}
+    
+    fake = FakeSpotify()
+    original = app.spotify_client
+    app.spotify_client = fake
+    try:
+        payloads = [{"mood": "happy", "k": 10}, {"mood": "happy", "genre": "pop", "k": 10}]
+        results = client.post("/api/recommend/batch", json={"requests": payloads}).json()["results"]
+    finally:
+        app.spotify_client = original
+        app.recommendation_cache.cache.clear()
+    
+    assert len(fake.calls) == 1
+    assert len(fake.calls[0]) == len(set(fake.calls[0]))
+    for result in results:
+        for song in result["recommendations"]:
+            if song["spotify_id"]:
+                assert song["preview_url"] == f"https://p/{song['spotify_id']}"
+
+
+def test_recommend_batch_validation(client):
+    """Test batch ditolak jika ada request invalid atau batch kosong"""
+    response = client.post("/api/recommend/batch", json={"requests": [
+        {"mood": "happy"}, {"mood": "marah"}
+    ]})
+    assert response.status_code == 400
+    
+    response = client.post("/api/recommend/batch", json={"requests": []})
+    assert response.status_code == 422
+
+
+def test_list_songs_pagination(client):
+    """Test /api/songs mengikuti next_cursor sampai halaman terakhir"""
+    seen = []
+    cursor = None
+    while True:
+        params = {"mood": "sedih", "limit": 3}
+        if cursor is not None:
+            params["cursor"] = cursor
+        data = client.get("/api/songs", params=params).json()
+        seen.extend(song["id"] for song in data["songs"])
+        assert all(song["mood"] == "sedih" for song in data["songs"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+    
+    expected = [song["id"] for song in client.app_module.db.get_all_songs() if song["mood"] == "sedih"]
+    assert seen == sorted(expected)
+    assert client.get("/api/songs", params={"limit": 0}).status_code == 422
+
+
+def test_search_songs(client):
+    """Test /api/songs/search dengan prefix kata terakhir"""
+    data = client.get("/api/songs/search", params={"q": "bohemian rhap"}).json()
+    
+    assert data["songs"][0]["title"] == "Bohemian Rhapsody"
+    assert client.get("/api/songs/search", params={"q": '"('}).json()["songs"] == []
+    assert client.get("/api/songs/search").status_code == 422
+
+
+def test_songs_batch_order_and_missing(client):
+    """Test /api/songs/batch mengikuti urutan ids dan menandai ID yang tidak ada"""
+    data = client.get("/api/songs/batch", params={"ids": "3,999999,1,3"}).json()
+    
+    assert [song and song["id"] for song in data["songs"]] == [3, None, 1, 3]
+    assert data["missing"] == [999999]
+    assert data["songs"][1] is None
+    assert data["songs"][2] == client.get("/api/song/1").json()
+
+
+def test_songs_batch_new_song_and_single_spotify_call(client):
+    """Test lagu baru ditemukan sebelum snapshot di-refresh dan Spotify dipanggil sekali"""
+    app = client.app_module
+    song_id = app.db.insert_song("Batch Song", "Batch Artist", "pop", "happy", "fast",
+                                 spotify_id="batchspotify1")
+    
+    class FakeSpotify:
+        enabled = True
+        calls = []
+        
+        async def get_tracks_preview(self, spotify_ids):
+            self.calls.append(spotify_ids)
+            return {sid: {"preview_url": f"https://p/{sid}", "cover_url": None}
+                    for sid in spotify_ids}
+    
+    fake = FakeSpotify()
+    original = app.spotify_client
+    app.spotify_client = fake
+    try:
+        data = client.get("/api/songs/batch", params={"ids": f"{song_id},1,2"}).json()
+    finally:
+        app.spotify_client = original
+    
+    assert len(fake.calls) == 1
+    assert data["missing"] == []
+    assert data["songs"][0]["preview_url"] == "https://p/batchspotify1"
+
+
+def test_songs_batch_validation(client):
+    """Test ids kosong, bukan angka atau terlalu banyak ditolak"""
+    app = client.app_module
+    assert client.get("/api/songs/batch", params={"ids": ""}).status_code == 400
+    assert client.get("/api/songs/batch", params={"ids": "1,abc"}).status_code == 400
+    assert client.get("/api/songs/batch", params={"ids": "1,99999999999999999999"}).status_code == 400
+    assert client.get("/api/songs/batch", params={"ids": "0,-3"}).status_code == 400
+    too_many = ",".join(str(i) for i in range(app.MAX_SONG_BATCH + 1))
+    assert client.get("/api/songs/batch", params={"ids": too_many}).status_code == 400
+    assert client.get("/api/songs/batch").status_code == 422
+
+
+def test_genres_conditional_get(client):
+    """Test /api/genres: ETag, 304 tanpa query database dan ETag baru saat katalog berubah"""
+    app = client.app_module
+    # Tunggu reload dari insert test sebelumnya selesai agar versi stabil
+    deadline = time.time() + 2
+    while app.catalog.has_changed() and time.time() < deadline:
+        time.sleep(0.05)
+    
+    first = client.get("/api/genres")
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    
+    calls = []
+    original = app.database.get_genres
+    
+    async def counting_get_genres():
+        calls.append(1)
+        return await original()
+    
+    app.database.get_genres = counting_get_genres
+    try:
+        cached = client.get("/api/genres", headers={"If-None-Match": etag})
+        again = client.get("/api/genres")
+        
+        version = app.catalog_version()
+        app.db.insert_song("Genre Song", "Genre Artist", "bossa nova", "chill", "slow")
+        deadline = time.time() + 2
+        while app.catalog_version() == version and time.time() < deadline:
+            time.sleep(0.05)
+        changed = client.get("/api/genres", headers={"If-None-Match": etag})
+    finally:
+        app.database.get_genres = original
+    
+    assert cached.status_code == 304 and cached.headers["etag"] == etag
+    assert again.json() == first.json()
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert "bossa nova" in changed.json()["genres"]
+    assert len(calls) == 1
+
+
+def test_etag_matches_other_worker(client):
+    """Test worker lain dengan database yang sama menghasilkan ETag yang sama"""
+    app = client.app_module
+    deadline = time.time() + 2
+    while app.catalog.has_changed() and time.time() < deadline:
+        time.sleep(0.05)
+    etag = client.get("/api/genres").headers["etag"]
+    
+    other = CatalogStore(db.database.Database(TEST_ENV["DATABASE_URL"]), precompute_table=False)
+    snapshot = other.load()
+    other_etag = CatalogETags().etag(snapshot.changes, len(snapshot.songs), snapshot.version + 5)
+    other.db.close()
+    
+    assert snapshot.changes is not None
+    assert other_etag == etag
+
+
+def test_song_and_moods_conditional_get(client):
+    """Test /api/song/{id} dan /api/moods menjawab 304 untuk ETag yang cocok"""
+    for path in ("/api/song/1", "/api/moods"):
+        etag = client.get(path).headers["etag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+        assert client.get(path, headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+
+def test_fast_responses_match_default(client):
+    """Test FAST_RESPONSES menghasilkan JSON yang sama dengan path default"""
+    app = client.app_module
+    payload = {"mood": "galau", "k": 20}
+    batch = {"requests": [payload, {"mood": "chill", "tempo": "slow", "k": 3}]}
+    
+    default = client.post("/api/recommend", json=payload).json()
+    default_batch = client.post("/api/recommend/batch", json=batch).json()
+    app.fast_responses = True
+    try:
+        fast = client.post("/api/recommend", json=payload)
+        fast_batch = client.post("/api/recommend/batch", json=batch).json()
+    finally:
+        app.fast_responses = False
+    
+    assert fast.headers["content-type"] == "application/json"
+    assert fast.json()["recommendations"] == default["recommendations"]
+    assert [r["recommendations"] for r in fast_batch["results"]] == \
+        [r["recommendations"] for r in default_batch["results"]]
+
+
+def test_gzip_off_by_default():
+    """Test gzip hanya aktif jika GZIP_MIN_SIZE di-set"""
+    env = {key: value for key, value in os.environ.items() if key != "GZIP_MIN_SIZE"}
+    code = ("import app; from fastapi.middleware.gzip import GZipMiddleware; "
+            "print(any(m.cls is GZipMiddleware for m in app.app.user_middleware))")
+    result = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                            text=True, cwd=str(Path(__file__).parent.parent), check=True)
+    
+    assert result.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_gzip_above_min_size(client):
+    """Test response besar di-gzip saat GZIP_MIN_SIZE di-set, response kecil tidak"""
+    headers = {"Accept-Encoding": "gzip"}
+    large = client.post("/api/recommend", json={"mood": "happy", "k": 20}, headers=headers)
+    small = client.get("/api/moods", headers=headers)
+    
+    assert large.headers["content-encoding"] == "gzip"
+    assert len(large.json()["recommendations"]) == 20
+    assert "content-encoding" not in small.headers
+
+
+def test_health(client):
+    """Test health endpoint menampilkan statistik cache"""
+    data = client.get("/health").json()
+    
+    assert data["status"] == "healthy"
+    assert "recommendation_cache" in data
+    assert data["spotify_breaker"]["state"] == "closed"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
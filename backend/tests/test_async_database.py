@@ -0,0 +1,161 @@
+"""
+Tests untuk async data-access layer
+"""
+import pytest
+import asyncio
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.async_database import AsyncDatabase, DatabaseBusyError
+from db.database import Database
+from db.init_db import init_database
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database"""
+    test_db_path = "test_async_beatlens.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path, pool_size=2)
+    
+    yield db
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+def test_same_results_as_database(test_db):
+    """Test method async mengembalikan hasil yang sama dengan Database"""
+    async def run():
+        database = AsyncDatabase(test_db)
+        song_id = await database.insert_song("Async Song", "Async Artist", "pop", "happy", "fast")
+        results = (
+            await database.get_song_by_id(song_id),
+            await database.get_genres(),
+            await database.list_songs(mood="happy", limit=5),
+            await database.search_songs("async"),
+        )
+        database.executor.shutdown()
+        return song_id, results
+    
+    song_id, (song, genres, page, found) = asyncio.run(run())
+    
+    assert song == test_db.get_song_by_id(song_id)
+    assert genres == test_db.get_genres()
+    assert page == test_db.list_songs(mood="happy", limit=5)
+    assert [song["id"] for song in found] == [song_id]
+
+
+def test_queries_run_off_event_loop(test_db):
+    """Test query berjalan di thread pool database, bukan thread event loop"""
+    async def run():
+        database = AsyncDatabase(test_db)
+        loop_thread = threading.current_thread().name
+        query_thread = await database.run(lambda: threading.current_thread().name)
+        database.executor.shutdown()
+        return loop_thread, query_thread
+    
+    loop_thread, query_thread = asyncio.run(run())
+    
+    assert query_thread.startswith("beatlens-db")
+    assert query_thread != loop_thread
+
+
+def test_concurrency_bounded_by_workers(test_db):
+    """Test jumlah query bersamaan tidak melebihi max_workers"""
+    active = []
+    peak = []
+    lock = threading.Lock()
+    
+    def query(song_id):
+        with lock:
+            active.append(song_id)
+            peak.append(len(active))
+        try:
+            return test_db.get_song_by_id(song_id)
+        finally:
+            with lock:
+                active.remove(song_id)
+    
+    async def run():
+        database = AsyncDatabase(test_db, max_workers=2)
+        songs = await asyncio.gather(*(database.run(query, i) for i in range(1, 21)))
+        database.executor.shutdown()
+        return songs
+    
+    songs = asyncio.run(run())
+    
+    assert [song["id"] for song in songs] == list(range(1, 21))
+    assert max(peak) <= 2
+
+
+def test_backpressure_when_saturated(test_db):
+    """Test query ditolak dengan DatabaseBusyError saat pool dan antrean penuh"""
+    release = threading.Event()
+    
+    async def run():
+        database = AsyncDatabase(test_db, max_workers=1, max_pending=1, queue_timeout=0.05)
+        running = asyncio.ensure_future(database.run(release.wait, 5))
+        queued = asyncio.ensure_future(database.get_genres())
+        await asyncio.sleep(0.01)
+        
+        with pytest.raises(DatabaseBusyError):
+            await database.get_song_by_id(1)
+        stats = database.stats()
+        
+        release.set()
+        await asyncio.gather(running, queued)
+        song = await database.get_song_by_id(1)
+        database.executor.shutdown()
+        return stats, song
+    
+    stats, song = asyncio.run(run())
+    
+    assert stats["rejected"] == 1 and stats["in_flight"] == 2
+    assert song["id"] == 1
+
+
+def test_cancelled_query_keeps_slot_until_done(test_db):
+    """Test query yang di-cancel tetap memegang slot sampai job executor selesai"""
+    release = threading.Event()
+    
+    async def run():
+        database = AsyncDatabase(test_db, max_workers=1, max_pending=1, queue_timeout=0.05)
+        running = asyncio.ensure_future(database.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        running.cancel()
+        await asyncio.sleep(0.01)
+        after_cancel = database.stats()["in_flight"]
+        
+        # Satu slot masih dipegang job yang berjalan: hanya satu query lagi yang muat
+        queued = asyncio.ensure_future(database.get_genres())
+        await asyncio.sleep(0.01)
+        with pytest.raises(DatabaseBusyError):
+            await database.get_song_by_id(1)
+        
+        # Query antre yang di-cancel sebelum jalan langsung melepas slotnya
+        queued.cancel()
+        await asyncio.sleep(0.01)
+        after_queued_cancel = database.stats()["in_flight"]
+        
+        release.set()
+        await asyncio.sleep(0.05)
+        after_done = database.stats()["in_flight"]
+        database.executor.shutdown()
+        return after_cancel, after_queued_cancel, after_done
+    
+    after_cancel, after_queued_cancel, after_done = asyncio.run(run())
+    
+    assert after_cancel == 1
+    assert after_queued_cancel == 1
+    assert after_done == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
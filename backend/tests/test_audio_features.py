@@ -0,0 +1,63 @@
+"""
+Tests untuk audio feature column store
+"""
+import pytest
+import numpy as np
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.audio_features import AudioFeatureStore, extract_features, parse_weights
+
+
+def test_extract_features():
+    """Test hanya numeric features yang dikenal yang diambil"""
+    features = {"energy": 0.5, "tempo": 120, "explicit": True, "key": "C#", "foo": 1}
+    assert extract_features(features) == {"energy": 0.5, "bpm": 120.0}
+    assert extract_features('{"valence": 0.3}') == {"valence": 0.3}
+    assert extract_features("not json") == {}
+    assert extract_features(None) == {}
+
+
+def test_build_column_store():
+    """Test column store float32 dengan NaN untuk value yang tidak ada"""
+    songs = [
+        {"features": {"energy": 0.2, "bpm": 90}},
+        {"features": {"energy": 0.8}},
+        {"features": None},
+    ]
+    store = AudioFeatureStore.build(songs)
+    
+    assert store.columns == ("energy", "bpm")
+    assert store.values.dtype == np.float32
+    assert np.isnan(store.values[1, 1])
+    assert store.present.tolist() == [True, True, False]
+
+
+def test_standardized():
+    """Test z-score per kolom; value yang tidak ada menjadi 0"""
+    songs = [{"features": {"energy": 0.2}}, {"features": {"energy": 0.8}}, {"features": {}}]
+    store = AudioFeatureStore.build(songs)
+    z = store.standardized()
+    
+    assert z.dtype == np.float32
+    assert z[:, 0].tolist() == pytest.approx([-1.0, 1.0, 0.0])
+    assert store.standardize({"energy": 0.5}).tolist() == pytest.approx([0.0], abs=1e-6)
+
+
+def test_constant_column():
+    """Test kolom dengan std 0 tidak menghasilkan NaN"""
+    store = AudioFeatureStore.build([{"features": {"energy": 0.5}}] * 3)
+    assert store.standardized().tolist() == [[0.0]] * 3
+
+
+def test_parse_weights():
+    """Test parsing konfigurasi bobot block"""
+    assert parse_weights("mood=1, genre=2,audio=0.5") == {"mood": 1.0, "genre": 2.0, "audio": 0.5}
+    assert parse_weights("") == {}
+    assert parse_weights(None) == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,140 @@
+"""
+Tests untuk catalog snapshot
+"""
+import pytest
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.init_db import init_database
+from services.catalog import CatalogStore, CatalogSnapshot
+from services.rule_engine import RuleEngine
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database"""
+    test_db_path = "test_catalog.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    
+    yield db
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+def test_snapshot_build(test_db):
+    """Test snapshot berisi songs, index dan recommender yang konsisten"""
+    songs = test_db.get_all_songs()
+    snapshot = CatalogSnapshot.build(songs, version=3)
+    
+    assert snapshot.version == 3
+    assert len(snapshot.songs) == len(songs)
+    assert snapshot.index.songs is snapshot.songs
+    assert snapshot.recommender.feature_matrix.shape[0] == len(songs)
+    assert list(snapshot.genres) == test_db.get_genres()
+    assert snapshot.by_id[songs[0]['id']]['title'] == songs[0]['title']
+
+
+def test_snapshot_is_immutable(test_db):
+    """Test bahwa snapshot tidak bisa diubah"""
+    snapshot = CatalogSnapshot.build(test_db.get_all_songs())
+    
+    with pytest.raises(Exception):
+        snapshot.songs = ()
+
+
+def test_refresh_only_when_changed(test_db):
+    """Test bahwa snapshot hanya di-reload saat tabel songs berubah"""
+    store = CatalogStore(test_db)
+    first = store.load()
+    
+    assert store.refresh_if_changed() is False
+    assert store.snapshot is first
+    
+    # Write lewat instance yang sama
+    test_db.insert_song("Baru", "Artis", "pop", "happy", "fast")
+    assert store.refresh_if_changed() is True
+    assert store.snapshot.version == first.version + 1
+    assert len(store.snapshot.songs) == len(first.songs) + 1
+    
+    # Write lewat koneksi lain (proses lain)
+    other = sqlite3.connect(test_db.db_url)
+    other.execute("UPDATE songs SET title = 'Diubah' WHERE id = 1")
+    other.commit()
+    other.close()
+    
+    assert store.refresh_if_changed() is True
+    assert store.snapshot.by_id[1]['title'] == 'Diubah'
+    
+    # Snapshot lama tidak berubah
+    assert len(first.songs) == len(store.snapshot.songs) - 1
+
+
+def test_extended_matches_rebuild(test_db):
+    """Test snapshot yang di-extend memberi rekomendasi sama dengan build penuh"""
+    songs = test_db.get_all_songs()
+    base = CatalogSnapshot.build(songs[:-5], version=1)
+    extended = base.extended(test_db.get_song_columns(after_id=songs[-6]['id']), version=2)
+    rebuilt = CatalogSnapshot.build(songs, version=2)
+    
+    assert list(extended.songs) == songs
+    assert extended.genres == rebuilt.genres
+    assert len(base.songs) == len(songs) - 5
+    for mood in ("happy", "sedih", "chill"):
+        rows, _ = RuleEngine().select_candidates(mood, None, None, rebuilt.index)
+        profile = {"mood": mood, "genre": "pop", "tempo": "medium"}
+        expected = rebuilt.recommender.recommend_rows(profile, rows, 10)
+        actual = extended.recommender.recommend_rows(profile, rows, 10)
+        assert actual[0].tolist() == expected[0].tolist()
+
+
+def test_extended_grows_vocabulary(test_db):
+    """Test genre baru mendapat kolom one-hot sendiri tanpa encode ulang lagu lama"""
+    base = CatalogSnapshot.build(test_db.get_all_songs(), version=1)
+    song_id = test_db.insert_song("Take Five", "Dave Brubeck", "jazz", "happy", "fast")
+    extended = base.extended(test_db.get_song_columns(after_id=song_id - 1), version=2)
+    recommender = extended.recommender
+    
+    assert "jazz" in extended.genres and "jazz" not in base.genres
+    assert recommender.feature_matrix.shape[1] == base.recommender.feature_matrix.shape[1] + 1
+    row = extended.songs.rows[song_id]
+    assert recommender.feature_matrix[row, len(recommender.mood_list) + recommender.genre_encoder["jazz"]] == 1.0
+    
+    profile = {"mood": "happy", "genre": "jazz", "tempo": "fast"}
+    rows, _ = RuleEngine().select_candidates("happy", "jazz", "fast", extended.index)
+    positions, scores = recommender.recommend_rows(profile, rows, 1)
+    assert rows[positions[0]] == row
+    assert scores[0] == pytest.approx(1.0)
+
+
+def test_store_appends_new_songs(test_db):
+    """Test insert_song ditambahkan incremental, perubahan lain memicu load penuh"""
+    store = CatalogStore(test_db, precompute_table=False)
+    first = store.load()
+    
+    song_id = test_db.insert_song("Baru", "Artis", "pop", "happy", "fast")
+    assert store.append() is True
+    assert store.snapshot.version == first.version + 1
+    assert store.snapshot.by_id[song_id]['title'] == "Baru"
+    assert store.has_changed() is False
+    
+    other = sqlite3.connect(test_db.db_url)
+    other.execute("UPDATE songs SET title = 'Diubah' WHERE id = 1")
+    other.commit()
+    other.close()
+    
+    assert store.append() is False
+    assert store.refresh_if_changed() is True
+    assert store.snapshot.by_id[1]['title'] == 'Diubah'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
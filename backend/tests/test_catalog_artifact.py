@@ -0,0 +1,200 @@
+"""
+Tests untuk compiled catalog artifact (memmap)
+"""
+import pytest
+import os
+import sqlite3
+import sys
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.init_db import init_database
+from db.compile_catalog import compile_catalog
+from services.catalog import CatalogSnapshot, CatalogStore
+from services.catalog_artifact import CatalogArtifact, write_catalog_artifact
+from services.song_catalog import SongCatalog
+from services.rule_engine import RuleEngine
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database"""
+    test_db_path = "test_catalog_artifact.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    db.insert_song("Feature Song", "Artist", "pop", "happy", "fast",
+                   features={"energy": 0.9, "valence": 0.7})
+    
+    yield db
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+@pytest.fixture
+def artifact_path(test_db, tmp_path):
+    path = str(tmp_path / "catalog.bin")
+    compile_catalog(test_db.db_url, path)
+    return path
+
+
+def test_round_trip(test_db, artifact_path):
+    """Test setiap row artifact sama dengan song dari database"""
+    artifact = CatalogArtifact(artifact_path)
+    songs = test_db.get_all_songs()
+    
+    assert len(artifact) == len(songs)
+    assert isinstance(artifact.feature_matrix, np.memmap)
+    catalog = SongCatalog.from_artifact(artifact)
+    for row, song in enumerate(songs):
+        assert catalog.song(row) == song
+
+
+def test_snapshot_matches_database(test_db, artifact_path):
+    """Test snapshot dari artifact memberi rekomendasi yang sama"""
+    from_db = CatalogSnapshot.build(test_db.get_all_songs(), version=1)
+    from_artifact = CatalogSnapshot.from_artifact(CatalogArtifact(artifact_path), version=1)
+    
+    assert from_artifact.genres == from_db.genres
+    assert np.array_equal(from_artifact.recommender.feature_matrix, from_db.recommender.feature_matrix)
+    assert from_artifact.by_id[5] == from_db.by_id[5]
+    
+    engine = RuleEngine()
+    for mood in RuleEngine.MOOD_RULES:
+        for genre in (None, "pop", "indie"):
+            expected_rows, expected_scores = engine.select_candidates(mood, genre, None, from_db.index)
+            rows, scores = engine.select_candidates(mood, genre, None, from_artifact.index)
+            assert rows.tolist() == expected_rows.tolist()
+            assert scores.tolist() == expected_scores.tolist()
+            
+            profile = {"mood": mood, "genre": genre or "pop", "tempo": "medium"}
+            expected = from_db.recommender.recommend_rows(profile, expected_rows, 10)
+            actual = from_artifact.recommender.recommend_rows(profile, rows, 10)
+            assert actual[0].tolist() == expected[0].tolist()
+            assert actual[1].tolist() == expected[1].tolist()
+
+
+def test_store_uses_artifact_until_database_changes(test_db, artifact_path):
+    """Test CatalogStore memakai artifact selama sesuai dengan database"""
+    store = CatalogStore(test_db, artifact_path=artifact_path, incremental=False)
+    assert store.load().source == "artifact"
+    
+    test_db.insert_song("New Song", "Artist", "rock", "semangat", "fast")
+    assert store.refresh_if_changed()
+    assert store.snapshot.source == "database"
+    assert len(store.snapshot.songs) == len(test_db.get_all_songs())
+
+
+def test_store_ignores_artifact_after_update(test_db, artifact_path):
+    """Test UPDATE row (jumlah dan id terbesar sama) membuat artifact tidak dipakai"""
+    store = CatalogStore(test_db, artifact_path=artifact_path, incremental=False)
+    assert store.load().source == "artifact"
+    
+    # Write dari proses lain, seperti upsert bulk ingest
+    other = sqlite3.connect(test_db.db_url)
+    other.execute("UPDATE songs SET title = 'Renamed', genre = 'jazz' WHERE id = 1")
+    other.commit()
+    other.close()
+    
+    assert store.refresh_if_changed()
+    assert store.snapshot.source == "database"
+    assert store.snapshot.by_id[1]["title"] == "Renamed"
+    assert "jazz" in store.snapshot.genres
+
+
+def test_store_appends_to_artifact(test_db, artifact_path):
+    """Test lagu baru ditambahkan di atas snapshot artifact"""
+    store = CatalogStore(test_db, artifact_path=artifact_path)
+    assert store.load().source == "artifact"
+    
+    song_id = test_db.insert_song("New Song", "Artist", "rock", "semangat", "fast")
+    assert store.refresh_if_changed()
+    assert store.snapshot.source == "artifact"
+    assert list(store.snapshot.songs) == test_db.get_all_songs()
+    assert store.snapshot.by_id[song_id]["title"] == "New Song"
+
+
+def test_store_ignores_artifact_with_other_weights(test_db, artifact_path):
+    """Test artifact dengan bobot feature berbeda tidak dipakai"""
+    store = CatalogStore(test_db, feature_weights={"genre": 2.0}, artifact_path=artifact_path)
+    assert store.load().source == "database"
+
+
+def test_signature_ignores_noop_update(test_db):
+    """Test upsert tanpa perubahan isi tidak mengubah signature"""
+    before = test_db.get_catalog_signature()
+    conn = test_db.connect()
+    conn.execute("UPDATE songs SET title = title WHERE id = 1")
+    conn.commit()
+    assert test_db.get_catalog_signature() == before
+    
+    conn.execute("DELETE FROM songs WHERE id = 2")
+    conn.commit()
+    assert test_db.get_catalog_signature()["changes"] == before["changes"] + 1
+
+
+def test_invalid_artifact(tmp_path):
+    """Test file yang bukan artifact ditolak"""
+    path = tmp_path / "bad.bin"
+    path.write_bytes(b"not a catalog")
+    with pytest.raises(ValueError):
+        CatalogArtifact(str(path))
+
+
+def test_failed_write_keeps_old_artifact(test_db, artifact_path, monkeypatch):
+    """Test write yang gagal tidak meninggalkan file sementara dan artifact lama tetap utuh"""
+    import services.catalog_artifact as catalog_artifact
+    
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+    
+    monkeypatch.setattr(catalog_artifact.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        write_catalog_artifact(artifact_path, test_db.get_all_songs() * 2)
+    monkeypatch.undo()
+    
+    assert os.listdir(os.path.dirname(artifact_path)) == ["catalog.bin"]
+    assert len(CatalogArtifact(artifact_path)) == len(test_db.get_all_songs())
+
+
+def test_concurrent_writes_use_separate_temp_files(tmp_path):
+    """Test dua compile bersamaan tidak berbagi file sementara"""
+    import threading
+    path = str(tmp_path / "catalog.bin")
+    songs = [{"id": i, "title": f"Song {i}", "artist": "Artist", "genre": "pop", "mood": "happy",
+              "tempo": "fast", "spotify_id": None, "features": None} for i in range(1, 2001)]
+    errors = []
+    
+    def write():
+        try:
+            for _ in range(5):
+                write_catalog_artifact(path, songs)
+        except Exception as e:
+            errors.append(e)
+    
+    writers = [threading.Thread(target=write) for _ in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    
+    assert not errors
+    assert os.listdir(tmp_path) == ["catalog.bin"]
+    assert len(CatalogArtifact(path)) == len(songs)
+
+
+def test_empty_catalog(tmp_path):
+    """Test artifact dari katalog kosong"""
+    path = str(tmp_path / "empty.bin")
+    write_catalog_artifact(path, [])
+    snapshot = CatalogSnapshot.from_artifact(CatalogArtifact(path))
+    assert len(snapshot.songs) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -4,6 +4,8 @@ Tests untuk database operations
 import pytest
 import os
 import sys
+import threading
+import time
 from pathlib import Path
 
 # Add parent directory to path
@@ -180,5 +182,142 @@ def test_spotify_id_coverage(test_db):
         f"Minimal 80% lagu harus memiliki spotify_id, found {coverage:.1f}%"
 
 
+def test_list_songs_keyset_pagination(test_db):
+    """Test halaman keyset berurutan tanpa duplikat dan sesuai filter"""
+    pages = []
+    after_id = None
+    while True:
+        page = test_db.list_songs(tempo="slow", after_id=after_id, limit=4)
+        if not page:
+            break
+        pages.append(page)
+        after_id = page[-1]['id']
+    
+    ids = [song['id'] for page in pages for song in page]
+    expected = [song['id'] for song in test_db.get_all_songs() if song['tempo'] == "slow"]
+    assert ids == sorted(expected)
+    assert all(len(page) <= 4 for page in pages)
+    assert 'features' not in pages[0][0]
+    
+    filtered = test_db.list_songs(genre="rock", mood="semangat", tempo="fast")
+    assert filtered and all((song['genre'], song['mood'], song['tempo']) == ("rock", "semangat", "fast")
+                            for song in filtered)
+
+
+def test_search_songs(test_db):
+    """Test full-text search title/artist dengan prefix dan diakritik"""
+    assert test_db.search_songs("adele")[0]['artist'] == "Adele"
+    assert test_db.search_songs("someone lik")[0]['title'] == "Someone Like You"
+    assert test_db.search_songs('AND OR "(') == []
+    assert test_db.search_songs("   ") == []
+    
+    song_id = test_db.insert_song("Déjà Vu", "Beyoncé", "pop", "happy", "fast")
+    assert [song['id'] for song in test_db.search_songs("beyonce deja")] == [song_id]
+
+
+def test_search_index_synced_by_triggers(test_db):
+    """Test FTS index mengikuti update dan delete di tabel songs"""
+    song_id = test_db.insert_song("Original Title", "Someone", "pop", "happy", "fast")
+    conn = test_db.connect()
+    conn.execute("UPDATE songs SET title = 'Renamed Track' WHERE id = ?", (song_id,))
+    conn.commit()
+    
+    assert test_db.search_songs("original") == []
+    assert test_db.search_songs("renamed")[0]['id'] == song_id
+    
+    conn.execute("DELETE FROM songs WHERE id = ?", (song_id,))
+    conn.commit()
+    assert test_db.search_songs("renamed") == []
+
+
+def test_ensure_search_index_on_existing_database(test_db):
+    """Test database lama tanpa FTS index di-index saat ensure_search_index"""
+    conn = test_db.connect()
+    for name in ("songs_fts_insert", "songs_fts_delete", "songs_fts_update"):
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DROP TABLE songs_fts")
+    conn.commit()
+    
+    test_db.ensure_search_index()
+    
+    assert test_db.search_songs("adele")[0]['artist'] == "Adele"
+
+
+def test_connection_pragmas(test_db):
+    """Test koneksi dibuka dengan WAL dan synchronous=NORMAL"""
+    with test_db.reader() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert test_db.connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_reader_pool_bounded(test_db):
+    """Test pool memakai ulang koneksi dan tidak melebihi pool_size"""
+    with test_db.reader() as first:
+        pass
+    with test_db.reader() as again:
+        assert again is first
+    
+    db = Database(test_db.db_url, pool_size=2)
+    borrowed = []
+    released = threading.Event()
+    
+    def hold():
+        with db.reader() as conn:
+            borrowed.append(conn)
+            released.wait(5)
+    
+    holders = [threading.Thread(target=hold) for _ in range(2)]
+    for holder in holders:
+        holder.start()
+    waiter = threading.Thread(target=hold)
+    while len(borrowed) < 2:
+        time.sleep(0.01)
+    waiter.start()
+    waiter.join(0.1)
+    assert waiter.is_alive(), "Reader ketiga harus menunggu koneksi kembali ke pool"
+    released.set()
+    for thread in holders + [waiter]:
+        thread.join()
+    assert len(db._readers) == 2
+    assert borrowed[2] in borrowed[:2]
+    db.close()
+
+
+def test_concurrent_reads_and_writes(test_db):
+    """Test reader di banyak thread melihat lagu yang diinsert thread lain"""
+    errors = []
+    
+    def read_loop():
+        try:
+            for _ in range(50):
+                assert test_db.get_genres()
+                test_db.get_song_by_id(1)
+        except Exception as e:
+            errors.append(e)
+    
+    readers = [threading.Thread(target=read_loop) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    song_ids = [test_db.insert_song(f"Song {i}", "Artist", "pop", "happy", "fast") for i in range(10)]
+    for reader in readers:
+        reader.join()
+    
+    assert not errors
+    assert all(test_db.get_song_by_id(song_id) for song_id in song_ids)
+
+
+def test_data_version_detects_external_commit(test_db):
+    """Test PRAGMA data_version tetap berubah saat proses lain commit"""
+    version = test_db.get_data_version()
+    
+    other = Database(test_db.db_url)
+    other.insert_song("External", "Artist", "rock", "semangat", "fast")
+    other.close()
+    
+    assert test_db.get_data_version() != version
+    assert test_db.get_data_version()[1] == version[1]
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
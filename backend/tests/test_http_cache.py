@@ -0,0 +1,63 @@
+"""
+Tests untuk HTTP caching helper
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.http_cache import CatalogETags, VersionedValue, etag_matches
+from services.cache import MISSING
+
+
+def test_etag_shared_across_processes():
+    """Test ETag dari counter perubahan sama antar proses dan berubah bersama katalog"""
+    etags = CatalogETags(max_age=30)
+    other_worker = CatalogETags()
+    
+    # Versi per proses boleh berbeda; ETag hanya bergantung pada state database
+    assert etags.etag(7, 100, 1) == other_worker.etag(7, 100, 3)
+    assert etags.etag(7, 100, 1) != etags.etag(8, 100, 2)
+    assert etags.etag(7, 100, 1) != etags.etag(7, 101, 1)
+    assert etags.headers(etags.etag(7, 100, 1)) == {
+        "ETag": etags.etag(7, 100, 1), "Cache-Control": "public, max-age=30"
+    }
+    assert etags.headers(None) == {"Cache-Control": "no-cache"}
+
+
+def test_etag_fallback_without_counter():
+    """Test database tanpa counter memakai versi per proses dengan epoch acak"""
+    etags = CatalogETags()
+    
+    assert etags.etag(None, 100, 1) == etags.etag(None, 100, 1)
+    assert etags.etag(None, 100, 1) != etags.etag(None, 100, 2)
+    assert etags.etag(None, 100, 1) != CatalogETags().etag(None, 100, 1)
+
+
+def test_etag_matches():
+    """Test If-None-Match dengan weak comparison dan daftar ETag"""
+    etag = 'W/"abc-3"'
+    
+    assert etag_matches('W/"abc-3"', etag)
+    assert etag_matches('"abc-3"', etag)
+    assert etag_matches('"x-1", W/"abc-3"', etag)
+    assert not etag_matches('W/"abc-2"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_versioned_value():
+    """Test nilai miss saat versi berubah dan versi lama tidak menimpa"""
+    value = VersionedValue()
+    assert value.get(1) is MISSING
+    
+    value.set(2, ["pop"])
+    assert value.get(2) == ["pop"]
+    assert value.get(3) is MISSING
+    
+    value.set(1, ["stale"])
+    assert value.get(2) == ["pop"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
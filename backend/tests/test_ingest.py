@@ -0,0 +1,127 @@
+"""
+Tests untuk streaming bulk ingest
+"""
+import pytest
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.ingest import ingest_file, ingest_songs, read_songs
+from db.init_db import create_schema
+
+
+def _write_jsonl(path, songs):
+    with open(path, "w", encoding="utf-8") as f:
+        for song in songs:
+            f.write(json.dumps(song) + "\n")
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ingest.db")
+
+
+def test_ingest_jsonl(tmp_path, db_path):
+    """Test JSON Lines di-ingest lengkap dengan features"""
+    source = tmp_path / "songs.jsonl"
+    _write_jsonl(source, [
+        {"title": "A", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "fast",
+         "spotify_id": "sp1", "features": {"energy": 0.9}},
+        {"title": "B", "artist": "Y", "genre": "indie", "mood": "sedih", "tempo": "slow"},
+    ])
+    
+    stats = ingest_file(str(source), db_path, batch_size=1)
+    
+    assert stats["rows"] == 2 and stats["inserted"] == 2 and stats["skipped"] == 0
+    songs = Database(db_path).get_all_songs()
+    assert [song["title"] for song in songs] == ["A", "B"]
+    assert songs[0]["features"] == {"energy": 0.9}
+    assert songs[1]["spotify_id"] is None
+
+
+def test_upsert_on_spotify_id(tmp_path, db_path):
+    """Test spotify_id yang sudah ada di-update, bukan diduplikasi"""
+    source = tmp_path / "songs.jsonl"
+    _write_jsonl(source, [
+        {"title": "Old", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "fast", "spotify_id": "sp1"},
+        {"title": "Other", "artist": "Y", "genre": "rock", "mood": "semangat", "tempo": "fast"},
+    ])
+    ingest_file(str(source), db_path)
+    song_id = Database(db_path).get_all_songs()[0]["id"]
+    
+    _write_jsonl(source, [
+        {"title": "New", "artist": "X", "genre": "indie", "mood": "galau", "tempo": "slow", "spotify_id": "sp1"},
+        {"title": "Other", "artist": "Y", "genre": "rock", "mood": "semangat", "tempo": "fast"},
+    ])
+    stats = ingest_file(str(source), db_path)
+    
+    assert stats["inserted"] == 1 and stats["updated"] == 1
+    song = Database(db_path).get_song_by_id(song_id)
+    assert (song["title"], song["genre"], song["tempo"]) == ("New", "indie", "slow")
+    assert len(Database(db_path).get_all_songs()) == 3
+
+
+def test_ingest_csv(tmp_path, db_path):
+    """Test CSV dengan kolom numeric feature digabung ke features"""
+    source = tmp_path / "songs.csv"
+    source.write_text(
+        "title,artist,genre,mood,tempo,spotify_id,energy,bpm\n"
+        "A,X,pop,happy,fast,sp1,0.8,128\n"
+        "B,Y,indie,sedih,slow,,,\n",
+        encoding="utf-8",
+    )
+    
+    ingest_file(str(source), db_path)
+    
+    songs = Database(db_path).get_all_songs()
+    assert songs[0]["tempo"] == "fast"
+    assert songs[0]["features"] == {"energy": 0.8, "bpm": 128.0}
+    assert songs[1]["features"] is None and songs[1]["spotify_id"] is None
+
+
+def test_invalid_rows_skipped(db_path):
+    """Test row tanpa kolom wajib atau dengan tempo tidak valid dilewati"""
+    conn = sqlite3.connect(db_path)
+    create_schema(conn)
+    songs = iter([
+        {"title": "A", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "fast"},
+        {"title": "", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "fast"},
+        {"title": "C", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "very fast"},
+    ])
+    
+    stats = ingest_songs(conn, songs, batch_size=2)
+    
+    assert stats["rows"] == 1 and stats["skipped"] == 2
+    assert conn.execute("SELECT COUNT(*) FROM songs").fetchone()[0] == 1
+    conn.close()
+
+
+def test_malformed_lines_skipped(tmp_path, db_path):
+    """Test baris JSON rusak atau bukan object dilewati tanpa membatalkan import"""
+    source = tmp_path / "songs.jsonl"
+    good = {"title": "A", "artist": "X", "genre": "pop", "mood": "happy", "tempo": "fast"}
+    with open(source, "w", encoding="utf-8") as f:
+        f.write(json.dumps(good) + "\n")
+        f.write('{"title": "broken", "artist": \n')
+        f.write('["not", "an", "object"]\n')
+        f.write("42\n")
+        f.write(json.dumps({**good, "title": "B"}) + "\n")
+    
+    stats = ingest_file(str(source), db_path)
+    
+    assert stats["rows"] == 2 and stats["skipped"] == 3
+    assert [song["title"] for song in Database(db_path).get_all_songs()] == ["A", "B"]
+
+
+def test_unsupported_format(tmp_path):
+    """Test ekstensi file yang tidak didukung"""
+    with pytest.raises(ValueError):
+        read_songs(str(tmp_path / "songs.xml"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -246,5 +246,146 @@ def test_similar_songs_higher_score(recommender, sample_songs):
     assert recommendations[1]["similarity_score"] > recommendations[2]["similarity_score"]
 
 
+
+def test_feature_matrix_matches_cosine_similarity(recommender, sample_songs):
+    """Test bahwa vectorized scoring sama dengan compute_similarity per lagu"""
+    recommender.build_encoders(sample_songs)
+    
+    assert recommender.feature_matrix.shape == (len(sample_songs), len(recommender.encode_features(sample_songs[0])))
+    assert recommender.feature_matrix.dtype == np.float32
+    
+    user_profile = {"mood": "sedih", "genre": "indie", "tempo": "slow"}
+    user_vector = recommender.encode_features(user_profile)
+    
+    scores = recommender.score_candidates(user_profile, sample_songs)
+    
+    for song, score in zip(sample_songs, scores):
+        expected = recommender.compute_similarity(user_vector, recommender.encode_features(song))
+        assert score == expected
+
+
+def test_score_candidates_outside_catalog(recommender, sample_songs):
+    """Test bahwa kandidat yang tidak ada di katalog tetap di-score dengan benar"""
+    recommender.build_encoders(sample_songs)
+    
+    user_profile = {"mood": "happy", "genre": "pop", "tempo": "fast"}
+    user_vector = recommender.encode_features(user_profile)
+    candidates = [
+        {"id": 99, "genre": "pop", "mood": "happy", "tempo": "fast"},
+        {"id": 2, "genre": "indie", "mood": "sedih", "tempo": "medium"},  # id ada, atribut beda
+    ]
+    
+    scores = recommender.score_candidates(user_profile, candidates)
+    
+    for song, score in zip(candidates, scores):
+        expected = recommender.compute_similarity(user_vector, recommender.encode_features(song))
+        assert score == pytest.approx(expected, abs=1e-6)
+
+
+def test_top_k_indices_matches_stable_sort():
+    """Test bahwa top-k selection identik dengan stable sort (termasuk ties)"""
+    rng = np.random.default_rng(42)
+    scores = rng.choice([0.2, 0.5, 0.5, 0.8, 1.0], size=200)
+    
+    expected = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    
+    for k in [1, 5, 20, 199, 200, 500]:
+        result = KNNRecommender.top_k_indices(scores, k)
+        assert list(result) == expected[:k]
+
+
+def test_recommend_does_not_mutate_candidates(recommender, sample_songs):
+    """Test bahwa recommend tidak mengubah dict kandidat"""
+    recommender.build_encoders(sample_songs)
+    
+    user_profile = {"mood": "sedih", "genre": "indie", "tempo": "slow"}
+    recommender.recommend(user_profile, sample_songs, k=3)
+    
+    for song in sample_songs:
+        assert "similarity_score" not in song
+
+
+def test_recommend_many_matches_recommend_rows(recommender, sample_songs):
+    """Test batch scoring (matrix-matrix product) identik dengan per profile"""
+    recommender.build_encoders(sample_songs)
+    all_rows = np.arange(len(sample_songs))
+    profiles = [
+        {"mood": "sedih", "genre": "ballad", "tempo": "slow"},
+        {"mood": "happy", "genre": "pop", "tempo": "fast"},
+        {"mood": "sedih", "genre": "ballad", "tempo": "slow"},
+        {"mood": "unknown", "genre": "unknown", "tempo": "medium"},
+    ]
+    row_sets = [all_rows, all_rows[::2], all_rows[1:], np.zeros(0, dtype=np.int64)]
+    
+    for max_block in (1, 1 << 22):
+        results = recommender.recommend_many(profiles, row_sets, k=3, max_block=max_block)
+        for profile, rows, (positions, scores) in zip(profiles, row_sets, results):
+            expected_positions, expected_scores = recommender.recommend_rows(profile, rows, k=3)
+            assert positions.tolist() == expected_positions.tolist()
+            assert scores.tolist() == expected_scores.tolist()
+
+
+def _songs_with_features():
+    """Lagu dengan kategori identik yang hanya dibedakan audio features"""
+    songs = []
+    for i, (energy, valence) in enumerate([(0.1, 0.2), (0.9, 0.8), (0.85, 0.9), (0.2, 0.1)]):
+        songs.append({"id": i + 1, "title": f"Song {i + 1}", "genre": "pop", "mood": "happy",
+                      "tempo": "fast", "features": {"energy": energy, "valence": valence}})
+    songs.append({"id": 5, "title": "Song 5", "genre": "rock", "mood": "sedih",
+                  "tempo": "slow", "features": None})
+    return songs
+
+
+def test_audio_features_break_ties():
+    """Test numeric features membedakan lagu dengan mood/genre/tempo sama"""
+    recommender = KNNRecommender()
+    songs = _songs_with_features()
+    recommender.build_encoders(songs)
+    
+    assert recommender.audio.columns == ("energy", "valence")
+    assert recommender.feature_matrix.dtype == np.float32
+    
+    profile = {"mood": "happy", "genre": "pop", "tempo": "fast"}
+    scores = recommender.score_rows(profile, np.arange(4))
+    assert len(set(scores.tolist())) == 4
+    
+    # Matrix katalog konsisten dengan encode_features per lagu
+    for row, song in enumerate(songs[:4]):
+        expected = recommender.compute_similarity(recommender.encode_features(profile),
+                                                  recommender.encode_features(song))
+        assert scores[row] == pytest.approx(expected, abs=1e-6)
+
+
+def test_audio_weight_zero_matches_categorical_only(sample_songs):
+    """Test bobot audio 0 menghasilkan score yang sama dengan tanpa features"""
+    songs = _songs_with_features()
+    plain = KNNRecommender()
+    plain.build_encoders([{k: v for k, v in s.items() if k != "features"} for s in songs])
+    weighted = KNNRecommender({"audio": 0.0})
+    weighted.build_encoders(songs)
+    
+    profile = {"mood": "happy", "genre": "pop", "tempo": "medium"}
+    rows = np.arange(len(songs))
+    assert weighted.score_rows(profile, rows).tolist() == plain.score_rows(profile, rows).tolist()
+
+
+def test_block_weights():
+    """Test bobot block mengubah kontribusi genre"""
+    songs = [
+        {"id": 1, "genre": "pop", "mood": "happy", "tempo": "fast"},
+        {"id": 2, "genre": "rock", "mood": "happy", "tempo": "fast"},
+    ]
+    profile = {"mood": "happy", "genre": "rock", "tempo": "fast"}
+    
+    base = KNNRecommender()
+    base.build_encoders(songs)
+    heavy_genre = KNNRecommender({"genre": 3.0})
+    heavy_genre.build_encoders(songs)
+    
+    assert heavy_genre.score_rows(profile, np.array([0]))[0] < base.score_rows(profile, np.array([0]))[0]
+    
+    with pytest.raises(ValueError):
+        KNNRecommender({"loudness": 1.0})
+
 if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
+    pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+Tests untuk precomputed recommendation table
+"""
+import pytest
+import numpy as np
+import os
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.init_db import init_database
+from services.catalog import CatalogSnapshot, CatalogStore
+from services.recommendation_table import RecommendationTable
+from services.rule_engine import RuleEngine
+from services.song_catalog import SongCatalog
+
+
+@pytest.fixture
+def snapshot():
+    """Create a snapshot dari test database"""
+    test_db_path = "test_recommendation_table.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    songs = db.get_all_songs()
+    
+    yield CatalogSnapshot.build(songs, version=1)
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+def _live_recommend(snapshot, mood, genre, tempo, k):
+    """Jalur lama: filter_by_mood + KNNRecommender.recommend"""
+    engine = RuleEngine()
+    candidates = engine.filter_by_mood(mood, genre, tempo, snapshot.songs, snapshot.index)
+    if not candidates:
+        return []
+    user_profile = {
+        "mood": mood,
+        "genre": genre if genre else candidates[0]['genre'],
+        "tempo": tempo if tempo else candidates[0]['tempo']
+    }
+    return snapshot.recommender.recommend(user_profile, candidates, k)
+
+
+def test_table_covers_all_combinations(snapshot):
+    """Test tabel berisi semua mood x (genre|None) x (tempo|None)"""
+    table = RecommendationTable.build(snapshot)
+    
+    expected = len(RuleEngine.MOOD_RULES) * (len(snapshot.genres) + 1) * 4
+    assert len(table.entries) == expected
+    assert table.stats()["entries"] == expected
+    assert table.nbytes > 0
+
+
+def test_table_matches_live_path(snapshot):
+    """Test hasil tabel sama persis dengan filter_by_mood + recommend"""
+    table = RecommendationTable.build(snapshot)
+    
+    for (mood, genre, tempo) in table.entries:
+        for k in (1, 5, 20):
+            entry = table.lookup(mood, genre, tempo, k)
+            expected = _live_recommend(snapshot, mood, genre, tempo, k)
+            actual = entry.materialize(snapshot.by_id, k)
+            
+            assert [s['id'] for s in actual] == [s['id'] for s in expected]
+            assert [s['similarity_score'] for s in actual] == \
+                [s['similarity_score'] for s in expected]
+            assert [s['preliminary_score'] for s in actual] == \
+                [s['preliminary_score'] for s in expected]
+
+
+def test_lookup_misses(snapshot):
+    """Test genre di luar katalog atau k > max_k tidak ada di tabel"""
+    table = RecommendationTable.build(snapshot, max_k=10)
+    
+    assert table.lookup("happy", "polka", None, 5) is None
+    assert table.lookup("happy", None, None, 11) is None
+    assert table.lookup("happy", "", "", 5) is table.lookup("happy", None, None, 5)
+
+
+def test_materialize_does_not_mutate_catalog(snapshot):
+    """Test materialize mengembalikan copy, bukan song di snapshot"""
+    table = RecommendationTable.build(snapshot)
+    songs = table.lookup("happy", None, None, 5).materialize(snapshot.by_id, 5)
+    
+    for song in songs:
+        assert 'similarity_score' not in snapshot.by_id[song['id']]
+
+
+def test_extended_table_matches_rebuild():
+    """Test tabel yang di-extend sama dengan build penuh dan hanya menghitung ulang sebagian"""
+    test_db_path = "test_recommendation_table_extend.db"
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    
+    try:
+        base = CatalogSnapshot.build(SongCatalog.from_columns(db.get_song_columns()), version=1)
+        table = RecommendationTable.build(base)
+        after_id = int(base.songs.ids.max())
+        db.insert_song("Bossa Song", "Artist", "bossa nova", "chill", "slow")
+        db.insert_song("Lo-fi Song", "Artist", "lo-fi", "chill", "slow")
+        snapshot = base.extended(db.get_song_columns(after_id=after_id), version=2)
+        
+        extended = table.extended(snapshot, len(base.songs))
+        _assert_tables_equal(extended, RecommendationTable.build(snapshot))
+        # Kombinasi yang tidak mengenai lagu baru dipakai ulang apa adanya
+        assert extended.entries[("semangat", "rock", "fast")] is table.entries[("semangat", "rock", "fast")]
+        assert extended.stats()["recomputed"] < len(extended.entries) // 4
+        
+        # Beberapa batch acak berturut-turut tetap sama dengan build penuh
+        rng = random.Random(11)
+        genres = list(snapshot.genres) + ["jazz"]
+        for batch in (1, 4, 30):
+            after_id = int(snapshot.songs.ids.max())
+            start = len(snapshot.songs)
+            for i in range(batch):
+                db.insert_song(f"Random {batch}-{i}", "Artist", rng.choice(genres),
+                               rng.choice(list(RuleEngine.MOOD_RULES)),
+                               rng.choice(RecommendationTable.TEMPOS),
+                               features={"energy": rng.random(), "valence": rng.random()})
+            snapshot = snapshot.extended(db.get_song_columns(after_id=after_id), version=3)
+            extended = extended.extended(snapshot, start)
+            _assert_tables_equal(extended, RecommendationTable.build(snapshot))
+    finally:
+        db.close()
+        os.remove(test_db_path)
+
+
+def _assert_tables_equal(table, expected):
+    assert table.entries.keys() == expected.entries.keys()
+    for key, entry in expected.entries.items():
+        other = table.entries[key]
+        assert other.user_profile == entry.user_profile, key
+        assert (other.candidates_count, other.strict_count) == \
+            (entry.candidates_count, entry.strict_count), key
+        assert np.array_equal(other.song_ids, entry.song_ids), key
+        assert np.allclose(other.similarity_scores, entry.similarity_scores), key
+        assert np.array_equal(other.preliminary_scores, entry.preliminary_scores), key
+
+
+def test_store_builds_table_on_load():
+    """Test CatalogStore membangun tabel setiap load (opsional)"""
+    test_db_path = "test_recommendation_table_store.db"
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    
+    try:
+        assert CatalogStore(db).load().table is not None
+        assert CatalogStore(db, precompute_table=False).load().table is None
+    finally:
+        db.close()
+        os.remove(test_db_path)
@@ -0,0 +1,62 @@
+"""
+Tests untuk recommendation response cache
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.response_cache import RecommendationCache
+from services.cache import MISSING
+
+
+def test_key_normalization():
+    """Test bahwa genre/tempo kosong sama dengan None"""
+    assert RecommendationCache.make_key("sedih", "", "", 5) == RecommendationCache.make_key("sedih", None, None, 5)
+    assert RecommendationCache.make_key("sedih", "pop", None, 5) != RecommendationCache.make_key("sedih", "pop", None, 6)
+
+
+def test_hit_and_version_invalidation():
+    """Test cache hit dan invalidasi saat versi katalog naik"""
+    cache = RecommendationCache(maxsize=10)
+    key = cache.make_key("happy", None, None, 5)
+    
+    cache.set(1, key, "response-v1")
+    assert cache.get(1, key) == "response-v1"
+    
+    # Versi baru: cache dikosongkan
+    assert cache.get(2, key) is MISSING
+    
+    # Request lama (versi 1) yang selesai belakangan tidak boleh mengisi cache
+    cache.set(1, key, "stale")
+    assert cache.get(2, key) is MISSING
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["catalog_version"] == 2
+
+
+def test_degraded_response_short_ttl():
+    """Test bahwa response dengan enrichment tidak lengkap memakai TTL pendek"""
+    cache = RecommendationCache(maxsize=10, ttl=300, degraded_ttl=-1)
+    key = cache.make_key("galau", None, None, 5)
+    
+    cache.set(1, key, "degraded", complete=False)
+    assert cache.get(1, key) is MISSING
+
+
+def test_lru_eviction():
+    """Test LRU eviction"""
+    cache = RecommendationCache(maxsize=2)
+    keys = [cache.make_key("chill", None, None, k) for k in range(1, 4)]
+    
+    for key in keys:
+        cache.set(1, key, key)
+    
+    assert cache.get(1, keys[0]) is MISSING
+    assert cache.get(1, keys[2]) == keys[2]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,11 +1,12 @@
 """Tests untuk rule engine"""
 import pytest
+import numpy as np
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from services.rule_engine import RuleEngine
+from services.rule_engine import CatalogIndex, RuleEngine
 
 
 @pytest.fixture
@@ -125,5 +126,125 @@ def test_empty_songs_list(rule_engine):
     assert candidates == []
 
 
+
+def _reference_filter(mood, genre, tempo, songs):
+    """Implementasi linear scan lama sebagai pembanding"""
+    preferences = RuleEngine.MOOD_RULES[mood]
+    target_genres = [genre] if genre else preferences["preferred_genres"]
+    target_tempos = [tempo] if tempo else preferences["preferred_tempo"]
+    
+    def score(song):
+        value = 0.0
+        if song['genre'] in target_genres:
+            value += 0.3
+        if song['tempo'] in target_tempos:
+            value += 0.2
+        if song['mood'] == mood:
+            value += 0.5
+        return value
+    
+    strict = [s for s in songs if s['genre'] in target_genres and s['tempo'] in target_tempos]
+    result = [(s['id'], score(s)) for s in strict]
+    if len(result) >= 10:
+        return result
+    strict_ids = {s['id'] for s in strict}
+    for s in songs:
+        if s['id'] not in strict_ids and (s['genre'] in target_genres or s['tempo'] in target_tempos):
+            result.append((s['id'], score(s)))
+    return result
+
+
+def test_index_matches_linear_scan(rule_engine):
+    """Test bahwa bitset index menghasilkan urutan dan score yang sama dengan linear scan"""
+    import random
+    rng = random.Random(7)
+    genres = ['indie', 'pop', 'rock', 'ballad', 'lo-fi', 'edm', 'jazz']
+    moods = list(RuleEngine.MOOD_RULES)
+    tempos = ['slow', 'medium', 'fast']
+    
+    for size in [5, 40, 300]:
+        songs = [
+            {"id": i, "genre": rng.choice(genres), "mood": rng.choice(moods), "tempo": rng.choice(tempos)}
+            for i in range(size)
+        ]
+        index = rule_engine.build_index(songs)
+        
+        for mood in moods:
+            for genre in [None, 'rock', 'jazz', 'unknown']:
+                for tempo in [None, 'slow', 'fast']:
+                    candidates = rule_engine.filter_by_mood(mood, genre, tempo, songs, index)
+                    result = [(c['id'], c['preliminary_score']) for c in candidates]
+                    assert result == _reference_filter(mood, genre, tempo, songs)
+
+
+def test_filter_without_index_sees_in_place_changes(rule_engine, sample_songs):
+    """Test filter_by_mood tanpa index tidak menyimpan state antar panggilan"""
+    rule_engine.filter_by_mood("happy", "jazz", "fast", sample_songs)
+    sample_songs[2] = {**sample_songs[2], "genre": "jazz"}
+    
+    candidates = rule_engine.filter_by_mood("happy", "jazz", "fast", sample_songs)
+    fresh = RuleEngine().filter_by_mood("happy", "jazz", "fast", sample_songs)
+    
+    assert candidates == fresh
+    assert candidates[0]['id'] == 3 and candidates[0]['preliminary_score'] == 0.5
+
+
+def test_prebuilt_index_reused(rule_engine, sample_songs, monkeypatch):
+    """Test index dari build_index dipakai tanpa build ulang"""
+    index = rule_engine.build_index(sample_songs)
+    builds = []
+    original = CatalogIndex.__init__
+    
+    def counting_init(self, songs):
+        builds.append(len(songs))
+        original(self, songs)
+    
+    monkeypatch.setattr(CatalogIndex, "__init__", counting_init)
+    
+    first = rule_engine.filter_by_mood("sedih", None, None, sample_songs, index)
+    second = rule_engine.filter_by_mood("sedih", None, None, sample_songs, index)
+    
+    assert builds == []
+    assert first == second == rule_engine.filter_by_mood("sedih", None, None, list(sample_songs))
+    assert builds == [8]
+
+
+def test_index_extended_matches_rebuild():
+    """Test CatalogIndex.extended sama dengan index yang di-build ulang"""
+    import random
+    rng = random.Random(3)
+    genres = ['indie', 'pop', 'rock']
+    songs = [
+        {"id": i, "genre": rng.choice(genres), "mood": "happy", "tempo": rng.choice(['slow', 'fast'])}
+        for i in range(21)
+    ]
+    
+    for split in [0, 8, 13, 21]:
+        base = CatalogIndex(songs[:split])
+        added = songs[split:] + [{"id": 99, "genre": "jazz", "mood": "chill", "tempo": "medium"}]
+        full = songs[:split] + added
+        columns = {}
+        for field in CatalogIndex.FIELDS:
+            vocab = sorted(set(song[field] for song in full))
+            codes = np.array([vocab.index(song[field]) for song in added])
+            columns[field] = (codes, vocab)
+        
+        extended = base.extended(full, columns)
+        expected = CatalogIndex(full)
+        for field in CatalogIndex.FIELDS:
+            assert extended.bitsets[field].keys() == expected.bitsets[field].keys()
+            for value, bits in expected.bitsets[field].items():
+                assert np.array_equal(extended.bitsets[field][value], bits)
+        assert base.size == split
+
+
+def test_filter_does_not_mutate_songs(rule_engine, sample_songs):
+    """Test bahwa filter_by_mood tidak mengubah dict lagu asli"""
+    rule_engine.build_index(sample_songs)
+    rule_engine.filter_by_mood("sedih", None, None, sample_songs)
+    
+    for song in sample_songs:
+        assert 'preliminary_score' not in song
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,118 @@
+"""
+Tests untuk columnar SongCatalog
+"""
+import pytest
+import numpy as np
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.init_db import init_database
+from services.catalog import CatalogSnapshot
+from services.song_catalog import RowLookup, SongCatalog
+
+
+@pytest.fixture
+def sample_songs():
+    return [
+        {"id": 7, "title": "Song A", "artist": "Artist", "genre": "pop", "mood": "happy",
+         "tempo": "fast", "spotify_id": "sp7", "features": {"energy": 0.9}, "created_at": None},
+        {"id": 3, "title": "Song B", "artist": "Artist", "genre": "indie", "mood": "sedih",
+         "tempo": "slow", "spotify_id": None, "features": None, "created_at": None},
+        {"id": 5, "title": "Song C", "artist": "Other", "genre": "pop", "mood": "chill",
+         "tempo": "medium", "spotify_id": None, "features": None, "created_at": None},
+    ]
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database"""
+    test_db_path = "test_song_catalog.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    db.insert_song("Feature Song", "Artist", "pop", "happy", "fast",
+                   features={"energy": 0.9, "valence": 0.7})
+    
+    yield db
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+def test_round_trip(sample_songs):
+    """Test setiap row kembali menjadi song dict yang sama"""
+    catalog = SongCatalog.from_songs(sample_songs)
+    
+    assert len(catalog) == 3
+    assert list(catalog) == sample_songs
+    assert catalog[-1] == sample_songs[-1]
+    with pytest.raises(IndexError):
+        catalog[3]
+
+
+def test_columns_are_compact(sample_songs):
+    """Test kategori disimpan sebagai code kecil dan string di-intern"""
+    catalog = SongCatalog.from_songs(sample_songs)
+    
+    assert catalog.ids.dtype == np.int64
+    assert catalog.codes["genre"].dtype == np.int16
+    assert catalog.vocabularies["genre"] == ["indie", "pop"]
+    assert catalog.codes["genre"].tolist() == [1, 0, 1]
+    assert catalog.strings["artist"][0] is catalog.strings["artist"][1]
+    assert catalog.value("mood", 2) == "chill"
+    assert catalog.value("title", 1) == "Song B"
+
+
+def test_by_id(sample_songs):
+    """Test by_id membuat dict saat diakses dan tidak menemukan id asing"""
+    catalog = SongCatalog.from_songs(sample_songs)
+    
+    assert catalog.rows[5] == 2
+    assert catalog.by_id[3]["title"] == "Song B"
+    assert 4 not in catalog.by_id
+    assert "7" not in catalog.by_id
+    assert sorted(catalog.by_id) == [3, 5, 7]
+
+
+def test_invalid_features_json():
+    """Test features JSON rusak menjadi None seperti get_all_songs"""
+    catalog = SongCatalog.from_columns({
+        "id": [1], "title": ["T"], "artist": ["A"], "genre": ["pop"], "mood": ["happy"],
+        "tempo": ["fast"], "features": ["{not json"],
+    })
+    
+    assert catalog.song(0)["features"] is None
+    assert catalog.song(0)["spotify_id"] is None
+
+
+def test_database_columns(test_db):
+    """Test get_song_columns menghasilkan katalog yang sama dengan get_all_songs"""
+    catalog = SongCatalog.from_columns(test_db.get_song_columns())
+    
+    assert list(catalog) == test_db.get_all_songs()
+
+
+def test_snapshot_uses_catalog(test_db):
+    """Test snapshot menyimpan SongCatalog dan tetap memberi song dict"""
+    songs = test_db.get_all_songs()
+    snapshot = CatalogSnapshot.build(songs)
+    
+    assert isinstance(snapshot.songs, SongCatalog)
+    assert snapshot.by_id[songs[0]["id"]] == songs[0]
+    assert snapshot.genres == tuple(sorted(set(song["genre"] for song in songs)))
+
+
+def test_row_lookup_unsorted_ids():
+    """Test lookup id -> row untuk ids yang tidak urut"""
+    lookup = RowLookup(np.array([30, 10, 20], dtype=np.int64))
+    
+    assert lookup[10] == 1
+    assert lookup.get(30) == 0
+    assert lookup.get(15, -1) == -1
+    assert lookup.get("10", -1) == -1
+    assert list(lookup) == [30, 10, 20]
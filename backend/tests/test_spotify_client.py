@@ -0,0 +1,604 @@
+"""
+Tests untuk Spotify client (menggunakan stub HTTP server lokal)
+"""
+import pytest
+import asyncio
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.spotify_client import SpotifyClient, AsyncSpotifyClient
+from services.cache import TTLCache, MISSING
+from services.resilience import CircuitBreaker
+
+
+def make_track(spotify_id):
+    return {
+        "id": spotify_id,
+        "preview_url": f"https://p.scdn.co/mp3-preview/{spotify_id}",
+        "duration_ms": 200000,
+        "album": {"images": [{"url": f"https://i.scdn.co/image/{spotify_id}"}]}
+    }
+
+
+class StubSpotifyHandler(BaseHTTPRequestHandler):
+    """Stub untuk accounts.spotify.com dan api.spotify.com"""
+    
+    def log_message(self, *args):
+        pass
+    
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_POST(self):
+        server = self.server
+        server.requests.append(("POST", self.path))
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if server.token_delay:
+            time.sleep(server.token_delay)
+        token = f"stub-token-{len([r for r in server.requests if r[0] == 'POST'])}"
+        self._send_json(200, {"access_token": token, "expires_in": server.token_expires_in})
+    
+    def do_GET(self):
+        server = self.server
+        server.requests.append(("GET", self.path))
+        url = urlparse(self.path)
+        
+        if server.delay:
+            time.sleep(server.delay)
+        
+        if server.status != 200:
+            self._send_json(server.status, {"error": "stub"}, {"Retry-After": "1"})
+            return
+        
+        if url.path == "/v1/tracks":
+            ids = parse_qs(url.query)["ids"][0].split(",")
+            tracks = [make_track(i) if i in server.known_ids else None for i in ids]
+            self._send_json(200, {"tracks": tracks})
+        elif url.path.startswith("/v1/tracks/"):
+            spotify_id = url.path.rsplit("/", 1)[1]
+            if spotify_id in server.known_ids:
+                self._send_json(200, make_track(spotify_id))
+            else:
+                self._send_json(404, {"error": "not found"})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+
+@pytest.fixture
+def stub_server():
+    """Start stub Spotify server di port random"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSpotifyHandler)
+    server.requests = []
+    server.known_ids = {f"track{i}" for i in range(120)}
+    server.status = 200
+    server.token_expires_in = 3600
+    server.token_delay = 0
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    
+    yield server
+    
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub_server):
+    """SpotifyClient yang diarahkan ke stub server"""
+    base = f"http://127.0.0.1:{stub_server.server_address[1]}"
+    spotify = SpotifyClient("client-id", "client-secret")
+    spotify.AUTH_URL = f"{base}/api/token"
+    spotify.API_BASE_URL = f"{base}/v1"
+    return spotify
+
+
+def api_calls(server):
+    return [path for method, path in server.requests if method == "GET"]
+
+
+def token_calls(server):
+    return [path for method, path in server.requests if method == "POST"]
+
+
+def test_get_track_preview(client, stub_server):
+    """Test single track lookup"""
+    data = client.get_track_preview("track1")
+    
+    assert data["preview_url"] == "https://p.scdn.co/mp3-preview/track1"
+    assert data["cover_url"] == "https://i.scdn.co/image/track1"
+    assert data["duration_ms"] == 200000
+
+
+def test_get_tracks_preview_single_call(client, stub_server):
+    """Test bahwa 20 ID di-enrich dengan satu request"""
+    ids = [f"track{i}" for i in range(20)]
+    
+    results = client.get_tracks_preview(ids)
+    
+    assert list(results) == ids
+    assert all(results[i]["preview_url"].endswith(i) for i in ids)
+    assert len(api_calls(stub_server)) == 1
+
+
+def test_get_tracks_preview_chunks_and_misses(client, stub_server):
+    """Test chunking per 50 ID, dedup, dan ID yang tidak dikenal"""
+    ids = [f"track{i}" for i in range(110)] + ["track0", "unknown"]
+    
+    results = client.get_tracks_preview(ids)
+    
+    assert len(results) == 111
+    assert results["unknown"] is None
+    assert results["track109"]["cover_url"] == "https://i.scdn.co/image/track109"
+    assert len(api_calls(stub_server)) == 3
+
+
+def test_get_tracks_preview_error(client, stub_server):
+    """Test bahwa error dari Spotify menghasilkan None untuk semua ID"""
+    stub_server.status = 500
+    
+    results = client.get_tracks_preview(["track1", "track2"])
+    
+    assert results == {"track1": None, "track2": None}
+
+
+def test_disabled_client():
+    """Test client tanpa credentials tidak melakukan request"""
+    spotify = SpotifyClient()
+    
+    assert spotify.get_track_preview("track1") is None
+    assert spotify.get_tracks_preview(["track1"]) == {"track1": None}
+
+
+
+def test_track_cache_hit(client, stub_server):
+    """Test bahwa lookup kedua dilayani dari cache"""
+    client.get_track_preview("track1")
+    client.get_tracks_preview(["track1", "track2"])
+    client.get_tracks_preview(["track1", "track2"])
+    
+    # track1 sekali (single), track2 sekali (batch)
+    assert api_calls(stub_server) == ["/v1/tracks/track1", "/v1/tracks?ids=track2"]
+    stats = client.cache_stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+
+
+def test_negative_result_cached(client, stub_server):
+    """Test bahwa 404 di-cache dengan TTL pendek"""
+    assert client.get_track_preview("unknown") is None
+    assert client.get_track_preview("unknown") is None
+    assert len(api_calls(stub_server)) == 1
+    
+    # Setelah negative TTL habis, request diulang
+    client.negative_ttl = 0
+    client.track_cache.clear()
+    assert client.get_tracks_preview(["unknown"]) == {"unknown": None}
+    assert client.get_tracks_preview(["unknown"]) == {"unknown": None}
+    assert len(api_calls(stub_server)) == 3
+
+
+def test_errors_not_cached(client, stub_server):
+    """Test bahwa error server tidak di-cache"""
+    stub_server.status = 500
+    client.get_track_preview("track1")
+    stub_server.status = 200
+    
+    assert client.get_track_preview("track1")["preview_url"].endswith("track1")
+    assert len(api_calls(stub_server)) == 2
+
+
+def test_cache_lru_eviction():
+    """Test LRU eviction dan TTL expiry"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is MISSING
+
+
+def test_persistent_cache_survives_restart(stub_server, tmp_path):
+    """Test bahwa persistent tier dipakai oleh client baru (restart)"""
+    base = f"http://127.0.0.1:{stub_server.server_address[1]}"
+    cache_path = str(tmp_path / "spotify_cache.db")
+    
+    def make_client():
+        spotify = SpotifyClient("client-id", "client-secret", cache_path=cache_path)
+        spotify.AUTH_URL = f"{base}/api/token"
+        spotify.API_BASE_URL = f"{base}/v1"
+        return spotify
+    
+    first = make_client()
+    first.get_tracks_preview(["track1", "track2"])
+    
+    second = make_client()
+    results = second.get_tracks_preview(["track1", "track2"])
+    
+    assert results["track2"]["cover_url"] == "https://i.scdn.co/image/track2"
+    assert len(api_calls(stub_server)) == 1
+
+
+def make_async_client(server, **kwargs):
+    """AsyncSpotifyClient yang diarahkan ke stub server (dibuat di dalam event loop)"""
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    spotify = AsyncSpotifyClient("client-id", "client-secret", **kwargs)
+    spotify.AUTH_URL = f"{base}/api/token"
+    spotify.API_BASE_URL = f"{base}/v1"
+    return spotify
+
+
+def test_async_get_tracks_preview(stub_server):
+    """Test async batch lookup memakai pool dan cache yang sama"""
+    async def run():
+        spotify = make_async_client(stub_server)
+        try:
+            ids = [f"track{i}" for i in range(110)] + ["unknown"]
+            first = await spotify.get_tracks_preview(ids)
+            second = await spotify.get_tracks_preview(ids)
+            single = await spotify.get_track_preview("track5")
+            return first, second, single
+        finally:
+            await spotify.aclose()
+    
+    first, second, single = asyncio.run(run())
+    
+    assert first == second
+    assert first["unknown"] is None
+    assert first["track100"]["preview_url"].endswith("track100")
+    assert single == first["track5"]
+    # 3 chunk request, sisanya dari cache
+    assert len(api_calls(stub_server)) == 3
+
+
+def test_async_persistent_cache_write_behind(stub_server, tmp_path):
+    """Test async client menulis persistent cache sekali per batch, di luar event loop"""
+    cache_path = str(tmp_path / "spotify_cache.db")
+    writes = []
+    
+    async def run():
+        spotify = make_async_client(stub_server, cache_path=cache_path)
+        store = spotify.track_cache.store
+        original = store.set_many
+        loop_thread = threading.get_ident()
+        
+        def tracked_set_many(entries):
+            entries = list(entries)
+            writes.append((len(entries), threading.get_ident() != loop_thread))
+            original(entries)
+        
+        store.set = None  # write-through per track tidak boleh dipakai
+        store.set_many = tracked_set_many
+        try:
+            await spotify.get_tracks_preview([f"track{i}" for i in range(60)] + ["unknown"])
+            assert spotify.session is None
+        finally:
+            await spotify.aclose()
+    
+    asyncio.run(run())
+    
+    assert writes == [(61, True)]
+    restarted = SpotifyClient("client-id", "client-secret", cache_path=cache_path)
+    assert restarted.track_cache.get("track59")["preview_url"].endswith("track59")
+    assert restarted.track_cache.get("unknown") is None
+    restarted.close()
+
+
+def test_async_persistent_cache_read_off_loop(stub_server, tmp_path):
+    """Test miss di memory dibaca dari persistent cache dengan satu query di luar event loop"""
+    base = f"http://127.0.0.1:{stub_server.server_address[1]}"
+    cache_path = str(tmp_path / "spotify_cache.db")
+    warm = SpotifyClient("client-id", "client-secret", cache_path=cache_path)
+    warm.AUTH_URL = f"{base}/api/token"
+    warm.API_BASE_URL = f"{base}/v1"
+    warm.get_tracks_preview([f"track{i}" for i in range(60)])
+    warm.close()
+    reads = []
+    
+    async def run():
+        spotify = make_async_client(stub_server, cache_path=cache_path)
+        store = spotify.track_cache.store
+        original = store.get_many
+        loop_thread = threading.get_ident()
+        
+        def tracked_get_many(keys):
+            reads.append((len(keys), threading.get_ident() != loop_thread))
+            return original(keys)
+        
+        store.get = None  # lookup per key tidak boleh dipakai
+        store.get_many = tracked_get_many
+        try:
+            batch = await spotify.get_tracks_preview([f"track{i}" for i in range(60)])
+            single = await spotify.get_track_preview("track3")
+            return batch, single, spotify.cache_stats()
+        finally:
+            await spotify.aclose()
+    
+    batch, single, stats = asyncio.run(run())
+    
+    assert batch["track59"]["preview_url"].endswith("track59")
+    assert single == batch["track3"]
+    assert reads == [(60, True)]
+    assert stats["hits"] == 61 and stats["misses"] == 0
+    assert len(api_calls(stub_server)) == 2  # hanya dari warm client
+
+
+def test_async_persistent_cache_purged(stub_server, tmp_path):
+    """Test entry expired dihapus dari persistent cache secara berkala"""
+    cache_path = str(tmp_path / "spotify_cache.db")
+    
+    async def run():
+        spotify = make_async_client(stub_server, cache_path=cache_path,
+                                    negative_ttl=0, cache_purge_every=2)
+        connection = spotify.track_cache.store.connection
+        count = lambda: connection.execute("SELECT COUNT(*) FROM spotify_tracks").fetchone()[0]
+        try:
+            await spotify.get_tracks_preview(["track1", "unknown1"])
+            after_first = count()
+            await spotify.get_tracks_preview(["track2", "unknown2"])
+            return after_first, count()
+        finally:
+            await spotify.aclose()
+    
+    after_first, after_purge = asyncio.run(run())
+    
+    assert after_first == 2
+    assert after_purge == 2  # track1, track2; hasil negatif expired sudah dihapus
+
+
+def test_async_concurrency_bounded(stub_server):
+    """Test bahwa jumlah request bersamaan dibatasi semaphore"""
+    async def run():
+        spotify = make_async_client(stub_server, max_concurrency=2)
+        in_flight = 0
+        peak = 0
+        original = spotify.http.request
+        
+        async def tracked_request(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            try:
+                await asyncio.sleep(0.01)
+                return await original(*args, **kwargs)
+            finally:
+                in_flight -= 1
+        
+        spotify.http.request = tracked_request
+        try:
+            await spotify.get_access_token()
+            await asyncio.gather(*(spotify.get_track_preview(f"track{i}") for i in range(10)))
+        finally:
+            await spotify.aclose()
+        return peak
+    
+    assert asyncio.run(run()) == 2
+
+
+def test_sync_token_refresh_single_flight(client, stub_server):
+    """Test bahwa thread yang bersamaan hanya memicu satu token request"""
+    stub_server.token_delay = 0.1
+    tokens = []
+    
+    threads = [threading.Thread(target=lambda: tokens.append(client.get_access_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert tokens == ["stub-token-1"] * 8
+    assert len(token_calls(stub_server)) == 1
+
+
+def test_async_token_refresh_single_flight(stub_server):
+    """Test bahwa request bersamaan menunggu satu refresh yang sama"""
+    stub_server.token_delay = 0.1
+    
+    async def run():
+        spotify = make_async_client(stub_server)
+        try:
+            return await asyncio.gather(*(spotify.get_access_token() for _ in range(20)))
+        finally:
+            await spotify.aclose()
+    
+    tokens = asyncio.run(run())
+    
+    assert set(tokens) == {"stub-token-1"}
+    assert len(token_calls(stub_server)) == 1
+
+
+def test_async_token_renewed_before_expiry(stub_server):
+    """Test bahwa background renewal mengganti token sebelum expired"""
+    # expires_in 2 -> token berlaku 1 detik (dikurangi setengah umurnya)
+    stub_server.token_expires_in = 2
+    
+    async def run():
+        spotify = make_async_client(stub_server, token_renew_before=0.8, token_min_refresh=0.1)
+        spotify.start_token_renewal()
+        try:
+            await asyncio.sleep(0.7)
+            valid = spotify._has_valid_token()
+            token = spotify.access_token
+        finally:
+            await spotify.aclose()
+        return valid, token
+    
+    valid, token = asyncio.run(run())
+    
+    assert valid
+    assert token != "stub-token-1"
+    assert len(token_calls(stub_server)) >= 2
+
+
+def test_short_lived_token_margin(client, stub_server):
+    """Test safety margin token tidak melebihi setengah umur token"""
+    stub_server.token_expires_in = 30
+    
+    client.get_access_token()
+    
+    remaining = (client.token_expires_at - datetime.now()).total_seconds()
+    assert 14 < remaining <= 15
+    assert client._has_valid_token()
+
+
+def test_async_token_renewal_does_not_spin(stub_server):
+    """Test token yang langsung expired tidak membuat renewal loop memanggil AUTH_URL terus"""
+    stub_server.token_expires_in = 0
+    
+    async def run():
+        spotify = make_async_client(stub_server, token_min_refresh=0.2)
+        spotify.start_token_renewal()
+        try:
+            await asyncio.sleep(0.5)
+        finally:
+            await spotify.aclose()
+    
+    asyncio.run(run())
+    
+    assert 1 <= len(token_calls(stub_server)) <= 3
+
+
+def test_retry_after_honored_across_calls(client, stub_server):
+    """Test bahwa 429 Retry-After menahan semua panggilan berikutnya"""
+    stub_server.status = 429
+    
+    assert client.get_track_preview("track1") is None
+    assert client.rate_limit.is_limited()
+    
+    stub_server.status = 200
+    assert client.get_tracks_preview(["track2"]) == {"track2": None}
+    assert client.get_track_preview("track3") is None
+    assert len(api_calls(stub_server)) == 1
+    
+    # Setelah Retry-After (1 detik di stub) lewat, panggilan jalan lagi
+    client.rate_limit.blocked_until = 0
+    assert client.get_track_preview("track3")["preview_url"].endswith("track3")
+
+
+def test_circuit_breaker_short_circuits(stub_server):
+    """Test bahwa breaker open setelah kegagalan beruntun dan pulih via half-open"""
+    base = f"http://127.0.0.1:{stub_server.server_address[1]}"
+    spotify = SpotifyClient("client-id", "client-secret",
+                            breaker=CircuitBreaker(failure_threshold=3, recovery_timeout=60))
+    spotify.AUTH_URL = f"{base}/api/token"
+    spotify.API_BASE_URL = f"{base}/v1"
+    
+    stub_server.status = 503
+    for i in range(3):
+        spotify.get_track_preview(f"track{i}")
+    assert spotify.breaker.state == CircuitBreaker.OPEN
+    
+    # Open: tidak ada request ke Spotify
+    stub_server.status = 200
+    assert spotify.get_tracks_preview(["track5", "track6"]) == {"track5": None, "track6": None}
+    assert len(api_calls(stub_server)) == 3
+    assert spotify.resilience_stats()["short_circuited"] == 1
+    
+    # Setelah recovery timeout, satu probe menutup breaker
+    spotify.breaker.opened_at -= 60
+    assert spotify.get_track_preview("track5")["preview_url"].endswith("track5")
+    assert spotify.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_circuit_breaker_half_open_failure():
+    """Test bahwa probe yang gagal membuka breaker lagi dan slow call dihitung gagal"""
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0, slow_call_threshold=0.5)
+    
+    breaker.record_success(duration=1.0)
+    breaker.record_success(duration=1.0)
+    assert breaker.state == CircuitBreaker.OPEN
+    
+    assert breaker.allow_request() is True   # probe
+    assert breaker.allow_request() is False  # probe lain masih berjalan
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_rate_limit_does_not_reset_breaker(client, stub_server):
+    """Test 429 tidak dihitung sebagai sukses oleh circuit breaker"""
+    stub_server.status = 503
+    client.get_track_preview("track1")
+    client.get_track_preview("track2")
+    assert client.breaker.failures == 2
+    
+    stub_server.status = 429
+    client.get_track_preview("track3")
+    
+    assert client.breaker.failures == 2
+    assert client.rate_limit.is_limited()
+
+
+def test_async_explicit_zero_deadline(stub_server):
+    """Test deadline=0 eksplisit tidak diganti enrich_deadline default"""
+    async def run():
+        spotify = make_async_client(stub_server, enrich_deadline=None)
+        try:
+            await spotify.get_access_token()
+            stub_server.delay = 0.5
+            single = await spotify.get_track_preview("track1", deadline=0)
+            batch = await spotify.get_tracks_preview(["track2"], deadline=0)
+            return single, batch
+        finally:
+            await spotify.aclose()
+    
+    single, batch = asyncio.run(run())
+    
+    assert single is None
+    assert batch == {"track2": None}
+
+
+def test_async_enrichment_deadline(stub_server):
+    """Test bahwa enrichment berhenti di deadline dan slow call membuka breaker"""
+    async def run():
+        spotify = make_async_client(
+            stub_server, enrich_deadline=0.2,
+            breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        )
+        try:
+            await spotify.get_access_token()
+            stub_server.delay = 1.0
+            
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            results = await spotify.get_tracks_preview(["track1", "track2"])
+            elapsed = loop.time() - start
+            
+            # Breaker open: panggilan berikutnya langsung None
+            start = loop.time()
+            single = await spotify.get_track_preview("track3")
+            short_circuit_elapsed = loop.time() - start
+            return results, elapsed, single, short_circuit_elapsed, spotify.breaker.state
+        finally:
+            await spotify.aclose()
+    
+    results, elapsed, single, short_circuit_elapsed, state = asyncio.run(run())
+    
+    assert results == {"track1": None, "track2": None}
+    assert elapsed < 0.5
+    assert single is None
+    assert short_circuit_elapsed < 0.05
+    assert state == CircuitBreaker.OPEN
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+Tests untuk SQL candidate provider
+"""
+import pytest
+import numpy as np
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from db.database import Database
+from db.init_db import init_database
+from services.catalog import CatalogSnapshot
+from services.recommendation_table import compute_entries
+from services.rule_engine import RuleEngine
+from services.song_catalog import SongCatalog
+from services.sql_candidates import SQLCandidateProvider
+
+
+@pytest.fixture
+def test_db():
+    """Create a test database dengan beberapa lagu ber-features"""
+    test_db_path = "test_sql_candidates.db"
+    
+    init_database(test_db_path)
+    db = Database(test_db_path)
+    db.insert_song("Loud", "X", "rock", "semangat", "fast", features={"energy": 0.9, "bpm": 150})
+    db.insert_song("Soft", "Y", "ballad", "sedih", "slow", features={"energy": 0.1, "valence": 0.2})
+    db.insert_song("Mid", "Z", "pop", "happy", "medium", features={"tempo": 118, "valence": 0.8})
+    
+    yield db
+    
+    db.close()
+    if os.path.exists(test_db_path):
+        os.remove(test_db_path)
+
+
+KEYS = [(mood, genre, tempo)
+        for mood in RuleEngine.MOOD_RULES
+        for genre in (None, "pop", "indie", "jazz")
+        for tempo in (None, "slow", "fast")]
+
+
+def test_matches_in_memory_entries(test_db):
+    """Test kandidat, urutan dan score sama dengan snapshot in-memory"""
+    snapshot = CatalogSnapshot.build(SongCatalog.from_columns(test_db.get_song_columns()), version=1)
+    provider = SQLCandidateProvider(test_db)
+    
+    expected = compute_entries(snapshot, RuleEngine(), KEYS, 10)
+    actual = provider.compute_entries(KEYS, 10)
+    
+    for key, memory, sql in zip(KEYS, expected, actual):
+        assert sql.user_profile == memory.user_profile, key
+        assert sql.candidates_count == memory.candidates_count, key
+        assert sql.song_ids.tolist() == memory.song_ids.tolist(), key
+        np.testing.assert_allclose(sql.similarity_scores, memory.similarity_scores, atol=1e-6)
+        np.testing.assert_array_equal(sql.preliminary_scores, memory.preliminary_scores)
+
+
+def test_audio_stats_match_catalog(test_db):
+    """Test statistik audio streaming sama dengan AudioFeatureStore katalog"""
+    snapshot = CatalogSnapshot.build(SongCatalog.from_columns(test_db.get_song_columns()), version=1)
+    recommender = SQLCandidateProvider(test_db, batch_size=2).load()
+    expected = snapshot.recommender
+    
+    assert recommender.audio.columns == expected.audio.columns
+    np.testing.assert_allclose(recommender.audio.mean, expected.audio.mean)
+    np.testing.assert_allclose(recommender.audio.std, expected.audio.std)
+    assert recommender.audio_targets.keys() == expected.audio_targets.keys()
+    for mood, target in expected.audio_targets.items():
+        np.testing.assert_allclose(recommender.audio_targets[mood], target, atol=1e-6)
+
+
+def test_limit_keeps_highest_preliminary_scores(test_db):
+    """Test limit mengambil kandidat dengan preliminary_score tertinggi"""
+    provider = SQLCandidateProvider(test_db, limit=3)
+    provider.load()
+    
+    candidates, preliminary = provider.select_candidates("sedih", None, None)
+    _, all_preliminary = SQLCandidateProvider(test_db).select_candidates("sedih", None, None)
+    
+    assert len(candidates) == 3
+    assert preliminary.tolist() == sorted(all_preliminary.tolist(), reverse=True)[:3]
+
+
+def test_strict_query_uses_composite_index(test_db):
+    """Test strict pass memakai index (genre, tempo, mood)"""
+    SQLCandidateProvider(test_db).load()
+    
+    with test_db.reader() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM songs INDEXED BY idx_genre_tempo_mood "
+            "WHERE genre IN ('pop', 'rock') AND tempo IN ('fast')"
+        ).fetchall()
+    assert any("idx_genre_tempo_mood" in row[-1] for row in plan)
+
+
+def test_refresh_if_changed(test_db):
+    """Test encoder di-update saat genre baru masuk database"""
+    provider = SQLCandidateProvider(test_db)
+    provider.load()
+    assert not provider.refresh_if_changed()
+    
+    test_db.insert_song("Take Five", "Dave Brubeck", "jazz", "happy", "fast")
+    
+    assert provider.refresh_if_changed()
+    assert "jazz" in provider.recommender.genre_encoder
+    assert provider.version == 2
+    entry = provider.compute_entries([("happy", "jazz", "fast")], 5)[0]
+    assert test_db.get_songs_by_ids(entry.song_ids.tolist())[entry.song_ids[0]]["title"] == "Take Five"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])